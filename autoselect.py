@@ -5,16 +5,33 @@
 异步模式版本
 """
 
+import os
 import re
-import sys
 import base64
 import configparser
+import time
 import asyncio
-from typing import List, Optional
+import contextlib
+from datetime import datetime
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 
 import httpx
 
+from scheduler import CourseGroup, FairRateLimiter, RequestScheduler, SchedulerConfig
+from select_result import SelectOutcome, classify_select_response, is_login_redirect
+from hedge import HedgeConfig, HedgedRequester
+from session_cache import SessionCache, SessionCacheConfig
+from clock_sync import BurstConfig, ClockEstimate, estimate_clock_offset, min_sync_before, sleep_until
+from conflict_check import ConflictConfig, plan_courses
+from course_catalog import CourseCatalog
+from metrics import Metrics, MetricsConfig, MetricsReporter
+from seat_watch import SeatWatcher, WatchConfig
+from captcha import CaptchaConfig, create_provider
+from traffic_log import RecordingTransport, ReplayLog, ReplayTransport, TrafficConfig, TrafficRecorder
+from prewarm import PinnedTransport, PrewarmConfig, Prewarmer
+from control import ControlConfig, ControlError, ControlServer
+
 
 @dataclass
 class CourseConfig:
@@ -22,6 +39,8 @@ class CourseConfig:
 	course_id: str
 	course_type: str  # 'public' 或 'required'
 	url: str
+	priority: int = 0  # 数值越大越先获得请求名额
+	min_interval: Optional[float] = None  # 该课程两次请求的最小间隔，None 使用调度器默认值
 
 
 @dataclass
@@ -30,83 +49,412 @@ class LoginConfig:
 	username: str
 	password: str
 	semester: str
+	base_url: str = 'http://csujwc.its.csu.edu.cn'
+
+
+@dataclass
+class HttpConfig:
+	"""HTTP连接池配置"""
+	max_connections: int = 20  # 连接池最大连接数，对冲请求需要至少2条
+	max_keepalive_connections: int = 10  # 最多保持的空闲长连接数
+	keepalive_expiry: float = 30.0  # 空闲长连接的保留时间（秒）
+	timeout: float = 10.0  # 读写超时（秒）
+	connect_timeout: float = 5.0  # 建立连接超时（秒）
+	pool_timeout: float = 5.0  # 等待连接池空闲连接的超时（秒）
+
+
+class CSUURLs:
+	"""中南大学教务系统URL常量（相对于 BASE_URL 的路径）"""
+	BASE_URL = 'http://csujwc.its.csu.edu.cn'
+	VERIFY_CODE_URL = '/jsxsd/verifycode.servlet'
+	LOGIN_URL = '/jsxsd/xk/LoginToXk'
+	MAIN_URL = '/jsxsd/framework/xsMain.jsp'
+	COURSE_LIST_URL = '/jsxsd/xsxk/xklc_list'
+	COURSE_FIND_URL = '/jsxsd/xsxkkc/xsxkGgxxkxk?kcxx=&skls=&skxq=&skjc=&sfym=false&sfct=false&szjylb='
+	PUBLIC_SELECT_URL = '/jsxsd/xsxkkc/ggxxkxkOper'
+	REQUIRED_SELECT_URL = '/jsxsd/xsxkkc/bxqjhxkOper'
 
 
 class ConfigManager:
 	"""配置管理器"""
 	
+	ACCOUNT_PREFIX = 'account:'
+	INHERITED_KEYS = ('time', 'base_url')  # 账号节未填写时从 [config] 继承的键
+	
 	def __init__(self, config_file: str = 'config.ini'):
 		self.config_file = config_file
 		self.config = configparser.ConfigParser()
 		self.config.read(config_file, encoding='utf-8')
+	
+	def get_account_sections(self) -> List[str]:
+		"""获取所有账号所在的配置节，存在 [account:*] 时只使用这些节，否则使用 [config]"""
+		accounts = [name for name in self.config.sections() if name.startswith(self.ACCOUNT_PREFIX)]
+		return accounts or ['config']
+	
+	def _section_items(self, section: str) -> dict:
+		"""读取账号节，未填写的学期和服务器地址从 [config] 继承"""
+		items = dict(self.config.items(section))
+		if section != 'config' and self.config.has_section('config'):
+			for key in self.INHERITED_KEYS:
+				if key not in items and self.config.has_option('config', key):
+					items[key] = self.config.get('config', key)
+		return items
 		
-	def get_login_config(self) -> LoginConfig:
+	def get_login_config(self, section: str = 'config') -> LoginConfig:
 		"""获取登录配置"""
-		items = dict(self.config.items('config'))
+		items = self._section_items(section)
 		return LoginConfig(
 			username=items['username'],
 			password=items['password'],
-			semester=items['time']
+			semester=items['time'],
+			base_url=items.get('base_url', CSUURLs.BASE_URL).rstrip('/')
 		)
 	
-	def get_course_configs(self) -> List[CourseConfig]:
+	def get_course_configs(self, section: str = 'config') -> List[CourseConfig]:
 		"""获取课程配置列表"""
-		items = dict(self.config.items('config'))
+		items = self._section_items(section)
 		courses = []
 		
 		# 公选课
 		num1 = int(items.get('num1', 0))
 		for i in range(1, num1 + 1):
-			course_id = items[f'id{i}']
-			courses.append(CourseConfig(
-				course_id=course_id,
-				course_type='public',
-				url=f'http://csujwc.its.csu.edu.cn/jsxsd/xsxkkc/ggxxkxkOper?jx0404id={items["time"]}{course_id}&xkzy=&trjf='
-			))
+			courses.append(self.make_course_config(items['time'], items[f'id{i}'], 'public', **self._get_course_options(items, f'{i}')))
 		
 		# 必修课
 		num2 = int(items.get('num2', 0))
 		for i in range(1, num2 + 1):
-			course_id = items[f'id_{i}']
-			courses.append(CourseConfig(
-				course_id=course_id,
-				course_type='required',
-				url=f'http://csujwc.its.csu.edu.cn/jsxsd/xsxkkc/bxqjhxkOper?jx0404id={items["time"]}{course_id}&xkzy=&trjf='
-			))
+			courses.append(self.make_course_config(items['time'], items[f'id_{i}'], 'required', **self._get_course_options(items, f'_{i}')))
 		
 		return courses
+	
+	@staticmethod
+	def make_course_config(semester: str, course_id: str, course_type: str, priority: int = 0, min_interval: Optional[float] = None) -> CourseConfig:
+		"""按学期、课程ID和类型（public / required）生成课程配置"""
+		select_url = CSUURLs.PUBLIC_SELECT_URL if course_type == 'public' else CSUURLs.REQUIRED_SELECT_URL
+		return CourseConfig(
+			course_id=course_id,
+			course_type=course_type,
+			url=f'{select_url}?jx0404id={semester}{course_id}&xkzy=&trjf=',
+			priority=priority,
+			min_interval=min_interval
+		)
+	
+	def get_course_groups(self, section: str = 'config') -> List[CourseGroup]:
+		"""
+		获取课程组，如 group1 = 1 of id1..id5 表示 id1 到 id5 中选上 1 门即可；
+		成员可以用逗号分隔，必修课写作 id_1..id_3
+		"""
+		items = self._section_items(section)
+		groups = []
+		grouped = {}
+		for key, value in items.items():
+			if not key.startswith('group'):
+				continue
+			match = re.fullmatch(r'\s*(\d+)\s*of\s*(.+)', value)
+			if not match:
+				raise ValueError(f'{section} 中 {key} 格式错误，应为 "1 of id1..id5"')
+			course_ids = []
+			for member in match.group(2).split(','):
+				member = member.strip()
+				span = re.fullmatch(r'(id_?)(\d+)\s*\.\.\s*(?:id_?)?(\d+)', member)
+				keys = [f'{span.group(1)}{i}' for i in range(int(span.group(2)), int(span.group(3)) + 1)] if span else [member]
+				for course_key in keys:
+					if course_key not in items:
+						raise ValueError(f'{section} 中 {key} 引用了未配置的 {course_key}')
+					course_id = items[course_key]
+					if course_id in grouped:
+						raise ValueError(f'{section} 中课程 {course_id} 同时属于 {grouped[course_id]} 和 {key}')
+					grouped[course_id] = key
+					course_ids.append(course_id)
+			groups.append(CourseGroup(name=key, quota=int(match.group(1)), course_ids=course_ids))
+		return groups
+	
+	@staticmethod
+	def _get_course_options(items: dict, suffix: str) -> dict:
+		"""读取课程的可选参数，如 priority1 / interval1 或 priority_1 / interval_1"""
+		options = {}
+		if f'priority{suffix}' in items:
+			options['priority'] = int(items[f'priority{suffix}'])
+		if f'interval{suffix}' in items:
+			options['min_interval'] = float(items[f'interval{suffix}'])
+		return options
+	
+	def get_scheduler_config(self) -> SchedulerConfig:
+		"""获取调度器配置，未配置 [scheduler] 时使用默认值"""
+		if not self.config.has_section('scheduler'):
+			return SchedulerConfig()
+		section = self.config['scheduler']
+		defaults = SchedulerConfig()
+		return SchedulerConfig(
+			rate=section.getfloat('rate', defaults.rate),
+			burst=section.getint('burst', defaults.burst),
+			min_interval=section.getfloat('min_interval', defaults.min_interval),
+			backoff_base=section.getfloat('backoff_base', defaults.backoff_base),
+			backoff_max=section.getfloat('backoff_max', defaults.backoff_max)
+		)
+	
+	def get_http_config(self) -> HttpConfig:
+		"""获取HTTP连接池配置，未配置 [http] 时使用默认值"""
+		if not self.config.has_section('http'):
+			return HttpConfig()
+		section = self.config['http']
+		defaults = HttpConfig()
+		return HttpConfig(
+			max_connections=section.getint('max_connections', defaults.max_connections),
+			max_keepalive_connections=section.getint('max_keepalive_connections', defaults.max_keepalive_connections),
+			keepalive_expiry=section.getfloat('keepalive_expiry', defaults.keepalive_expiry),
+			timeout=section.getfloat('timeout', defaults.timeout),
+			connect_timeout=section.getfloat('connect_timeout', defaults.connect_timeout),
+			pool_timeout=section.getfloat('pool_timeout', defaults.pool_timeout)
+		)
+	
+	def get_hedge_config(self) -> HedgeConfig:
+		"""获取对冲请求配置，未配置 [hedge] 时不启用"""
+		if not self.config.has_section('hedge'):
+			return HedgeConfig()
+		section = self.config['hedge']
+		defaults = HedgeConfig()
+		return HedgeConfig(
+			enabled=section.getboolean('enabled', True),
+			percentile=section.getfloat('percentile', defaults.percentile),
+			min_delay=section.getfloat('min_delay', defaults.min_delay),
+			initial_delay=section.getfloat('initial_delay', defaults.initial_delay),
+			window=section.getint('window', defaults.window),
+			min_samples=section.getint('min_samples', defaults.min_samples),
+			max_ratio=section.getfloat('max_ratio', defaults.max_ratio),
+			max_outstanding=section.getint('max_outstanding', defaults.max_outstanding)
+		)
+	
+	def get_conflict_config(self, section: str = 'config') -> ConflictConfig:
+		"""获取冲突预检配置，未配置 [conflict] 时不启用；已选课程（enrolled）在账号所在的节中配置"""
+		if not self.config.has_section('conflict'):
+			return ConflictConfig()
+		conflict = self.config['conflict']
+		defaults = ConflictConfig()
+		enrolled = self._section_items(section).get('enrolled', '')
+		return ConflictConfig(
+			enabled=conflict.getboolean('enabled', True),
+			catalog=conflict.get('catalog', defaults.catalog),
+			enrolled=[course_id.strip() for course_id in enrolled.split(',') if course_id.strip()],
+			action=conflict.get('action', defaults.action),
+			penalty=conflict.getint('penalty', defaults.penalty),
+			max_sets=max(1, conflict.getint('max_sets', defaults.max_sets))
+		)
+	
+	def get_metrics_config(self) -> MetricsConfig:
+		"""获取运行指标配置，未配置 [metrics] 时不启用"""
+		if not self.config.has_section('metrics'):
+			return MetricsConfig()
+		section = self.config['metrics']
+		defaults = MetricsConfig()
+		return MetricsConfig(
+			enabled=section.getboolean('enabled', True),
+			host=section.get('host', defaults.host),
+			port=section.getint('port', defaults.port),
+			summary_interval=section.getfloat('summary_interval', defaults.summary_interval)
+		)
+	
+	def get_watch_config(self) -> WatchConfig:
+		"""获取余量监视配置，未配置 [watch] 时不启用"""
+		if not self.config.has_section('watch'):
+			return WatchConfig()
+		section = self.config['watch']
+		defaults = WatchConfig()
+		return WatchConfig(
+			enabled=section.getboolean('enabled', True),
+			interval=section.getfloat('interval', defaults.interval),
+			page_size=section.getint('page_size', defaults.page_size),
+			max_failures=section.getint('max_failures', defaults.max_failures)
+		)
+	
+	def get_captcha_config(self) -> CaptchaConfig:
+		"""获取验证码配置，未配置 [captcha] 时在终端输入"""
+		if not self.config.has_section('captcha'):
+			return CaptchaConfig()
+		section = self.config['captcha']
+		defaults = CaptchaConfig()
+		return CaptchaConfig(
+			provider=section.get('provider', defaults.provider),
+			attempts=max(1, section.getint('attempts', defaults.attempts)),
+			templates=section.get('templates', defaults.templates),
+			glyphs=section.getint('glyphs', defaults.glyphs),
+			min_confidence=section.getfloat('min_confidence', defaults.min_confidence),
+			fallback=section.get('fallback', defaults.fallback),
+			timeout=section.getfloat('timeout', defaults.timeout)
+		)
+	
+	def get_traffic_config(self) -> TrafficConfig:
+		"""获取请求录制/回放配置，未配置 [traffic] 时不启用"""
+		if not self.config.has_section('traffic'):
+			return TrafficConfig()
+		section = self.config['traffic']
+		defaults = TrafficConfig()
+		mode = section.get('mode', defaults.mode).strip().lower()
+		if mode not in ('', 'record', 'replay'):
+			raise ValueError(f'[traffic] mode 只能是 record 或 replay: {mode}')
+		return TrafficConfig(
+			mode=mode,
+			path=section.get('path', defaults.path),
+			speed=section.getfloat('speed', defaults.speed)
+		)
+	
+	def get_prewarm_config(self) -> PrewarmConfig:
+		"""获取连接预热配置，未配置 [prewarm] 时不启用"""
+		if not self.config.has_section('prewarm'):
+			return PrewarmConfig()
+		section = self.config['prewarm']
+		defaults = PrewarmConfig()
+		return PrewarmConfig(
+			enabled=section.getboolean('enabled', True),
+			connections=max(1, section.getint('connections', defaults.connections)),
+			keepalive_interval=section.getfloat('keepalive_interval', defaults.keepalive_interval),
+			pin_dns=section.getboolean('pin_dns', defaults.pin_dns)
+		)
+	
+	def get_control_config(self) -> ControlConfig:
+		"""获取常驻模式配置，未配置 [daemon] 时不启用"""
+		if not self.config.has_section('daemon'):
+			return ControlConfig()
+		section = self.config['daemon']
+		defaults = ControlConfig()
+		return ControlConfig(
+			enabled=section.getboolean('enabled', True),
+			host=section.get('host', defaults.host),
+			port=section.getint('port', defaults.port),
+			socket=section.get('socket', defaults.socket),
+			reload_interval=section.getfloat('reload_interval', defaults.reload_interval),
+			keepalive_interval=section.getfloat('keepalive_interval', defaults.keepalive_interval)
+		)
+	
+	def get_session_cache_config(self) -> SessionCacheConfig:
+		"""获取会话缓存配置，未配置 [session] 时默认启用"""
+		if not self.config.has_section('session'):
+			return SessionCacheConfig()
+		section = self.config['session']
+		defaults = SessionCacheConfig()
+		return SessionCacheConfig(
+			enabled=section.getboolean('enabled', defaults.enabled),
+			path=section.get('path', defaults.path),
+			max_age=section.getfloat('max_age', defaults.max_age)
+		)
+	
+	def get_burst_config(self) -> Optional[BurstConfig]:
+		"""获取定时突发配置，未配置 [burst] open_time 时返回 None"""
+		if not self.config.has_section('burst') or not self.config['burst'].get('open_time'):
+			return None
+		section = self.config['burst']
+		open_time = datetime.fromisoformat(section['open_time'].strip())
+		defaults = BurstConfig(open_time=0.0)
+		sync_before = section.getfloat('sync_before', defaults.sync_before)
+		sync_samples = max(1, section.getint('sync_samples', defaults.sync_samples))
+		if sync_before < min_sync_before(sync_samples):
+			# 对时来不及在开放前完成，突发会在开放之后才发出
+			raise ValueError(f'[burst] sync_before 至少为 {min_sync_before(sync_samples):g} 秒（sync_samples = {sync_samples}）: {sync_before:g}')
+		return BurstConfig(
+			open_time=open_time.timestamp(),
+			sync_before=sync_before,
+			sync_samples=sync_samples,
+			probes=section.getint('probes', defaults.probes),
+			probe_interval=section.getfloat('probe_interval', defaults.probe_interval)
+		)
 
 
-class CSUURLs:
-	"""中南大学教务系统URL常量"""
-	BASE_URL = 'http://csujwc.its.csu.edu.cn'
-	VERIFY_CODE_URL = f'{BASE_URL}/jsxsd/verifycode.servlet'
-	LOGIN_URL = f'{BASE_URL}/jsxsd/xk/LoginToXk'
-	MAIN_URL = f'{BASE_URL}/jsxsd/framework/xsMain.jsp'
-	COURSE_LIST_URL = f'{BASE_URL}/jsxsd/xsxk/xklc_list'
-	COURSE_FIND_URL = 'http://csujwc.its.csu.edu.cn/jsxsd/xsxkkc/xsxkGgxxkxk?kcxx=&skls=&skxq=&skjc=&sfym=false&sfct=false&szjylb='
-		
-
 class CourseSelector:
 	"""课程选择器"""
 	
-	def __init__(self, config_manager: ConfigManager):
+	def __init__(self, config_manager: ConfigManager, section: str = 'config',
+			transport: Optional[httpx.AsyncBaseTransport] = None, limiter=None, metrics: Optional[Metrics] = None,
+			recorder: Optional[TrafficRecorder] = None, shared_control: bool = False):
 		self.config_manager = config_manager
-		self.login_config = config_manager.get_login_config()
-		self.course_configs = config_manager.get_course_configs()
+		self.section = section
+		self.login_config = config_manager.get_login_config(section)
+		self.course_configs = config_manager.get_course_configs(section)
+		self.course_groups = config_manager.get_course_groups(section)
+		self.scheduler_config = config_manager.get_scheduler_config()
+		self.burst_config = config_manager.get_burst_config()
+		self.http_config = config_manager.get_http_config()
+		self.hedge_config = config_manager.get_hedge_config()
+		self.conflict_config = config_manager.get_conflict_config(section)
+		session_cache_config = config_manager.get_session_cache_config()
+		self.session_cache = SessionCache(session_cache_config) if session_cache_config.enabled else None
+		self.transport = transport  # 多账号时共享的底层连接池
+		self.limiter = limiter  # 多账号时的公平限速器
+		self.metrics_config = config_manager.get_metrics_config()
+		# 多账号时共用一个指标注册表，由 run_accounts 负责端点与汇总输出
+		self.owns_metrics = metrics is None and self.metrics_config.enabled
+		self.metrics = Metrics() if self.owns_metrics else metrics
+		self.traffic_config = config_manager.get_traffic_config()
+		# 多账号时共用一个录制器（同一个日志文件），由 run_accounts 负责启动和关闭
+		self.owns_recorder = recorder is None and self.traffic_config.mode == 'record'
+		self.recorder = TrafficRecorder(self.traffic_config.path) if self.owns_recorder else recorder
+		self.replay: Optional[ReplayLog] = None
+		if self.traffic_config.mode == 'replay':
+			self.replay = ReplayLog.load(self.traffic_config.path, self.name)
+			self.session_cache = None  # 回放时不读写会话缓存
+		self.captcha_config = config_manager.get_captcha_config()
+		self.captcha = create_provider(self.captcha_config, self.name, self.log)
+		self.captcha_prefetch: Optional[asyncio.Task] = None  # 登录检查期间预取的下一张验证码
 		self.client: Optional[httpx.AsyncClient] = None
+		self.hedger: Optional[HedgedRequester] = None
+		self.scheduler: Optional[RequestScheduler] = None
+		self.watch_config = config_manager.get_watch_config()
+		self.watcher: Optional[SeatWatcher] = None
+		self.session_generation = 0  # 每次会话恢复后加一
+		self.recovery: Optional[asyncio.Task] = None
+		self.recovery_times: List[float] = []  # 每次会话恢复的耗时（秒）
+		self.prewarm_config = config_manager.get_prewarm_config()
+		self.pinned: Optional[PinnedTransport] = None
+		self.prewarmer: Optional[Prewarmer] = None
+		self.prepared: Dict[str, httpx.Request] = {}  # 课程ID -> 预先构造的选课请求
+		self.prepared_cookies: tuple = ()
+		self.prepared_sent = 0
+		self.control_config = config_manager.get_control_config()
+		self.daemon = self.control_config.enabled  # 常驻模式：课程全部结束后继续运行，等待控制命令
+		# 多账号时共用一个控制接口，由 run_accounts 负责启动
+		self.owns_control = self.daemon and not shared_control
+		self.config_courses = {course.course_id: course for course in self.course_configs}  # 配置文件中的课程，重新读取时比较
+		self.phase = 'starting'
+		self.stopping = False
+		self.paused_courses = set()  # 调度器创建前暂停的课程
+		self.last_outcomes: Dict[str, str] = {}  # 课程ID -> 最近一次选课结果
+		self.watch_task: Optional[asyncio.Task] = None
+		self.keepalives = 0  # 常驻模式空闲时的保活请求数
 		
 		if not self.course_configs:
-			raise ValueError('未配置任何课程ID')
+			raise ValueError(f'{section} 未配置任何课程ID')
 	
-	async def get_verify_code(self) -> str:
-		"""获取验证码"""
+	@property
+	def name(self) -> str:
+		"""账号名，[account:xxx] 中的 xxx"""
+		return self.section[len(ConfigManager.ACCOUNT_PREFIX):] if self.section.startswith(ConfigManager.ACCOUNT_PREFIX) else ''
+	
+	def log(self, message: str):
+		"""输出日志，多账号时带上账号名"""
+		print(f'[{self.name}] {message}' if self.name else message)
+	
+	def record_phase(self, phase: str, outcome: str, started_at: float):
+		"""记录登录、进入选课等阶段的一次请求"""
+		if self.metrics:
+			self.metrics.record_phase(phase, self.name, outcome, time.perf_counter() - started_at)
+	
+	async def fetch_captcha(self) -> bytes:
+		"""获取验证码图片"""
 		response = await self.client.get(CSUURLs.VERIFY_CODE_URL)
-		with open('code.jpg', 'wb') as f:
-			f.write(response.content)
-		
-		await self.client.get(CSUURLs.LOGIN_URL)  # 获取登录页面
-		return input("输入验证码：")
+		return response.content
+	
+	async def get_verify_code(self) -> str:
+		"""获取验证码（优先使用登录检查期间预取的图片），交给验证码提供者识别或等待输入"""
+		if self.captcha_prefetch is not None:
+			image = await self.captcha_prefetch
+			self.captcha_prefetch = None
+		else:
+			image = await self.fetch_captcha()
+			await self.client.get(CSUURLs.LOGIN_URL)  # 获取登录页面
+		if self.replay is not None:
+			# 回放时登录结果来自录制的响应，不需要验证码
+			return ''
+		code_path = f'code_{self.name}.jpg' if self.name else 'code.jpg'
+		return await self.captcha.solve(image, code_path)
 	
 	async def check_login_success(self) -> bool:
 		"""检查是否登录成功，通过访问主页面并检查内容来判断"""
@@ -129,11 +477,11 @@ class CourseSelector:
 				
 			return True
 		except Exception as e:
-			print(f"登录检测时发生错误: {e}")
+			self.log(f"登录检测时发生错误: {e}")
 			return False
 
-	async def login(self, verify_code: str) -> bool:
-		"""登录系统"""
+	async def login(self, verify_code: str, prefetch: bool = False) -> bool:
+		"""登录系统，prefetch 为真时在检查登录结果的同时预取下一张验证码（失败后重试用）"""
 		username_b64 = base64.b64encode(self.login_config.username.encode()).decode()
 		password_b64 = base64.b64encode(self.login_config.password.encode()).decode()
 		
@@ -142,87 +490,686 @@ class CourseSelector:
 			'RANDOMCODE': verify_code
 		}
 		
+		started_at = time.perf_counter()
 		await self.client.post(CSUURLs.LOGIN_URL, data=data)
+		if prefetch:
+			self.captcha_prefetch = asyncio.ensure_future(self.fetch_captcha())
 		
 		# 使用新的登录检查逻辑
 		if await self.check_login_success():
-			print('成功登录教务系统')
+			self.record_phase('login', 'success', started_at)
+			self.log('成功登录教务系统')
+			if self.captcha_prefetch is not None:
+				self.captcha_prefetch.cancel()
+				self.captcha_prefetch = None
 			return True
 		else:
-			print('学号或密码或验证码错误，请退出修改配置重启')
+			self.record_phase('login', 'failure', started_at)
+			if not prefetch:
+				self.log('学号或密码或验证码错误，请退出修改配置重启')
 			return False
 	
+	async def login_with_captcha(self) -> bool:
+		"""获取验证码并登录，最多尝试 captcha.attempts 张验证码"""
+		attempts = self.captcha_config.attempts
+		for attempt in range(1, attempts + 1):
+			verify_code = await self.get_verify_code()
+			if await self.login(verify_code, prefetch=attempt < attempts):
+				return True
+			if attempt < attempts:
+				self.log(f'登录失败，重新获取验证码（第 {attempt + 1}/{attempts} 次）')
+		return False
+	
+	async def restore_session(self) -> Optional[bool]:
+		"""恢复缓存的会话并验证，有效时返回是否已进入选课，无效时返回 None"""
+		if not self.session_cache:
+			return None
+		cached = self.session_cache.load(self.login_config.username, self.login_config.semester)
+		if cached is None:
+			return None
+		SessionCache.restore_cookies(cached, self.client.cookies)
+		if await self.check_login_success():
+			self.log('已恢复缓存的登录会话，跳过验证码与登录')
+			return cached.entered
+		self.log('缓存的登录会话已失效，重新登录')
+		self.client.cookies.clear()
+		self.session_cache.discard(self.login_config.username, self.login_config.semester)
+		return None
+	
+	def save_session(self, entered: bool):
+		"""保存当前会话，供重启后复用"""
+		if self.session_cache:
+			self.session_cache.save(self.login_config.username, self.login_config.semester, self.client.cookies, entered)
+	
+	async def find_entry_link(self) -> Optional[str]:
+		"""查询选课轮次列表，返回"进入选课"链接"""
+		started_at = time.perf_counter()
+		response = await self.client.get(CSUURLs.COURSE_LIST_URL)
+		keys = re.findall('href="(.+?)" target="blank">进入选课', response.text)
+		self.record_phase('entry_list', 'found' if keys else 'not_found', started_at)
+		return keys[0] if keys else None
+	
 	async def enter_course_selection(self) -> bool:
 		"""进入选课页面"""
 		while True:
-			response = await self.client.get(CSUURLs.COURSE_LIST_URL)
-			keys = re.findall('href="(.+?)" target="blank">进入选课', response.text)
+			key = await self.find_entry_link()
 			
-			if keys:
-				await self.client.get(CSUURLs.BASE_URL + keys[0])
-				print('成功进入选课页面')
+			if key:
+				started_at = time.perf_counter()
+				await self.client.get(key)
+				self.record_phase('enter', 'success', started_at)
+				self.log('成功进入选课页面')
 				return True
 			
-			print('寻找选课列表中...')
+			self.log('寻找选课列表中...')
 			await asyncio.sleep(0.5)
 	
-	async def select_course(self, course_config: CourseConfig) -> bool:
-		"""选择单个课程"""
+	async def sync_clock(self) -> ClockEstimate:
+		"""在开放前 sync_before 秒与服务器对时，并报告偏差与抖动"""
+		await sleep_until(self.burst_config.open_time - self.burst_config.sync_before)
+		self.log('正在与服务器对时...')
+		estimate = await estimate_clock_offset(self.client, CSUURLs.LOGIN_URL, self.burst_config.sync_samples)
+		self.log(f'时钟偏差: {estimate.offset * 1000:+.1f} ms (±{estimate.uncertainty * 1000:.1f} ms)，'
+			f'RTT: {estimate.rtt * 1000:.1f} ms，抖动: {estimate.jitter * 1000:.1f} ms')
+		return estimate
+	
+	async def burst_enter_course_selection(self, estimate: ClockEstimate) -> bool:
+		"""在校正后的开放时刻密集发出选课轮次查询，最先拿到链接的立即进入选课"""
+		# 提前半个 RTT 发出，使请求恰好在开放时刻到达服务器
+		fire_at = estimate.to_local(self.burst_config.open_time) - estimate.rtt / 2
+		late = time.time() - fire_at
+		if late > 0:
+			self.log(f'警告: 对时结束时已过开放时刻 {late * 1000:.1f} ms，立即发出查询（可增大 [burst] sync_before）')
+		
+		async def probe(index: int) -> Optional[str]:
+			await sleep_until(fire_at + index * self.burst_config.probe_interval)
+			return await self.find_entry_link()
+		
+		probes = [asyncio.ensure_future(probe(i)) for i in range(self.burst_config.probes)]
+		try:
+			for future in asyncio.as_completed(probes):
+				try:
+					key = await future
+				except Exception as e:
+					self.log(f"定时查询选课列表出错: {e}")
+					continue
+				if key:
+					started_at = time.perf_counter()
+					await self.client.get(key)
+					self.record_phase('enter', 'success', started_at)
+					self.log(f'成功进入选课页面（距开放时刻 {(time.time() + estimate.offset - self.burst_config.open_time) * 1000:+.1f} ms）')
+					return True
+		finally:
+			for future in probes:
+				future.cancel()
+		
+		self.log('定时突发未找到选课入口，转为常规轮询')
+		return await self.enter_course_selection()
+	
+	async def first_round(self) -> List[CourseConfig]:
+		"""
+		所有课程同时发出第一轮选课请求，返回仍需继续抢的课程；
+		课程组只对优先级最高的 quota 门课程发出请求，避免同时选上多门
+		"""
+		deferred = set()
+		for group in self.course_groups:
+			members = sorted(
+				(course for course in self.course_configs if course.course_id in group.course_ids),
+				key=lambda course: -course.priority
+			)
+			deferred.update(course.course_id for course in members[group.quota:])
+		first = [course for course in self.course_configs if course.course_id not in deferred]
+		results = await asyncio.gather(
+			*(self.select_course(course_config) for course_config in first),
+			return_exceptions=True
+		)
+		finished = set()
+		for course_config, result in zip(first, results):
+			if isinstance(result, Exception):
+				self.log(f"课程 {course_config.course_id} 发生错误: {result}")
+				continue
+			if result.selected:
+				for group in self.course_groups:
+					if course_config.course_id in group.course_ids:
+						group.selected.append(course_config.course_id)
+			if result.finished:
+				finished.add(course_config.course_id)
+		return [course for course in self.course_configs if course.course_id not in finished]
+	
+	async def select_course(self, course_config: CourseConfig) -> SelectOutcome:
+		"""对单个课程发起一次选课请求，返回结果类型（finished 为真表示该课程已结束，否则需要重试）"""
+		generation = self.session_generation
+		started_at = time.perf_counter()
+		label = 'error'
+		request = self.take_prepared(course_config.course_id)
+		try:
+			if self.hedger:
+				response = await self.hedger.get(course_config.url, request)
+			elif request is not None:
+				response = await self.client.send(request)
+			else:
+				response = await self.client.get(course_config.url)
+			if response.status_code >= 500:
+				response.raise_for_status()
+			result = classify_select_response(response.text, response.status_code, response.headers.get('location'))
+			outcome = result.outcome
+			label = outcome.value
+		except asyncio.CancelledError:
+			label = 'cancelled'
+			raise
+		finally:
+			self.last_outcomes[course_config.course_id] = label
+			if self.metrics:
+				self.metrics.record_select(self.name, course_config.course_id, label, time.perf_counter() - started_at)
+		
+		if outcome is SelectOutcome.SUCCESS:
+			self.log(f"课程 {course_config.course_id} 成功抢课!")
+		elif outcome is SelectOutcome.CONFLICT:
+			self.log(f"课程 {course_config.course_id} {result.message or '课程冲突'}，已暂停该课程选课")
+		elif outcome is SelectOutcome.ALREADY_SELECTED:
+			self.log(f"课程 {course_config.course_id} {result.message or '当前教学班已选择'}")
+		elif outcome is SelectOutcome.NOT_FOUND:
+			self.log(f"课程 {course_config.course_id} 没有该ID所对应的课程")
+		elif outcome is SelectOutcome.SESSION_EXPIRED:
+			await self.recover_session(generation)
+		elif outcome is SelectOutcome.FULL and self.scheduler is not None and self.watcher is not None and self.watcher.watching(course_config.course_id):
+			# 已满的课程重新挂起，等余量监视发现空位再请求
+			self.scheduler.hold(course_config.course_id)
+		
+		return outcome
+	
+	def cookie_signature(self) -> tuple:
+		return tuple((cookie.domain, cookie.path, cookie.name, cookie.value) for cookie in self.client.cookies.jar)
+	
+	def prepare_requests(self, course_configs: List[CourseConfig]):
+		"""预先构造每门课程的第一次选课请求（含当前 Cookie）"""
+		self.prepared = {course.course_id: self.client.build_request('GET', course.url) for course in course_configs}
+		self.prepared_cookies = self.cookie_signature()
+	
+	def take_prepared(self, course_id: str) -> Optional[httpx.Request]:
+		"""取出预先构造的请求；构造之后 Cookie 有变化（如重新登录）时全部作废"""
+		if not self.prepared:
+			return None
+		request = self.prepared.pop(course_id, None)
+		if request is not None and self.cookie_signature() != self.prepared_cookies:
+			self.prepared = {}
+			return None
+		if request is not None:
+			self.prepared_sent += 1
+		return request
+	
+	async def prewarm(self):
+		"""登录后预热连接池并预先构造选课请求，保活持续到进入选课"""
+		config = self.prewarm_config
+		if config.connections > self.http_config.max_keepalive_connections:
+			self.log(f'连接预热: connections 超过 max_keepalive_connections，只保持 {self.http_config.max_keepalive_connections} 条')
+			config = PrewarmConfig(config.enabled, self.http_config.max_keepalive_connections, config.keepalive_interval, config.pin_dns)
+		self.prewarmer = Prewarmer(self.client, config, CSUURLs.LOGIN_URL, self.pinned, self.log)
+		await self.prewarmer.warm()
+		self.prepare_requests(self.course_configs)
+	
+	async def recover_session(self, generation: int):
+		"""
+		会话失效后重新登录并进入选课。多个请求同时发现失效时只恢复一次；
+		请求发出后会话已经恢复过（generation 已变化）时不再恢复
+		"""
+		if generation != self.session_generation:
+			return
+		if self.recovery is None or self.recovery.done():
+			self.recovery = asyncio.ensure_future(self._recover_session())
+		# 单个请求被取消（如课程组已选满）时不影响恢复
+		await asyncio.shield(self.recovery)
+	
+	async def _recover_session(self):
+		"""暂停调度器，重新登录并进入选课，完成后恢复排队的课程"""
+		started_at = time.perf_counter()
+		self.log('会话已失效，暂停选课并重新登录')
+		if self.scheduler is not None:
+			self.scheduler.pause()
+		try:
+			if self.captcha_prefetch is not None:
+				self.captcha_prefetch.cancel()
+				self.captcha_prefetch = None
+			self.client.cookies.clear()
+			if self.session_cache:
+				self.session_cache.discard(self.login_config.username, self.login_config.semester)
+			if not await self.login_with_captcha():
+				self.record_phase('recover', 'failure', started_at)
+				raise RuntimeError('会话失效后重新登录失败')
+			self.save_session(entered=False)
+			await self.enter_course_selection()
+			self.save_session(entered=True)
+			self.session_generation += 1
+		finally:
+			if self.scheduler is not None:
+				self.scheduler.resume()
+		elapsed = time.perf_counter() - started_at
+		self.recovery_times.append(elapsed)
+		self.record_phase('recover', 'success', started_at)
+		self.log(f'会话已恢复，用时 {elapsed * 1000:.0f} ms，继续选课')
+	
+	def precheck_conflicts(self) -> List[CourseConfig]:
+		"""按本地课程目录中的周次、节次预检课程冲突，返回调整后的课程列表"""
+		config = self.conflict_config
+		if not os.path.exists(config.catalog):
+			self.log(f'冲突预检: 课程目录 {config.catalog} 不存在，跳过（先运行 course_finder.py）')
+			return self.course_configs
+		course_ids = [course.course_id for course in self.course_configs]
+		with CourseCatalog(config.catalog) as catalog:
+			meetings = catalog.get_meetings(self.login_config.semester, course_ids + config.enrolled)
+		slots = {
+			course_id: [(weeks, f'{weekday} {periods}'.strip()) for weekday, weeks, periods in rows]
+			for course_id, rows in meetings.items()
+		}
+		missing = [course_id for course_id in config.enrolled if course_id not in slots]
+		if missing:
+			self.log(f"冲突预检: 已选课程 {', '.join(missing)} 不在课程目录中，无法检查")
+		enrolled = [meeting for course_id in config.enrolled for meeting in slots.get(course_id, ())]
+		alternatives = [group.course_ids for group in self.course_groups if group.quota == 1]
+		plan = plan_courses(self.course_configs, slots, enrolled, config, alternatives)
+		for line in plan.describe(config.action):
+			self.log(line)
+		return plan.courses
+	
+	def create_watcher(self, course_configs: List[CourseConfig]) -> Optional[SeatWatcher]:
+		"""创建余量监视（只用于公选课，课程列表中只有公选课）"""
+		if not self.watch_config.enabled:
+			return None
+		targets = {
+			f'{self.login_config.semester}{course.course_id}': course.course_id
+			for course in course_configs if course.course_type == 'public'
+		}
+		return SeatWatcher(self.fetch_listing_page, self.watch_config, targets, self.log) if targets else None
+	
+	async def fetch_listing_page(self, form: dict) -> str:
+		"""查询一页公选课列表，会话失效时恢复后重试一次"""
+		generation = self.session_generation
+		started_at = time.perf_counter()
+		response = await self.client.post(CSUURLs.COURSE_FIND_URL, data=form)
+		if is_login_redirect(response.status_code, response.headers.get('location')) or (
+				not response.text.lstrip().startswith('{') and classify_select_response(response.text).outcome is SelectOutcome.SESSION_EXPIRED):
+			self.record_phase('watch', 'session_expired', started_at)
+			await self.recover_session(generation)
+			started_at = time.perf_counter()
+			response = await self.client.post(CSUURLs.COURSE_FIND_URL, data=form)
+		if response.status_code >= 500:
+			self.record_phase('watch', 'error', started_at)
+			response.raise_for_status()
+		self.record_phase('watch', 'success', started_at)
+		return response.text
+	
+	async def watch_seats(self):
+		"""运行余量监视，异常退出时放行所有挂起的课程，改为直接轮询"""
+		try:
+			await self.watcher.run(self.scheduler)
+		except asyncio.CancelledError:
+			raise
+		except Exception as e:
+			self.log(f'余量监视出错: {e}，改为直接轮询')
+			for course_id in list(self.watcher.targets.values()):
+				self.scheduler.release(course_id)
+			self.watcher.targets = {}
+	
+	async def run_scheduler(self, course_configs: List[CourseConfig]):
+		"""由调度器统一分配请求名额进行抢课，启用余量监视时公选课先挂起，有余量时才发出请求"""
+		self.watcher = self.create_watcher(course_configs)
+		self.scheduler = self.create_scheduler(course_configs)
+		if self.watcher is not None:
+			self.log(f'余量监视: 每 {self.watch_config.interval} 秒查询一次课程列表，关注 {len(self.watcher.targets)} 门公选课')
+			self.watch_task = asyncio.ensure_future(self.watch_seats())
+		# 常驻模式下课程全部结束后没有请求，由保活请求维持会话
+		keepalive_task = asyncio.ensure_future(self.keep_session_alive()) if self.daemon and self.control_config.keepalive_interval > 0 else None
+		try:
+			await self.scheduler.run()
+		finally:
+			for task in (self.watch_task, keepalive_task):
+				if task is not None:
+					task.cancel()
+	
+	def idle(self) -> bool:
+		"""没有课程在排队或请求中，余量监视也已结束（不再有请求维持会话）"""
+		if self.watch_task is not None and not self.watch_task.done():
+			return False
+		return not any(self.scheduler.status(course_id) in ('queued', 'in_flight') for course_id in list(self.scheduler.states))
+	
+	async def keep_session_alive(self):
+		"""常驻模式空闲时定期访问主页面，避免会话因空闲过期；发现会话已失效时立即恢复，加入课程时不必等待重新登录"""
 		while True:
+			await asyncio.sleep(self.control_config.keepalive_interval)
+			if not self.idle():
+				continue
+			await self.scheduler.wait_resumed()
+			generation = self.session_generation
+			started_at = time.perf_counter()
 			try:
-				response = await self.client.get(course_config.url)
-				text = response.text
-				
-				if re.search('true', text):
-					print(f"课程 {course_config.course_id} 成功抢课!")
-					return True
-				
-				if re.search('冲突', text):
-					match = re.search('"选课失败：(.+)"', text)
-					error_msg = match.group(1) if match else "课程冲突"
-					print(f"课程 {course_config.course_id} {error_msg}，已暂停该课程选课")
-					return True
-				
-				if re.search('当前教学班已选择！', text):
-					match = re.search('"选课失败：(.+)"', text)
-					error_msg = match.group(1) if match else "当前教学班已选择"
-					print(f"课程 {course_config.course_id} {error_msg}")
-					return True
-				
-				if re.search('null', text):
-					print(f"课程 {course_config.course_id} 没有该ID所对应的课程")
-					return True
-				
-				await asyncio.sleep(0.5)
-				
-			except Exception as e:
-				print(f"课程 {course_config.course_id} 发生错误: {e}")
-				await asyncio.sleep(0.5)
+				response = await self.client.get(CSUURLs.MAIN_URL)
+			except httpx.HTTPError as e:
+				self.record_phase('keepalive', 'error', started_at)
+				self.log(f'会话保活请求失败: {e}')
+				continue
+			# 与 check_login_success 相同的判断（主页面中可能有指向 LoginToXk 的退出链接）
+			if is_login_redirect(response.status_code, response.headers.get('location')) or ('登录' in response.text and '用户名' in response.text):
+				self.record_phase('keepalive', 'session_expired', started_at)
+				try:
+					await self.recover_session(generation)
+				except Exception as e:
+					self.log(f'会话保活: {e}')
+				continue
+			self.record_phase('keepalive', 'success', started_at)
+			self.keepalives += 1
+	
+	def create_scheduler(self, course_configs: Optional[List[CourseConfig]] = None) -> RequestScheduler:
+		"""创建请求调度器并加入课程（默认为全部课程），余量监视关注的课程先挂起"""
+		scheduler = RequestScheduler(self.scheduler_config, self.select_course, self.limiter, self.log)
+		scheduler.persistent = self.daemon
+		for course_config in self.course_configs if course_configs is None else course_configs:
+			held = self.watcher is not None and self.watcher.watching(course_config.course_id)
+			scheduler.add(course_config, course_config.priority, course_config.min_interval, held=held)
+			if course_config.course_id in self.paused_courses:
+				scheduler.pause_course(course_config.course_id)
+		for group in self.course_groups:
+			scheduler.add_group(group)
+		if self.stopping:
+			scheduler.stop()
+		return scheduler
+	
+	def _find_course(self, course_id: str) -> CourseConfig:
+		for course in self.course_configs:
+			if course.course_id == course_id:
+				return course
+		raise ControlError(f'没有课程 {course_id}', 404)
+	
+	def _course_status(self, course_id: str) -> str:
+		if self.scheduler is None:
+			return 'paused' if course_id in self.paused_courses else 'waiting'
+		# 第一轮即已结束的课程不会加入调度器
+		return self.scheduler.status(course_id) or 'done'
+	
+	def status(self) -> dict:
+		"""账号与每门课程的状态（控制接口 /status）"""
+		courses = []
+		for course in self.course_configs:
+			state = self.scheduler.states.get(course.course_id) if self.scheduler is not None else None
+			courses.append({
+				'id': course.course_id,
+				'type': course.course_type,
+				'priority': course.priority,
+				'state': self._course_status(course.course_id),
+				'attempts': state.attempts if state is not None else 0,
+				'failures': state.failures if state is not None else 0,
+				'outcome': self.last_outcomes.get(course.course_id),
+				'seats': self.watcher.seats.get(course.course_id) if self.watcher is not None else None,
+			})
+		return {
+			'account': self.name,
+			'phase': self.phase,
+			'recovering': self.recovery is not None and not self.recovery.done(),
+			'session_generation': self.session_generation,
+			'courses': courses,
+		}
+	
+	def _add_course(self, course: CourseConfig):
+		self.course_configs = [c for c in self.course_configs if c.course_id != course.course_id] + [course]
+		self.paused_courses.discard(course.course_id)
+		if self.scheduler is None:
+			return
+		# 余量监视仍在运行时，新加入的公选课同样先挂起等待余量
+		held = False
+		if self.watcher is not None and self.watch_task is not None and not self.watch_task.done() and course.course_type == 'public':
+			self.watcher.targets[f'{self.login_config.semester}{course.course_id}'] = course.course_id
+			held = True
+		self.scheduler.add(course, course.priority, course.min_interval, held=held)
+	
+	def add_course(self, course_id: str, course_type: str = 'public', priority: int = 0, min_interval: Optional[float] = None) -> dict:
+		"""加入课程（已结束的课程可以重新加入）"""
+		if any(course.course_id == course_id for course in self.course_configs) and self._course_status(course_id) != 'done':
+			raise ControlError(f'课程 {course_id} 已在选课列表中', 409)
+		self._add_course(ConfigManager.make_course_config(self.login_config.semester, course_id, course_type, priority, min_interval))
+		self.log(f'加入课程 {course_id}（{course_type}，优先级 {priority}）')
+		return {'id': course_id, 'state': self._course_status(course_id)}
+	
+	def remove_course(self, course_id: str) -> dict:
+		"""移除课程，进行中的请求被取消"""
+		self._find_course(course_id)
+		self.course_configs = [course for course in self.course_configs if course.course_id != course_id]
+		self.paused_courses.discard(course_id)
+		if self.scheduler is not None:
+			self.scheduler.remove(course_id)
+		if self.watcher is not None:
+			self.watcher.unwatch([course_id])
+		self.log(f'移除课程 {course_id}')
+		return {'id': course_id, 'state': 'removed'}
+	
+	def pause_course(self, course_id: str) -> dict:
+		"""暂停课程，恢复前不再发出请求"""
+		self._find_course(course_id)
+		if self.scheduler is None:
+			self.paused_courses.add(course_id)
+		elif not self.scheduler.pause_course(course_id) and self._course_status(course_id) == 'done':
+			raise ControlError(f'课程 {course_id} 已结束', 409)
+		self.log(f'暂停课程 {course_id}')
+		return {'id': course_id, 'state': self._course_status(course_id)}
+	
+	def resume_course(self, course_id: str) -> dict:
+		"""恢复暂停的课程"""
+		self._find_course(course_id)
+		self.paused_courses.discard(course_id)
+		if self.scheduler is not None:
+			self.scheduler.resume_course(course_id)
+		self.log(f'恢复课程 {course_id}')
+		return {'id': course_id, 'state': self._course_status(course_id)}
+	
+	def reprioritize_course(self, course_id: str, priority: int, min_interval: Optional[float] = None) -> dict:
+		"""调整课程优先级（以及最小请求间隔）"""
+		course = self._find_course(course_id)
+		course.priority = priority
+		if min_interval is not None:
+			course.min_interval = min_interval
+		if self.scheduler is not None:
+			self.scheduler.reprioritize(course_id, priority, min_interval)
+		self.log(f'课程 {course_id} 优先级调整为 {priority}')
+		return {'id': course_id, 'priority': priority, 'state': self._course_status(course_id)}
+	
+	def reload_courses(self, config_manager: ConfigManager) -> List[str]:
+		"""
+		按重新读取的配置文件应用课程变化：与上次读取的配置比较，加入新增的课程、移除删去的课程、更新优先级和间隔；
+		通过控制接口做的修改只要配置文件中对应的课程未变就保持不变
+		"""
+		new_courses = {course.course_id: course for course in config_manager.get_course_configs(self.section)}
+		changes = []
+		for course_id, old in self.config_courses.items():
+			new = new_courses.get(course_id)
+			if new is None or new.course_type != old.course_type:
+				if any(course.course_id == course_id for course in self.course_configs):
+					self.remove_course(course_id)
+				changes.append(f'移除 {course_id}')
+		for course_id, new in new_courses.items():
+			old = self.config_courses.get(course_id)
+			if old is None or new.course_type != old.course_type:
+				self._add_course(new)
+				changes.append(f'加入 {course_id}')
+			elif (new.priority, new.min_interval) != (old.priority, old.min_interval):
+				if any(course.course_id == course_id for course in self.course_configs):
+					self.reprioritize_course(course_id, new.priority, new.min_interval)
+				changes.append(f'{course_id} 优先级 {old.priority} → {new.priority}')
+		groups = [(group.name, group.quota, group.course_ids) for group in config_manager.get_course_groups(self.section)]
+		if groups != [(group.name, group.quota, group.course_ids) for group in self.course_groups]:
+			changes.append('课程组的修改需要重启后生效')
+		self.config_courses = new_courses
+		return changes
+	
+	def stop(self):
+		"""结束选课（控制接口 /stop），尚未进入选课时在进入后立即结束"""
+		self.stopping = True
+		if self.scheduler is not None:
+			self.scheduler.stop()
+	
+	def create_client(self) -> httpx.AsyncClient:
+		"""创建HTTP客户端，所有请求路径都相对于配置的 base_url"""
+		http = self.http_config
+		timeout = httpx.Timeout(http.timeout, connect=http.connect_timeout, pool=http.pool_timeout)
+		transport = self.transport
+		if self.replay is not None:
+			transport = ReplayTransport(self.replay, self.traffic_config.speed)
+		else:
+			if self.prewarm_config.enabled and self.prewarm_config.pin_dns:
+				# 固定解析结果只作用于实际连接，录制的请求仍按域名记录
+				transport = self.pinned = PinnedTransport(
+					transport or httpx.AsyncHTTPTransport(limits=create_limits(http)),
+					httpx.URL(self.login_config.base_url).host
+				)
+			if self.recorder is not None:
+				transport = RecordingTransport(transport or httpx.AsyncHTTPTransport(limits=create_limits(http)), self.recorder, self.name)
+		if transport is not None:
+			# 共享连接池时每个账号仍有独立的 Cookie
+			return httpx.AsyncClient(base_url=self.login_config.base_url, cookies=None, transport=transport, timeout=timeout)
+		return httpx.AsyncClient(
+			base_url=self.login_config.base_url,
+			cookies=None,
+			limits=create_limits(http),
+			timeout=timeout
+		)
 	
 	async def run(self):
 		"""运行选课程序"""
+		async with contextlib.AsyncExitStack() as stack:
+			if self.owns_metrics:
+				await stack.enter_async_context(MetricsReporter(self.metrics, self.metrics_config, self.log))
+			if self.owns_recorder:
+				stack.callback(lambda: self.log(f'已录制 {self.recorder.count} 次请求到 {self.recorder.path}'))
+				stack.enter_context(self.recorder)
+			if self.owns_control:
+				config_file = self.config_manager.config_file
+				await stack.enter_async_context(
+					ControlServer({self.name: self}, self.control_config, config_file, lambda: ConfigManager(config_file), self.log)
+				)
+			await self.run_selection()
+		if self.replay is not None:
+			self.log(self.replay.summary())
+	
+	async def run_selection(self):
+		"""登录、进入选课并抢课"""
 		try:
-			async with httpx.AsyncClient(cookies=None) as self.client:
-				# 获取验证码并登录
-				verify_code = await self.get_verify_code()
-				if not await self.login(verify_code):
+			if self.conflict_config.enabled:
+				self.course_configs = self.precheck_conflicts()
+				if not self.course_configs:
+					self.log('冲突预检后没有可选的课程，程序退出')
 					return
+			
+			async with self.create_client() as self.client:
+				if self.hedge_config.enabled:
+					self.hedger = HedgedRequester(self.client, self.hedge_config)
 				
-				# 进入选课页面
-				if not await self.enter_course_selection():
-					return
+				# 优先复用缓存的会话，失效时再获取验证码并登录
+				self.phase = 'login'
+				entered = await self.restore_session()
+				if entered is None:
+					if not await self.login_with_captcha():
+						return
+					self.save_session(entered=False)
+				
+				if self.prewarm_config.enabled and self.replay is None:
+					await self.prewarm()
+				
+				burst = False
+				self.phase = 'entering'
+				try:
+					if entered:
+						pass
+					elif self.burst_config:
+						# 对时后在开放时刻定时进入选课
+						estimate = await self.sync_clock()
+						if not await self.burst_enter_course_selection(estimate):
+							return
+						self.save_session(entered=True)
+						burst = True
+					else:
+						# 进入选课页面
+						if not await self.enter_course_selection():
+							return
+						self.save_session(entered=True)
+				finally:
+					if self.prewarmer is not None:
+						await self.prewarmer.stop()
 				
-				# 并发抢课
-				tasks = [
-					self.select_course(course_config) 
-					for course_config in self.course_configs
-				]
-				await asyncio.gather(*tasks)
+				# 定时进入选课后立即发出第一轮选课请求
+				course_configs = await self.first_round() if burst else self.course_configs
 				
-				print('选课已完成，程序退出')
+				# 由调度器统一分配请求名额进行抢课
+				self.phase = 'selecting'
+				await self.run_scheduler(course_configs)
+				
+				self.log('选课已完成，程序退出')
 				
 		except Exception as e:
-			print(f"程序运行出错: {e}")
+			self.log(f"程序运行出错: {e}")
+		finally:
+			self.phase = 'finished'
+
+
+def create_limits(http_config: HttpConfig) -> httpx.Limits:
+	"""根据配置创建连接池限制"""
+	return httpx.Limits(
+		max_connections=http_config.max_connections,
+		max_keepalive_connections=http_config.max_keepalive_connections,
+		keepalive_expiry=http_config.keepalive_expiry
+	)
+
+
+class SharedTransport(httpx.AsyncBaseTransport):
+	"""多个客户端共用的连接池，单个客户端关闭时不关闭底层连接"""
+	
+	def __init__(self, transport: httpx.AsyncBaseTransport):
+		self.transport = transport
+	
+	async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+		return await self.transport.handle_async_request(request)
+	
+	async def aclose(self):
+		pass
+
+
+async def run_accounts(config_manager: ConfigManager, selector_factory=CourseSelector):
+	"""在同一个事件循环中为所有账号选课，共享连接池并公平分配全局请求速率"""
+	sections = config_manager.get_account_sections()
+	scheduler_config = config_manager.get_scheduler_config()
+	total_rate = scheduler_config.rate * len(sections)
+	if config_manager.config.has_option('scheduler', 'total_rate'):
+		total_rate = config_manager.config.getfloat('scheduler', 'total_rate')
+	fair_limiter = FairRateLimiter(total_rate, scheduler_config.burst)
+	metrics_config = config_manager.get_metrics_config()
+	metrics = Metrics() if metrics_config.enabled else None
+	traffic_config = config_manager.get_traffic_config()
+	recorder = TrafficRecorder(traffic_config.path) if traffic_config.mode == 'record' else None
+	
+	async with httpx.AsyncHTTPTransport(limits=create_limits(config_manager.get_http_config())) as transport:
+		shared = SharedTransport(transport)
+		selectors = [
+			selector_factory(
+				config_manager,
+				section,
+				transport=shared,
+				limiter=fair_limiter.view(section, scheduler_config.rate, scheduler_config.burst),
+				metrics=metrics,
+				recorder=recorder,
+				shared_control=True
+			)
+			for section in sections
+		]
+		control_config = config_manager.get_control_config()
+		print(f'共 {len(selectors)} 个账号，全局请求速率上限 {total_rate} 次/秒')
+		async with contextlib.AsyncExitStack() as stack:
+			if metrics is not None:
+				await stack.enter_async_context(MetricsReporter(metrics, metrics_config))
+			if recorder is not None:
+				stack.callback(lambda: print(f'已录制 {recorder.count} 次请求到 {recorder.path}'))
+				stack.enter_context(recorder)
+			if control_config.enabled:
+				config_file = config_manager.config_file
+				await stack.enter_async_context(ControlServer(
+					{selector.name: selector for selector in selectors}, control_config, config_file, lambda: ConfigManager(config_file)
+				))
+			await asyncio.gather(*(selector.run() for selector in selectors))
 
 
 def main():
@@ -231,9 +1178,13 @@ def main():
 		# 初始化配置管理器
 		config_manager = ConfigManager()
 		
-		# 创建选课器并运行
-		selector = CourseSelector(config_manager)
-		asyncio.run(selector.run())
+		if len(config_manager.get_account_sections()) > 1:
+			# 多账号共用一个事件循环
+			asyncio.run(run_accounts(config_manager))
+		else:
+			# 创建选课器并运行
+			selector = CourseSelector(config_manager, config_manager.get_account_sections()[0])
+			asyncio.run(selector.run())
 			
 	except KeyboardInterrupt:
 		print("\n程序被用户中断")
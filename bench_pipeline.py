@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+课程数据处理流水线基准测试
+parsers：在合成数据上检查新解析器与原实现的输出是否一致，并比较两者的耗时：
+- 课表页面：timetable_parser 与 parse_course_data 的原正则实现
+- 教师列表页面：teacher_list 与 parse_js_data 的原实现
+pipeline：按规模（10 到 10 万位教师）生成教师列表页面和每位教师一周的课表页面，
+分别计时 course_finder 的 parse_js_data、complete_teacher_info、parse_course_data、generate_config_format
+和串起来的端到端流程，记录吞吐量与内存峰值；结果可保存为 JSON 基线，之后的运行与基线比较，
+耗时或内存峰值超出基线 threshold 比例时返回失败
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import course_finder
+from synthetic_data import generate_teacher_list_page, generate_teachers, generate_timetable_page, generate_weekly_timetable
+from teacher_index import INDEX_PATH
+from teacher_list import iter_teacher_records, save_teacher_list
+from timetable_parser import WEEKDAY_FIELD, extract_online_courses
+from tests.test_timetable_parser import EDGE_CASES, legacy_parse_course_data
+
+
+def legacy_parse_js_data(html_content: str) -> list:
+	"""course_finder.parse_js_data 的原实现（只做解析），作为教师列表的参照"""
+	match = re.search(r'var\s+js\s*=\s*"(\[.*?\])"', html_content, re.DOTALL)
+	if not match:
+		return []
+	js_data_str = match.group(1).replace("'", '"')
+	js_data_str = re.sub(r'(\w+):', r'"\1":', js_data_str)
+	return json.loads(js_data_str)
+
+
+def legacy_save_js_data(html_content: str, path: str) -> int:
+	"""原实现的完整流程：整页解析后以 indent=2 写入文件"""
+	data = legacy_parse_js_data(html_content)
+	with open(path, 'w', encoding='utf-8') as f:
+		json.dump(data, f, ensure_ascii=False, indent=2)
+	return len(data)
+
+
+def chunked(text: str, size: int = 64 * 1024):
+	"""模拟流式读取响应"""
+	for start in range(0, len(text), size):
+		yield text[start:start + size]
+
+
+def check_compatibility(pages: Dict[str, str]) -> List[str]:
+	"""逐页比较两种实现的输出（含字典键顺序，不含原实现没有的星期字段），返回不一致的页面名称"""
+	mismatched = []
+	for name, page in pages.items():
+		legacy = [list(course.items()) for course in legacy_parse_course_data(page)]
+		current = [[item for item in course.items() if item[0] != WEEKDAY_FIELD] for course in extract_online_courses(page)]
+		if legacy != current:
+			mismatched.append(name)
+	return mismatched
+
+
+def time_parser(parser: Callable[[str], object], pages: List[str], repeat: int) -> float:
+	"""重复 repeat 轮解析全部页面，返回最快一轮的耗时（秒）"""
+	best = float('inf')
+	for _ in range(repeat):
+		start = time.perf_counter()
+		for page in pages:
+			parser(page)
+		best = min(best, time.perf_counter() - start)
+	return best
+
+
+def peak_memory(function: Callable[[], object]) -> int:
+	"""执行 function 期间新分配内存的峰值（字节）"""
+	tracemalloc.start()
+	try:
+		function()
+		return tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+
+
+def bench_timetable(args: argparse.Namespace) -> dict:
+	"""课表页面：兼容性检查与耗时对比"""
+	compat_pages = dict(EDGE_CASES)
+	for seed in range(50):
+		compat_pages[f'随机页面 {seed}'] = generate_timetable_page(40, seed=seed, class_first=seed % 5 == 0)
+	mismatched = check_compatibility(compat_pages)
+
+	pages = [
+		generate_timetable_page(args.blocks, args.online_ratio, seed=args.seed + index, class_first=index % 2 == 1)
+		for index in range(args.pages)
+	]
+	size = sum(len(page.encode('utf-8')) for page in pages)
+	legacy = time_parser(legacy_parse_course_data, pages, args.repeat)
+	current = time_parser(extract_online_courses, pages, args.repeat)
+	return {
+		'compat_pages': len(compat_pages),
+		'mismatched': mismatched,
+		'pages': args.pages,
+		'blocks_per_page': args.blocks,
+		'megabytes': round(size / 1e6, 2),
+		'legacy_seconds': round(legacy, 4),
+		'extractor_seconds': round(current, 4),
+		'speedup': round(legacy / current, 2) if current else None,
+	}
+
+
+def bench_teacher_list(args: argparse.Namespace) -> dict:
+	"""教师列表页面：兼容性检查、含特殊字符时的正确性、耗时与内存峰值对比"""
+	plain = generate_teachers(2000, seed=args.seed)
+	compatible = legacy_parse_js_data(generate_teacher_list_page(plain)) == list(iter_teacher_records([generate_teacher_list_page(plain)]))
+
+	special = generate_teachers(2000, seed=args.seed, special_ratio=0.05)
+	special_page = generate_teacher_list_page(special)
+	streaming_correct = list(iter_teacher_records(chunked(special_page, 1000))) == special
+	try:
+		legacy_correct = legacy_parse_js_data(special_page) == special
+	except ValueError:
+		legacy_correct = False
+
+	page = generate_teacher_list_page(generate_teachers(args.teachers, seed=args.seed))
+	with tempfile.TemporaryDirectory() as directory:
+		legacy_path = os.path.join(directory, 'legacy.json')
+		current_path = os.path.join(directory, 'parsed_data.json')
+		legacy = time_parser(lambda text: legacy_save_js_data(text, legacy_path), [page], args.repeat)
+		current = time_parser(lambda text: save_teacher_list(chunked(text), current_path), [page], args.repeat)
+		legacy_size = os.path.getsize(legacy_path)
+		current_size = os.path.getsize(current_path)
+		# 原实现需要整页文本，流式解析按块读取，峰值都不计入页面本身
+		legacy_peak = peak_memory(lambda: legacy_save_js_data(page, legacy_path))
+		current_peak = peak_memory(lambda: save_teacher_list(chunked(page), current_path))
+	return {
+		'compatible': compatible,
+		'streaming_correct_with_special_chars': streaming_correct,
+		'legacy_correct_with_special_chars': legacy_correct,
+		'teachers': args.teachers,
+		'page_megabytes': round(len(page.encode('utf-8')) / 1e6, 2),
+		'legacy_seconds': round(legacy, 4),
+		'streaming_seconds': round(current, 4),
+		'speedup': round(legacy / current, 2) if current else None,
+		'legacy_peak_kb': legacy_peak // 1024,
+		'streaming_peak_kb': current_peak // 1024,
+		'legacy_output_kb': legacy_size // 1024,
+		'streaming_output_kb': current_size // 1024,
+	}
+
+
+# 流水线规模预设（教师数）
+SCALES = {'tiny': 10, 'small': 1000, 'medium': 10000, 'large': 100000}
+MIN_REGRESSION_SECONDS = 0.001  # 小于该差值的变慢视为计时噪声
+
+
+@contextlib.contextmanager
+def working_directory(path: str):
+	"""course_finder 的各阶段读写 data/ 下的固定路径，在临时目录中运行"""
+	previous = os.getcwd()
+	os.chdir(path)
+	try:
+		yield
+	finally:
+		os.chdir(previous)
+
+
+def measure_stage(function: Callable[[], object], items: int, repeat: int, setup: Optional[Callable[[], None]] = None) -> dict:
+	"""
+	重复 repeat 轮（每轮前调用 setup，不计时），取最快一轮计算吞吐量，另跑一轮统计内存峰值。
+	course_finder 的输出写到 os.devnull，不计入内存
+	"""
+	best = float('inf')
+	with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+		for _ in range(repeat):
+			if setup:
+				setup()
+			start = time.perf_counter()
+			function()
+			best = min(best, time.perf_counter() - start)
+		if setup:
+			setup()
+		peak = peak_memory(function)
+	return {
+		'seconds': round(best, 6),
+		'items': items,
+		'items_per_second': round(items / best, 1) if best else None,
+		'peak_kb': peak // 1024,
+	}
+
+
+def build_queries(teachers: List[dict]) -> List[dict]:
+	"""与 course_finder.TEACHERS 相同格式的查询：依次为只有 ID、只有姓名、两者都有"""
+	queries = []
+	for index, teacher in enumerate(teachers):
+		if index % 3 == 0:
+			queries.append({'id': teacher['jg0101id']})
+		elif index % 3 == 1:
+			queries.append({'name': teacher['xm']})
+		else:
+			queries.append({'id': teacher['jg0101id'], 'name': teacher['xm']})
+	return queries
+
+
+def run_pipeline(list_page: str, queries: List[dict], pages: List[str]) -> List[dict]:
+	"""
+	不经过网络的 course_finder 流程：解析教师列表 -> 补全教师信息 -> 逐位教师解析课表 -> 生成配置。
+	第 i 位教师使用 pages[i % len(pages)]
+	"""
+	course_finder.parse_js_data(list_page)
+	teachers = course_finder.complete_teacher_info(queries)
+	all_courses = []
+	for index, teacher in enumerate(teachers):
+		courses = course_finder.parse_course_data(pages[index % len(pages)], teacher['name'])
+		for course in courses:
+			course['教师姓名'] = teacher['name']
+			course['教师ID'] = teacher['id']
+		all_courses.extend(courses)
+	course_finder.generate_config_format(all_courses)
+	return all_courses
+
+
+def pipeline_params(args: argparse.Namespace) -> dict:
+	"""决定结果能否与基线比较的参数"""
+	return {
+		'teachers': args.scale,
+		'fill': args.fill,
+		'per_cell': args.per_cell,
+		'online_ratio': args.online_ratio,
+		'page_pool': args.page_pool,
+		'seed': args.seed,
+	}
+
+
+def bench_stages(args: argparse.Namespace) -> dict:
+	"""按规模分别计时流水线的各阶段与端到端流程"""
+	records = generate_teachers(args.scale, seed=args.seed)
+	list_page = generate_teacher_list_page(records)
+	queries = build_queries(records)
+	# 不同的课表页面数量有限（page_pool），教师轮流使用，避免 10 万个页面占满内存
+	pages = [
+		generate_weekly_timetable(args.fill, args.per_cell, args.online_ratio, seed=args.seed + index)
+		for index in range(min(args.page_pool, args.scale))
+	]
+	stages = {}
+	with tempfile.TemporaryDirectory() as directory, working_directory(directory):
+		os.makedirs('data')
+
+		def remove_index():
+			if os.path.exists(INDEX_PATH):
+				os.remove(INDEX_PATH)
+
+		stages['parse_js_data'] = measure_stage(lambda: course_finder.parse_js_data(list_page), len(records), args.repeat)
+		# 冷启动包括从 parsed_data.json 建立并保存教师索引，之后的运行直接读取索引
+		stages['complete_teacher_info_cold'] = measure_stage(
+			lambda: course_finder.complete_teacher_info(queries), len(queries), args.repeat, setup=remove_index
+		)
+		stages['complete_teacher_info'] = measure_stage(lambda: course_finder.complete_teacher_info(queries), len(queries), args.repeat)
+		with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+			teachers = course_finder.complete_teacher_info(queries)
+		timetables = [pages[index % len(pages)] for index in range(len(teachers))]
+		stages['parse_course_data'] = measure_stage(
+			lambda: [course_finder.parse_course_data(page, '') for page in timetables], len(timetables), args.repeat
+		)
+		with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+			all_courses = run_pipeline(list_page, queries, pages)
+		stages['generate_config_format'] = measure_stage(lambda: course_finder.generate_config_format(all_courses), len(all_courses), args.repeat)
+		stages['end_to_end'] = measure_stage(lambda: run_pipeline(list_page, queries, pages), len(records), args.repeat, setup=remove_index)
+	return {
+		'params': pipeline_params(args),
+		'python': platform.python_version(),
+		'list_page_megabytes': round(len(list_page.encode('utf-8')) / 1e6, 2),
+		'timetable_page_kb': round(sum(len(page.encode('utf-8')) for page in pages) / len(pages) / 1024, 1),
+		'timetables': len(timetables),
+		'distinct_pages': len(pages),
+		'courses': len(all_courses),
+		'stages': stages,
+	}
+
+
+def compare_baseline(result: dict, baseline: dict, threshold: float) -> List[str]:
+	"""与基线逐阶段比较耗时和内存峰值，返回超出 threshold 比例的说明；参数不同的结果不能比较，抛出 ValueError"""
+	if baseline.get('params') != result['params']:
+		raise ValueError(f"基线参数 {baseline.get('params')} 与本次 {result['params']} 不同，无法比较")
+	regressions = []
+	for name, base in baseline['stages'].items():
+		current = result['stages'].get(name)
+		if current is None:
+			regressions.append(f'{name}: 本次没有该阶段')
+			continue
+		limit = base['seconds'] * (1 + threshold)
+		if current['seconds'] > limit and current['seconds'] - base['seconds'] > MIN_REGRESSION_SECONDS:
+			regressions.append(f"{name}: 耗时 {current['seconds']:.4f} 秒，基线 {base['seconds']:.4f} 秒（+{(current['seconds'] / base['seconds'] - 1) * 100:.0f}%）")
+		if base['peak_kb'] and current['peak_kb'] > base['peak_kb'] * (1 + threshold):
+			regressions.append(f"{name}: 内存峰值 {current['peak_kb']} KB，基线 {base['peak_kb']} KB（+{(current['peak_kb'] / base['peak_kb'] - 1) * 100:.0f}%）")
+	return regressions
+
+
+def print_stages(result: dict, baseline: Optional[dict] = None):
+	print('=' * 50)
+	print('流水线各阶段')
+	print('=' * 50)
+	params = result['params']
+	print(f"教师: {params['teachers']} 位，列表页面 {result['list_page_megabytes']} MB")
+	print(f"课表: {result['timetables']} 个页面（{result['distinct_pages']} 个不同页面轮流使用，平均 {result['timetable_page_kb']} KB），共 {result['courses']} 门网上慕课课程")
+	comparable = baseline is not None and baseline.get('params') == params
+	for name, stage in result['stages'].items():
+		line = f"{name:<28} {stage['seconds']:>9.4f} 秒  {stage['items_per_second'] or 0:>12.1f} 项/秒  内存峰值 {stage['peak_kb']:>8} KB"
+		base = baseline['stages'].get(name) if comparable else None
+		if base and base['seconds']:
+			line += f"  基线 {base['seconds']:.4f} 秒（{(stage['seconds'] / base['seconds'] - 1) * 100:+.0f}%）"
+		print(line)
+
+
+def parse_scale(value: str) -> int:
+	if value in SCALES:
+		return SCALES[value]
+	try:
+		teachers = int(value)
+	except ValueError:
+		raise argparse.ArgumentTypeError(f"规模应为 {'/'.join(SCALES)} 或教师数")
+	if teachers < 1:
+		raise argparse.ArgumentTypeError('教师数至少为 1')
+	return teachers
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+	parser = argparse.ArgumentParser(description='课表解析兼容性检查与基准测试')
+	parser.add_argument('--pages', type=int, default=20, help='基准测试页面数')
+	parser.add_argument('--blocks', type=int, default=2000, help='每个页面的课程块数')
+	parser.add_argument('--online-ratio', type=float, default=0.5, help='网上慕课课程块比例')
+	parser.add_argument('--teachers', type=int, default=50000, help='教师列表页面中的教师数')
+	parser.add_argument('--repeat', type=int, default=3, help='重复轮数（取最快一轮）')
+	parser.add_argument('--seed', type=int, default=0, help='随机种子')
+	parser.add_argument('--json', action='store_true', help='以 JSON 格式输出结果')
+	parser.add_argument('--suite', choices=('parsers', 'pipeline', 'all'), default='parsers',
+		help='parsers: 新旧解析器对比；pipeline: course_finder 各阶段与端到端计时')
+	parser.add_argument('--scale', type=parse_scale, default=SCALES['small'],
+		help=f"流水线规模：{'/'.join(f'{name}={count}' for name, count in SCALES.items())} 或教师数")
+	parser.add_argument('--fill', type=float, default=0.6, help='课表中排课单元格的比例')
+	parser.add_argument('--per-cell', type=int, default=1, help='每个排课单元格最多的课程数（大于 1 为密集课表）')
+	parser.add_argument('--page-pool', type=int, default=100, help='生成的不同课表页面数，教师轮流使用')
+	parser.add_argument('--save-baseline', metavar='PATH', help='把流水线结果保存为基线')
+	parser.add_argument('--baseline', metavar='PATH', help='与该基线比较，超出 threshold 时返回失败')
+	parser.add_argument('--threshold', type=float, default=0.2, help='允许的耗时与内存峰值增长比例')
+	return parser.parse_args(argv)
+
+
+def run_pipeline_suite(args: argparse.Namespace) -> int:
+	baseline = None
+	if args.baseline:
+		with open(args.baseline, 'r', encoding='utf-8') as f:
+			baseline = json.load(f)
+	result = bench_stages(args)
+	try:
+		regressions = compare_baseline(result, baseline, args.threshold) if baseline is not None else []
+	except ValueError as e:
+		print(f"✗ {e}")
+		return 1
+	if args.save_baseline:
+		directory = os.path.dirname(args.save_baseline)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		with open(args.save_baseline, 'w', encoding='utf-8') as f:
+			json.dump(result, f, ensure_ascii=False, indent=2)
+
+	if args.json:
+		print(json.dumps({'pipeline': result, 'regressions': regressions}, ensure_ascii=False, indent=2))
+		return 1 if regressions else 0
+	print_stages(result, baseline)
+	if args.save_baseline:
+		print(f"✓ 基线已保存到: {args.save_baseline}")
+	if baseline is not None:
+		if regressions:
+			print(f"✗ 与基线 {args.baseline} 相比超出 {args.threshold * 100:.0f}%:")
+			for line in regressions:
+				print(f"  {line}")
+		else:
+			print(f"✓ 与基线 {args.baseline} 相比均未超出 {args.threshold * 100:.0f}%")
+	return 1 if regressions else 0
+
+
+def run_parsers_suite(args: argparse.Namespace) -> int:
+	timetable = bench_timetable(args)
+	teacher_list = bench_teacher_list(args)
+	failed = bool(timetable['mismatched']) or not teacher_list['compatible'] or not teacher_list['streaming_correct_with_special_chars']
+
+	if args.json:
+		print(json.dumps({'timetable': timetable, 'teacher_list': teacher_list}, ensure_ascii=False, indent=2))
+		return 1 if failed else 0
+
+	print('=' * 50)
+	print('课表解析')
+	print('=' * 50)
+	mismatched = timetable['mismatched']
+	if mismatched:
+		print(f"✗ 兼容性检查：{len(mismatched)}/{timetable['compat_pages']} 个页面输出不一致：{', '.join(mismatched)}")
+	else:
+		print(f"✓ 兼容性检查：{timetable['compat_pages']} 个页面输出一致")
+	print(f"页面: {args.pages} 个 × {args.blocks} 个课程块，共 {timetable['megabytes']} MB")
+	print(f"原正则实现: {timetable['legacy_seconds']:.3f} 秒")
+	print(f"单遍提取器: {timetable['extractor_seconds']:.3f} 秒（{timetable['speedup']} 倍）")
+
+	print('=' * 50)
+	print('教师列表解析')
+	print('=' * 50)
+	print(f"{'✓' if teacher_list['compatible'] else '✗'} 兼容性检查：普通姓名输出{'一致' if teacher_list['compatible'] else '不一致'}")
+	print(f"{'✓' if teacher_list['streaming_correct_with_special_chars'] else '✗'} 流式解析：含冒号/引号/逗号的姓名{'解析正确' if teacher_list['streaming_correct_with_special_chars'] else '解析错误'}")
+	print(f"  原实现：含冒号/引号/逗号的姓名{'解析正确' if teacher_list['legacy_correct_with_special_chars'] else '解析错误'}")
+	print(f"页面: {teacher_list['teachers']} 位教师，共 {teacher_list['page_megabytes']} MB")
+	print(f"原实现: {teacher_list['legacy_seconds']:.3f} 秒，内存峰值 {teacher_list['legacy_peak_kb']} KB，输出 {teacher_list['legacy_output_kb']} KB")
+	print(f"流式解析: {teacher_list['streaming_seconds']:.3f} 秒（{teacher_list['speedup']} 倍），内存峰值 {teacher_list['streaming_peak_kb']} KB，输出 {teacher_list['streaming_output_kb']} KB")
+	return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+	args = parse_args(argv)
+	status = 0
+	if args.suite in ('parsers', 'all'):
+		status = run_parsers_suite(args)
+	if args.suite in ('pipeline', 'all'):
+		status = run_pipeline_suite(args) or status
+	return status
+
+
+if __name__ == '__main__':
+	sys.exit(main())
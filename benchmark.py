@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+选课器端到端基准测试
+在本地模拟教务服务器上运行 CourseSelector，统计吞吐量、选课延迟与首次成功耗时
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from autoselect import ConfigManager, CourseSelector, CSUURLs, run_accounts
+from clock_sync import BurstConfig, min_sync_before
+from hedge import percentile
+from select_result import SelectOutcome
+from mock_server import LISTING_PATH, MockJwcServer, MockServerConfig
+from metrics import measure_overhead
+
+
+def write_benchmark_config(directory: str, base_url: str, semester: str, accounts: List[List[str]], extra: str = '', group_quota: int = 0) -> str:
+	"""生成基准测试使用的 config.ini（每个账号一组课程ID，group_quota 大于0时全部课程组成一个课程组），返回文件路径"""
+	lines = ['[session]', 'enabled = false', '[config]', f'time = {semester}', f'base_url = {base_url}']
+	for index, course_ids in enumerate(accounts):
+		if len(accounts) > 1:
+			lines.append(f'[account:bench{index}]')
+		lines.extend([f'username = {index:010d}', 'password = benchmark', f'num1 = {len(course_ids)}'])
+		lines.extend(f'id{i} = {course_id}' for i, course_id in enumerate(course_ids, 1))
+		if group_quota > 0:
+			lines.append(f'group1 = {group_quota} of id1..id{len(course_ids)}')
+	path = os.path.join(directory, 'config.ini')
+	with open(path, 'w', encoding='utf-8') as f:
+		f.write('\n'.join(lines) + '\n' + extra)
+	return path
+
+
+class BenchmarkSelector(CourseSelector):
+	"""自动填写验证码并记录每次选课尝试耗时的选课器"""
+
+	def __init__(self, config_manager: ConfigManager, *args, verify_code: str = '', **kwargs):
+		super().__init__(config_manager, *args, **kwargs)
+		self.verify_code = verify_code
+		self.select_latencies: List[float] = []
+		self.select_started_at: Optional[float] = None
+		self.select_outcomes: Counter = Counter()
+		self.first_success: Dict[str, float] = {}
+
+	async def get_verify_code(self) -> str:
+		"""获取验证码图片但不等待人工输入"""
+		await self.client.get(CSUURLs.VERIFY_CODE_URL)
+		await self.client.get(CSUURLs.LOGIN_URL)
+		return self.verify_code
+
+	async def select_course(self, course_config) -> SelectOutcome:
+		"""记录每次选课尝试的端到端耗时（含对冲）"""
+		started_at = time.perf_counter()
+		if self.select_started_at is None:
+			self.select_started_at = started_at
+		try:
+			outcome = await super().select_course(course_config)
+			self.select_outcomes[outcome.value] += 1
+			if outcome is SelectOutcome.SUCCESS:
+				self.first_success.setdefault(course_config.course_id, time.perf_counter())
+			return outcome
+		finally:
+			self.select_latencies.append(time.perf_counter() - started_at)
+
+
+async def run_benchmark(server_config: MockServerConfig, num_courses: int, duration: float, extra_config: str = '', num_accounts: int = 1,
+		group_quota: int = 0) -> Dict:
+	"""运行一次基准测试并返回统计结果，多账号时每个账号各有 num_courses 门课程"""
+	accounts = [
+		[f'{100000 + index * num_courses + i:06d}' for i in range(1, num_courses + 1)]
+		for index in range(num_accounts)
+	]
+	if not server_config.listing_ids:
+		server_config.listing_ids = [course_id for course_ids in accounts for course_id in course_ids]
+	selectors: List[BenchmarkSelector] = []
+
+	def selector_factory(*args, **kwargs) -> BenchmarkSelector:
+		selector = BenchmarkSelector(*args, verify_code=server_config.verify_code, **kwargs)
+		selectors.append(selector)
+		return selector
+
+	async with MockJwcServer(server_config) as server:
+		with tempfile.TemporaryDirectory() as directory:
+			config_path = write_benchmark_config(directory, server.base_url, server_config.semester, accounts, extra_config, group_quota)
+			config_manager = ConfigManager(config_path)
+			replay = config_manager.get_traffic_config().mode == 'replay'
+			if num_accounts > 1:
+				run = run_accounts(config_manager, selector_factory)
+			else:
+				run = selector_factory(config_manager).run()
+
+		started_at = time.perf_counter()
+		completed = True
+		try:
+			await asyncio.wait_for(run, timeout=duration)
+		except asyncio.TimeoutError:
+			completed = False
+		elapsed = time.perf_counter() - started_at
+
+	stats = server.stats
+	num_courses *= num_accounts
+	if replay:
+		# 回放时请求不经过模拟服务器，结果以选课器看到的为准
+		outcomes = sum((s.select_outcomes for s in selectors), Counter())
+		stats.select_requests = sum(outcomes.values())
+		stats.outcomes = dict(outcomes)
+		stats.first_success = {course_id: at for s in selectors for course_id, at in s.first_success.items()}
+	first_select = min((s.select_started_at for s in selectors if s.select_started_at), default=started_at)
+	select_window = elapsed - (first_select - started_at)
+	entered_at = stats.entered_at or started_at
+	ttfs = {course_id: at - entered_at for course_id, at in stats.first_success.items()}
+	latencies = [latency for s in selectors for latency in s.select_latencies]
+	hedgers = [s.hedger for s in selectors if s.hedger]
+	return {
+		'accounts': num_accounts,
+		'courses': num_courses,
+		'group_quota': group_quota,
+		'completed': completed,
+		'elapsed_s': round(elapsed, 4),
+		'total_requests': sum(stats.requests.values()),
+		'select_requests': stats.select_requests,
+		'listing_requests': stats.requests.get(LISTING_PATH, 0),
+		'connections': stats.connections,
+		'select_rps': round(len(latencies) / select_window, 2) if select_window > 0 else None,
+		'select_latency_p50_ms': round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+		'select_latency_p99_ms': round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+		'first_select_after_entry_ms': round((stats.first_select_at - entered_at) * 1000, 3) if stats.first_select_at and stats.entered_at else None,
+		'prepared_sent': sum(s.prepared_sent for s in selectors),
+		'time_to_first_success_ms': round(min(ttfs.values()) * 1000, 3) if ttfs else None,
+		'time_to_all_success_ms': round(max(ttfs.values()) * 1000, 3) if len(ttfs) == num_courses else None,
+		'succeeded_courses': len(ttfs),
+		'server_errors': stats.server_errors,
+		'expired_hits': stats.expired_hits,
+		'recoveries': sum(len(s.recovery_times) for s in selectors),
+		'recovery_max_ms': round(max((t for s in selectors for t in s.recovery_times), default=0) * 1000, 3),
+		'hedges': sum(h.hedges for h in hedgers),
+		'hedge_wins': sum(h.hedge_wins for h in hedgers),
+		'outcomes': stats.outcomes,
+	}
+
+
+def print_report(result: Dict):
+	"""打印基准测试结果"""
+	print('=' * 50)
+	print('选课器基准测试结果')
+	print('=' * 50)
+	group = f"  课程组: {result['group_quota']} of {result['courses'] // result['accounts']}" if result['group_quota'] else ''
+	print(f"账号数: {result['accounts']}  课程数: {result['courses']}{group}  {'全部完成' if result['completed'] else '达到时长上限'}  耗时: {result['elapsed_s']}s")
+	print(f"请求总数: {result['total_requests']}  选课请求: {result['select_requests']}  列表请求: {result['listing_requests']}  选课吞吐: {result['select_rps']} req/s")
+	print(f"选课延迟 p50: {result['select_latency_p50_ms']} ms  p99: {result['select_latency_p99_ms']} ms")
+	print(f"进入选课到首个选课请求: {result['first_select_after_entry_ms']} ms  预构造请求: {result['prepared_sent']}  连接数: {result['connections']}")
+	print(f"首次成功耗时: {result['time_to_first_success_ms']} ms  全部成功耗时: {result['time_to_all_success_ms']} ms")
+	print(f"成功课程: {result['succeeded_courses']}/{result['courses']}  5xx: {result['server_errors']}  过期会话请求: {result['expired_hits']}")
+	print(f"会话恢复: {result['recoveries']} 次  最长恢复耗时: {result['recovery_max_ms']} ms")
+	print(f"对冲请求: {result['hedges']}  对冲胜出: {result['hedge_wins']}")
+	print(f"结果分布: {result['outcomes']}")
+	if 'metrics_overhead_us' in result:
+		ratio = result['metrics_overhead_ratio']
+		share = f"（占选课延迟 p50 的 {ratio:.4%}）" if ratio is not None else ''
+		print(f"指标埋点开销: {result['metrics_overhead_us']} µs/次{share}")
+	print('=' * 50)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+	"""解析命令行参数"""
+	parser = argparse.ArgumentParser(description='CourseSelector 离线基准测试')
+	parser.add_argument('--courses', type=int, default=10, help='每个账号的课程数量')
+	parser.add_argument('--accounts', type=int, default=1, help='账号数量，大于1时所有账号在同一事件循环中运行')
+	parser.add_argument('--duration', type=float, default=10.0, help='最长运行时间（秒）')
+	parser.add_argument('--latency', type=float, default=0.02, help='服务器基础延迟（秒）')
+	parser.add_argument('--jitter', type=float, default=0.01, help='服务器延迟抖动（秒）')
+	parser.add_argument('--seats', type=int, default=0, help='每门课程初始名额')
+	parser.add_argument('--release-after', type=float, default=1.0, help='进入选课后多少秒释放名额')
+	parser.add_argument('--open-delay', type=float, default=0.0, help='启动后多少秒出现进入选课链接')
+	parser.add_argument('--burst-in', type=float, default=None, help='启用定时突发模式，选课在多少秒后（服务器时钟）开放')
+	parser.add_argument('--sync-samples', type=int, default=BurstConfig.sync_samples, help='定时突发模式的对时采样次数')
+	parser.add_argument('--clock-offset', type=float, default=0.0, help='模拟服务器时钟相对本机的偏差（秒）')
+	parser.add_argument('--tail-rate', type=float, default=0.0, help='请求落入长尾延迟的概率')
+	parser.add_argument('--tail-latency', type=float, default=0.0, help='长尾请求额外延迟（秒）')
+	parser.add_argument('--hedge', action='store_true', help='启用对冲请求')
+	parser.add_argument('--prewarm', type=int, default=None, metavar='CONNECTIONS', help='启用连接预热，预先建立该数量的长连接')
+	parser.add_argument('--connect-latency', type=float, default=0.0, help='新连接上第一个请求的额外延迟（秒），模拟握手开销')
+	parser.add_argument('--record', metavar='PATH', help='把本次运行的请求与响应录制到该文件')
+	parser.add_argument('--replay', metavar='PATH', help='回放录制的请求日志代替模拟服务器（课程数、账号数需与录制时一致）')
+	parser.add_argument('--watch', type=float, default=None, metavar='INTERVAL', help='启用余量监视，按该间隔（秒）查询公选课列表')
+	parser.add_argument('--listing-padding', type=int, default=0, help='公选课列表中额外的无关课程数（模拟分页）')
+	parser.add_argument('--metrics', action='store_true', help='启用运行指标，并报告每次选课请求的埋点开销')
+	parser.add_argument('--group-quota', type=int, default=0, help='每个账号的全部课程组成一个课程组，选上该门数后取消其余课程')
+	parser.add_argument('--error-rate', type=float, default=0.0, help='触发5xx突发的概率')
+	parser.add_argument('--error-burst', type=int, default=5, help='每次5xx突发的请求数')
+	parser.add_argument('--session-ttl', type=float, default=None, help='会话有效期（秒）')
+	parser.add_argument('--seed', type=int, default=1, help='随机种子')
+	parser.add_argument('--json', dest='json_path', help='将结果写入JSON文件')
+	return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+	"""主函数"""
+	args = parse_args(argv)
+	server_config = MockServerConfig(
+		latency=args.latency,
+		latency_jitter=args.jitter,
+		tail_rate=args.tail_rate,
+		tail_latency=args.tail_latency,
+		connect_latency=args.connect_latency,
+		default_seats=args.seats,
+		release_after=args.release_after,
+		open_delay=args.open_delay,
+		error_rate=args.error_rate,
+		error_burst=args.error_burst,
+		session_ttl=args.session_ttl,
+		clock_offset=args.clock_offset,
+		seed=args.seed,
+		listing_padding=args.listing_padding,
+	)
+	extra_config = ''
+	duration = args.duration
+	if args.burst_in is not None:
+		# 对时需要的时间由采样次数决定，本机时钟落后服务器时对时开始得更晚
+		sync_before = min_sync_before(args.sync_samples) + abs(args.clock_offset)
+		burst_in = max(args.burst_in, sync_before)
+		if burst_in > args.burst_in:
+			print(f"对时 {args.sync_samples} 次需要至少 {sync_before:g} 秒，选课改为 {burst_in:g} 秒后开放")
+			duration += burst_in - args.burst_in
+		server_config.open_at = time.time() + args.clock_offset + burst_in
+		open_time = datetime.fromtimestamp(server_config.open_at).isoformat(sep=' ')
+		extra_config += f'[burst]\nopen_time = {open_time}\nsync_before = {sync_before:g}\nsync_samples = {args.sync_samples}\n'
+	if args.prewarm is not None:
+		extra_config += f'[prewarm]\nenabled = true\nconnections = {args.prewarm}\n'
+	if args.hedge:
+		extra_config += '[hedge]\nenabled = true\n'
+	if args.record or args.replay:
+		extra_config += f"[traffic]\nmode = {'replay' if args.replay else 'record'}\npath = {args.replay or args.record}\n"
+	if args.watch is not None:
+		extra_config += f'[watch]\nenabled = true\ninterval = {args.watch}\n'
+	if args.metrics:
+		extra_config += '[metrics]\nenabled = true\nport = 0\nsummary_interval = 1\n'
+	result = asyncio.run(run_benchmark(server_config, args.courses, duration, extra_config, args.accounts, args.group_quota))
+	if args.metrics:
+		overhead = measure_overhead()
+		result['metrics_overhead_us'] = round(overhead * 1e6, 3)
+		p50 = result['select_latency_p50_ms']
+		result['metrics_overhead_ratio'] = overhead * 1000 / p50 if p50 else None
+	print_report(result)
+	if args.json_path:
+		with open(args.json_path, 'w', encoding='utf-8') as f:
+			json.dump(result, f, ensure_ascii=False, indent=2)
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+验证码识别
+CaptchaProvider.solve() 接收验证码图片并返回验证码文本，不阻塞事件循环：
+- TerminalProvider: 保存图片后在线程池中等待终端输入
+- FileWatchProvider: 保存图片后等待答案文件（code.txt 或 code_<账号>.txt）出现
+- SolverProvider: 本地模板匹配识别（需要 numpy 和 Pillow），置信度不足时交给后备的提供者
+
+离线识别使用的模板由已知答案的验证码生成：
+
+    python captcha.py learn code.jpg 3f7k
+    python captcha.py solve code.jpg
+"""
+
+import io
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+try:
+	import numpy as np
+	from PIL import Image
+except ImportError:  # 离线识别为可选功能
+	np = None
+	Image = None
+
+
+TEMPLATES_PATH = 'data/captcha_templates.npz'
+GLYPH_SIZE = (12, 16)  # 单个字符缩放后的 (宽, 高)
+MIN_GLYPH_WIDTH = 2  # 窄于该宽度（像素）的列段视为噪点
+
+
+@dataclass
+class CaptchaConfig:
+	"""验证码配置"""
+	provider: str = 'input'  # input 终端输入；file 等待答案文件；solver 本地识别
+	attempts: int = 1  # 登录失败时最多尝试的验证码数
+	templates: str = TEMPLATES_PATH
+	glyphs: int = 4  # 验证码字符数
+	min_confidence: float = 0.85  # 识别置信度低于该值时交给 fallback
+	fallback: str = 'input'  # 识别失败时的后备方式：input 或 file
+	timeout: float = 300.0  # 等待答案文件的超时（秒）
+
+
+class CaptchaProvider(ABC):
+	"""验证码提供者接口，子类必须实现 solve()，否则创建时即报错"""
+
+	@abstractmethod
+	async def solve(self, image: bytes, code_path: str) -> str:
+		"""识别验证码图片，code_path 为需要人工查看时保存图片的路径"""
+
+
+def save_image(image: bytes, code_path: str):
+	with open(code_path, 'wb') as f:
+		f.write(image)
+
+
+# 多个账号同时等待终端输入时依次提示
+_INPUT_LOCK = threading.Lock()
+
+
+def _prompt(message: str) -> str:
+	with _INPUT_LOCK:
+		return input(message)
+
+
+class TerminalProvider(CaptchaProvider):
+	"""在线程池中等待终端输入，其他协程（如其他账号）继续运行"""
+
+	def __init__(self, name: str = ''):
+		self.name = name
+
+	async def solve(self, image: bytes, code_path: str) -> str:
+		save_image(image, code_path)
+		prompt = f"输入验证码（{self.name}，见 {code_path}）：" if self.name else "输入验证码："
+		answer = await asyncio.get_running_loop().run_in_executor(None, _prompt, prompt)
+		return answer.strip()
+
+
+class FileWatchProvider(CaptchaProvider):
+	"""保存图片后轮询答案文件（与图片同名、扩展名为 .txt），读到后删除该文件"""
+
+	def __init__(self, timeout: float = 300.0, interval: float = 0.1, log=print):
+		self.timeout = timeout
+		self.interval = interval
+		self.log = log
+
+	async def solve(self, image: bytes, code_path: str) -> str:
+		answer_path = os.path.splitext(code_path)[0] + '.txt'
+		started_at = time.time()
+		save_image(image, code_path)
+		self.log(f'验证码已保存到 {code_path}，请把答案写入 {answer_path}')
+		deadline = time.monotonic() + self.timeout
+		while time.monotonic() < deadline:
+			try:
+				# 只接受图片保存之后写入的答案，忽略上一次残留的文件
+				if os.path.getmtime(answer_path) >= started_at - 1:
+					with open(answer_path, 'r', encoding='utf-8') as f:
+						answer = f.read().strip()
+					if answer:
+						os.remove(answer_path)
+						return answer
+			except OSError:
+				pass
+			await asyncio.sleep(self.interval)
+		raise TimeoutError(f'等待验证码答案超时: {answer_path}')
+
+
+class TemplateSolver:
+	"""
+	模板匹配识别器：二值化、去噪后按列投影切分字符，每个字符缩放为固定大小的向量，
+	与模板做余弦相似度匹配；置信度为各字符最佳相似度中的最小值
+	"""
+
+	def __init__(self, path: str = TEMPLATES_PATH, glyphs: int = 4):
+		if np is None:
+			raise RuntimeError('本地验证码识别需要安装 numpy 和 Pillow')
+		self.path = path
+		self.glyphs = glyphs
+		self.labels = np.empty(0, dtype='U1')
+		self.vectors = np.empty((0, GLYPH_SIZE[0] * GLYPH_SIZE[1]), dtype=np.float32)
+		if os.path.exists(path):
+			with np.load(path) as data:
+				self.labels = data['labels']
+				self.vectors = data['vectors']
+
+	@staticmethod
+	def binarize(image: bytes) -> 'np.ndarray':
+		"""灰度化后按 Otsu 阈值二值化（字符为 True），并去掉孤立的噪点"""
+		gray = np.asarray(Image.open(io.BytesIO(image)).convert('L'), dtype=np.uint8)
+		histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+		weights = np.cumsum(histogram)
+		means = np.cumsum(histogram * np.arange(256))
+		total = weights[-1]
+		with np.errstate(divide='ignore', invalid='ignore'):
+			between = (means[-1] * weights / total - means) ** 2 / (weights * (total - weights))
+		threshold = int(np.nanargmax(between))
+		ink = gray <= threshold
+		padded = np.pad(ink, 1)
+		neighbours = sum(
+			padded[1 + dy:padded.shape[0] - 1 + dy, 1 + dx:padded.shape[1] - 1 + dx].astype(np.uint8)
+			for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx
+		)
+		return ink & (neighbours >= 2)
+
+	def segment(self, ink: 'np.ndarray') -> List['np.ndarray']:
+		"""按列投影切分字符；粘连时平分最宽的段，段数过多时保留最宽的几段"""
+		columns = np.flatnonzero(ink.any(axis=0))
+		spans: List[Tuple[int, int]] = []
+		for column in columns:
+			if spans and column == spans[-1][1]:
+				spans[-1] = (spans[-1][0], column + 1)
+			else:
+				spans.append((column, column + 1))
+		spans = [span for span in spans if span[1] - span[0] >= MIN_GLYPH_WIDTH]
+		while spans and len(spans) < self.glyphs:
+			widest = max(range(len(spans)), key=lambda i: spans[i][1] - spans[i][0])
+			start, end = spans[widest]
+			if end - start < 2 * MIN_GLYPH_WIDTH:
+				break
+			middle = (start + end) // 2
+			spans[widest:widest + 1] = [(start, middle), (middle, end)]
+		if len(spans) > self.glyphs:
+			spans = sorted(sorted(spans, key=lambda span: span[0] - span[1])[:self.glyphs])
+		glyphs = []
+		for start, end in spans:
+			glyph = ink[:, start:end]
+			rows = np.flatnonzero(glyph.any(axis=1))
+			glyphs.append(glyph[rows[0]:rows[-1] + 1])
+		return glyphs
+
+	@staticmethod
+	def vectorize(glyph: 'np.ndarray') -> 'np.ndarray':
+		"""缩放为 GLYPH_SIZE 并归一化（零均值、单位长度）"""
+		resized = Image.fromarray(glyph.astype(np.uint8) * 255).resize(GLYPH_SIZE, Image.BILINEAR)
+		vector = np.asarray(resized, dtype=np.float32).ravel()
+		vector -= vector.mean()
+		norm = np.linalg.norm(vector)
+		return vector / norm if norm else vector
+
+	def glyph_vectors(self, image: bytes) -> Optional['np.ndarray']:
+		glyphs = self.segment(self.binarize(image))
+		if len(glyphs) != self.glyphs:
+			return None
+		return np.stack([self.vectorize(glyph) for glyph in glyphs])
+
+	def recognize(self, image: bytes) -> Tuple[str, float]:
+		"""返回 (识别结果, 置信度)，无法切分或没有模板时置信度为 0"""
+		vectors = self.glyph_vectors(image)
+		if vectors is None or not len(self.labels):
+			return '', 0.0
+		scores = vectors @ self.vectors.T
+		best = scores.argmax(axis=1)
+		confidence = float(scores[np.arange(len(best)), best].min())
+		return ''.join(self.labels[best]), confidence
+
+	def learn(self, image: bytes, answer: str) -> bool:
+		"""把已知答案的验证码切分后加入模板，切分的字符数与答案长度不一致时返回 False"""
+		vectors = self.glyph_vectors(image)
+		if vectors is None or len(answer) != len(vectors):
+			return False
+		self.labels = np.concatenate([self.labels, np.array(list(answer), dtype='U1')])
+		self.vectors = np.concatenate([self.vectors, vectors])
+		return True
+
+	def save(self):
+		directory = os.path.dirname(self.path)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		np.savez_compressed(self.path, labels=self.labels, vectors=self.vectors)
+
+
+class SolverProvider(CaptchaProvider):
+	"""本地识别，置信度不足时交给 fallback"""
+
+	def __init__(self, solver: TemplateSolver, min_confidence: float, fallback: CaptchaProvider, log=print):
+		self.solver = solver
+		self.min_confidence = min_confidence
+		self.fallback = fallback
+		self.log = log
+
+	async def solve(self, image: bytes, code_path: str) -> str:
+		answer, confidence = self.solver.recognize(image)
+		if confidence >= self.min_confidence:
+			self.log(f'验证码自动识别为 {answer}（置信度 {confidence:.2f}）')
+			return answer
+		self.log(f'验证码自动识别置信度不足（{confidence:.2f}），改为人工输入')
+		return await self.fallback.solve(image, code_path)
+
+
+def create_provider(config: CaptchaConfig, name: str = '', log=print) -> CaptchaProvider:
+	"""按配置创建验证码提供者"""
+	human = FileWatchProvider(config.timeout, log=log) if config.fallback == 'file' else TerminalProvider(name)
+	if config.provider == 'solver':
+		return SolverProvider(TemplateSolver(config.templates, config.glyphs), config.min_confidence, human, log)
+	if config.provider == 'file':
+		return FileWatchProvider(config.timeout, log=log)
+	return TerminalProvider(name)
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description='验证码本地识别')
+	parser.add_argument('--templates', default=TEMPLATES_PATH, help='模板文件路径')
+	parser.add_argument('--glyphs', type=int, default=4, help='验证码字符数')
+	subparsers = parser.add_subparsers(dest='command', required=True)
+	learn = subparsers.add_parser('learn', help='用已知答案的验证码生成模板')
+	learn.add_argument('image', help='验证码图片')
+	learn.add_argument('answer', help='验证码答案')
+	solve = subparsers.add_parser('solve', help='识别验证码')
+	solve.add_argument('image', help='验证码图片')
+	args = parser.parse_args(argv)
+
+	try:
+		solver = TemplateSolver(args.templates, args.glyphs)
+	except RuntimeError as e:
+		print(f"✗ {e}")
+		return 1
+	with open(args.image, 'rb') as f:
+		image = f.read()
+	if args.command == 'learn':
+		if not solver.learn(image, args.answer):
+			print(f"✗ 切分出的字符数与答案 {args.answer} 不一致")
+			return 1
+		solver.save()
+		print(f"✓ 模板已更新: {len(solver.labels)} 个字符样本")
+		return 0
+	answer, confidence = solver.recognize(image)
+	print(f"{answer or '?'}  置信度 {confidence:.2f}")
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
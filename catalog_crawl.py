@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全目录课表抓取
+对教师目录中的每一位教师查询课表：异步并发获取页面，按批交给进程池解析，
+每完成一批就把结果追加到检查点日志（每行一位教师），中断后重新运行时跳过日志中已完成的教师。
+最终结果按教师目录顺序合并，与页面返回和解析完成的顺序无关
+"""
+
+import os
+import json
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from timetable_parser import extract_online_courses
+
+
+JOURNAL_PATH = 'data/crawl_journal_{semester}.jsonl'
+PARSE_BATCH = 16  # 每个解析任务包含的页面数，减少进程间传输次数
+PROGRESS_INTERVAL = 2.0  # 进度输出间隔（秒）
+
+
+class CrawlJournal:
+	"""
+	检查点日志。首行为 {"semester": 学期}，之后每完成一位教师追加一行 {"id": 教师ID, "courses": [...]}；
+	学期不同的旧日志不会被沿用，被中断时写了一半的最后一行会被忽略
+	"""
+
+	def __init__(self, semester: str, path: Optional[str] = None):
+		self.semester = semester
+		self.path = path or JOURNAL_PATH.format(semester=semester)
+		self._file = None
+
+	def load(self) -> Dict[str, list]:
+		"""读取已完成的教师，返回 教师ID -> 课程列表"""
+		completed: Dict[str, list] = {}
+		if not os.path.exists(self.path):
+			return completed
+		with open(self.path, 'r', encoding='utf-8') as f:
+			for number, line in enumerate(f):
+				try:
+					entry = json.loads(line)
+				except ValueError:
+					continue
+				if number == 0:
+					if entry.get('semester') != self.semester:
+						return {}
+					continue
+				completed[entry['id']] = entry['courses']
+		return completed
+
+	def open(self, resume: bool):
+		"""打开日志准备追加，resume 为假时清空旧日志"""
+		directory = os.path.dirname(self.path)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		fresh = not resume or not os.path.exists(self.path)
+		torn = False
+		if not fresh:
+			# 上次被中断时写了一半的行单独成行，避免与新追加的记录连在一起
+			with open(self.path, 'rb') as f:
+				f.seek(0, os.SEEK_END)
+				if f.tell():
+					f.seek(-1, os.SEEK_END)
+					torn = f.read(1) != b'\n'
+		self._file = open(self.path, 'w' if fresh else 'a', encoding='utf-8')
+		if fresh:
+			self._write({'semester': self.semester})
+		elif torn:
+			self._file.write('\n')
+
+	def append(self, results: List[Tuple[str, list]]):
+		for teacher_id, courses in results:
+			self._write({'id': teacher_id, 'courses': courses})
+		self._file.flush()
+
+	def _write(self, entry: dict):
+		self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+	def close(self):
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+
+	def remove(self):
+		"""抓取全部完成后删除日志，下次运行重新抓取"""
+		self.close()
+		try:
+			os.remove(self.path)
+		except OSError:
+			pass
+
+
+def parse_pages(pages: List[str]) -> List[list]:
+	"""在子进程中解析一批课表页面"""
+	return [extract_online_courses(page) for page in pages]
+
+
+def format_duration(seconds: float) -> str:
+	seconds = int(seconds)
+	if seconds >= 3600:
+		return f'{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'
+	return f'{seconds // 60}:{seconds % 60:02d}'
+
+
+class Progress:
+	"""按间隔输出进度、速率与预计剩余时间"""
+
+	def __init__(self, total: int, done: int = 0, interval: float = PROGRESS_INTERVAL, log: Callable[[str], None] = print):
+		self.total = total
+		self.done = done
+		self.failed = 0
+		self.interval = interval
+		self.log = log
+		self.started_at = time.monotonic()
+		self.initial = done
+		self._reported_at = self.started_at
+
+	def advance(self, done: int = 0, failed: int = 0):
+		self.done += done
+		self.failed += failed
+		now = time.monotonic()
+		if now - self._reported_at >= self.interval:
+			self._reported_at = now
+			self.log(self.line(now))
+
+	def line(self, now: Optional[float] = None) -> str:
+		elapsed = (now or time.monotonic()) - self.started_at
+		finished = self.done - self.initial + self.failed
+		rate = finished / elapsed if elapsed > 0 else 0.0
+		remaining = self.total - self.done - self.failed
+		eta = format_duration(remaining / rate) if rate > 0 else '--:--'
+		percent = self.done / self.total * 100 if self.total else 100.0
+		failed = f'，失败 {self.failed}' if self.failed else ''
+		return f'进度: {self.done}/{self.total}（{percent:.1f}%）{failed}，{rate:.1f} 位/秒，已用 {format_duration(elapsed)}，预计剩余 {eta}'
+
+
+async def crawl_catalog(
+	teachers: List[dict],
+	fetch_page: Callable[[dict], Awaitable[Tuple[int, str]]],
+	journal: CrawlJournal,
+	workers: Optional[int] = None,
+	batch: int = PARSE_BATCH,
+	log: Callable[[str], None] = print,
+) -> Tuple[Dict[str, list], List[str]]:
+	"""
+	抓取并解析所有教师（含 id 与 name）的课表，跳过日志中已完成的教师。
+	fetch_page(教师) 返回 (状态码, 页面内容)；workers 为解析进程数（默认 CPU 核数，1 表示在当前进程解析）。
+	返回 (教师ID -> 课程列表, 失败的教师ID列表)
+	"""
+	results = journal.load()
+	pending = [teacher for teacher in teachers if teacher['id'] not in results]
+	if results:
+		log(f'从检查点继续: 已完成 {len(teachers) - len(pending)} 位，剩余 {len(pending)} 位')
+	journal.open(resume=bool(results))
+	progress = Progress(len(teachers), len(teachers) - len(pending), log=log)
+	failed: List[str] = []
+	loop = asyncio.get_running_loop()
+	workers = workers or os.cpu_count() or 1
+	pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+	parsing = set()
+	buffer: List[Tuple[str, str]] = []
+
+	async def parse(shard: List[Tuple[str, str]]):
+		pages = [page for _, page in shard]
+		if pool is None:
+			parsed = parse_pages(pages)
+		else:
+			parsed = await loop.run_in_executor(pool, parse_pages, pages)
+		done = list(zip((teacher_id for teacher_id, _ in shard), parsed))
+		results.update(done)
+		journal.append(done)
+		progress.advance(done=len(done))
+
+	def submit():
+		task = asyncio.ensure_future(parse(list(buffer)))
+		parsing.add(task)
+		task.add_done_callback(parsing.discard)
+		buffer.clear()
+
+	async def fetch(teacher: dict):
+		try:
+			return teacher, await fetch_page(teacher), None
+		except Exception as e:
+			return teacher, None, e
+
+	try:
+		for future in asyncio.as_completed([fetch(teacher) for teacher in pending]):
+			teacher, page, error = await future
+			if error is not None or page[0] != 200:
+				failed.append(teacher['id'])
+				progress.advance(failed=1)
+				continue
+			buffer.append((teacher['id'], page[1]))
+			if len(buffer) >= batch:
+				submit()
+		if buffer:
+			submit()
+		if parsing:
+			await asyncio.gather(*parsing)
+	finally:
+		for task in parsing:
+			task.cancel()
+		if pool is not None:
+			pool.shutdown(wait=False, cancel_futures=True)
+		journal.close()
+	log(progress.line())
+	return results, failed
+
+
+def merge_courses(teachers: List[dict], results: Dict[str, list]) -> List[dict]:
+	"""按教师目录顺序合并课程，并为每门课程加上教师信息"""
+	courses = []
+	for teacher in teachers:
+		for course in results.get(teacher['id']) or ():
+			courses.append({**course, '教师姓名': teacher['name'], '教师ID': teacher['id']})
+	return courses
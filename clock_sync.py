@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+与教务服务器的时钟同步
+根据响应头 Date 与往返时间估计本机时钟与服务器时钟的偏差，并提供精确的定时等待
+"""
+
+import time
+import asyncio
+import statistics
+from typing import List, Optional
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+
+# 对时时首个采样之后的每个采样都要等到下一个服务器整秒边界，约需 sync_samples 秒；
+# 另留出余量覆盖边界过近时顺延一秒以及本机时钟落后服务器的偏差
+SYNC_MARGIN = 3.0
+
+
+def min_sync_before(samples: int) -> float:
+	"""对时 samples 次需要在开放前预留的最少秒数"""
+	return samples + SYNC_MARGIN
+
+
+@dataclass
+class BurstConfig:
+	"""选课开放时刻的定时突发配置"""
+	open_time: float  # 选课开放时刻（服务器时钟，epoch秒）
+	sync_before: float = 30.0  # 在开放前多少秒进行对时
+	sync_samples: int = 6  # 对时采样次数
+	probes: int = 5  # 开放时刻前后发出的选课轮次查询次数
+	probe_interval: float = 0.05  # 相邻两次查询的间隔（秒）
+
+
+@dataclass
+class ClockSample:
+	"""一次对时采样，时间均为本机 time.time() 读数"""
+	sent_at: float
+	received_at: float
+	server_second: int  # Date 头给出的服务器时间（整秒）
+
+	@property
+	def rtt(self) -> float:
+		return self.received_at - self.sent_at
+
+
+@dataclass
+class ClockEstimate:
+	"""时钟偏差估计结果，offset = 服务器时间 - 本机时间"""
+	offset: float
+	uncertainty: float  # 偏差估计的半宽（秒）
+	rtt: float  # 往返时间中位数（秒）
+	jitter: float  # 往返时间标准差（秒）
+	samples: int
+
+	def to_local(self, server_timestamp: float) -> float:
+		"""把服务器时间戳换算为本机时间戳"""
+		return server_timestamp - self.offset
+
+
+async def take_clock_sample(client: httpx.AsyncClient, url: str) -> Optional[ClockSample]:
+	"""发送一次轻量请求并读取 Date 头"""
+	sent_at = time.time()
+	response = await client.head(url)
+	received_at = time.time()
+	date = response.headers.get('date')
+	if not date:
+		return None
+	return ClockSample(sent_at, received_at, int(parsedate_to_datetime(date).timestamp()))
+
+
+def combine_samples(samples: List[ClockSample]) -> ClockEstimate:
+	"""
+	合并采样得到偏差区间
+
+	Date 头只有整秒精度：请求在 [sent_at, received_at] 内某一时刻被服务器处理，
+	此时服务器时间落在 [server_second, server_second + 1) 内，
+	因此 offset ∈ [server_second - received_at, server_second + 1 - sent_at]。
+	多个采样的区间取交集，跨越整秒边界的采样能把区间收窄到接近 RTT 的量级。
+	"""
+	low = max(s.server_second - s.received_at for s in samples)
+	high = min(s.server_second + 1 - s.sent_at for s in samples)
+	if low > high:
+		# 采样互相矛盾（服务器时钟跳变或 Date 取整方式不同），退化为区间中点的中位数
+		midpoint = statistics.median((s.server_second + 0.5) - (s.sent_at + s.received_at) / 2 for s in samples)
+		low = high = midpoint
+	rtts = [s.rtt for s in samples]
+	return ClockEstimate(
+		offset=(low + high) / 2,
+		uncertainty=(high - low) / 2,
+		rtt=statistics.median(rtts),
+		jitter=statistics.pstdev(rtts) if len(rtts) > 1 else 0.0,
+		samples=len(samples),
+	)
+
+
+async def estimate_clock_offset(client: httpx.AsyncClient, url: str, samples: int = 6) -> ClockEstimate:
+	"""
+	估计本机与服务器的时钟偏差
+
+	首个采样给出粗略区间，之后每次都把请求安排在预测的服务器整秒边界附近发出，
+	使每个采样尽可能把区间对半收窄。
+	"""
+	collected: List[ClockSample] = []
+	while len(collected) < samples:
+		if collected:
+			estimate = combine_samples(collected)
+			# 下一个服务器整秒边界对应的本机时间，提前半个 RTT 发出
+			boundary = int(time.time() + estimate.offset) + 1
+			if estimate.to_local(boundary) - estimate.rtt / 2 < time.time() + 0.05:
+				boundary += 1
+			await sleep_until(estimate.to_local(boundary) - estimate.rtt / 2)
+		sample = await take_clock_sample(client, url)
+		if sample is None:
+			raise RuntimeError('服务器响应中没有 Date 头，无法对时')
+		collected.append(sample)
+	return combine_samples(collected)
+
+
+async def sleep_until(target: float, spin: float = 0.002):
+	"""等待到本机时间 target，最后 spin 秒改为让出式忙等以获得毫秒级精度"""
+	remaining = target - time.time()
+	if remaining > spin:
+		await asyncio.sleep(remaining - spin)
+	while time.time() < target:
+		await asyncio.sleep(0)
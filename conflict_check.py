@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地课表冲突预检
+把课程每次上课的星期、周次、节次转换为 星期×节次×周 的位掩码（Python 整数），两门课的掩码按位与不为零即冲突；
+不知道星期的课程无法判断，不参与检查。
+选课开始前据此剔除与已选课程冲突的课程，并在候选课程的冲突图上找出权重最高的极大无冲突子集，
+不在该子集中的课程降低优先级（或剔除）
+"""
+
+import re
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+WEEKS = 25  # 第 1-25 周
+PERIODS = 14  # 每天第 1-14 节
+DAYS = 7
+_SLOT_BITS = WEEKS
+MAX_REPORTED_CONFLICTS = 20  # 预检结果中逐条列出的冲突数
+
+_WEEK_PART_PATTERN = re.compile(r'(\d+)(?:\s*-\s*(\d+))?\s*(?:周)?\s*(?:[(（]?\s*([单双])\s*[)）]?)?')
+_DAY_PATTERN = re.compile(r'(?:星期|周)([一二三四五六日天1-7])')
+_DAY_INDEX = {'一': 0, '二': 1, '三': 2, '四': 3, '五': 4, '六': 5, '日': 6, '天': 6}
+
+
+@dataclass
+class ConflictConfig:
+	"""冲突预检配置"""
+	enabled: bool = False
+	catalog: str = 'data/course_catalog.db'  # 周次、节次从本地课程目录读取
+	enrolled: List[str] = field(default_factory=list)  # 已选上的课程ID
+	action: str = 'deprioritize'  # 对不可能选上的课程：deprioritize 降低优先级，drop 直接剔除
+	penalty: int = 100  # 降低的优先级
+	max_sets: int = 10000  # 每个冲突连通分量最多枚举的极大无冲突子集数
+
+
+def parse_weeks(text: str) -> int:
+	"""周次转为周掩码（第 n 周为第 n-1 位），如 "1-16"、"2-16双"、"1-8,10-12"；无法解析时返回 0"""
+	mask = 0
+	for part in re.split(r'[,，、]', text or ''):
+		match = _WEEK_PART_PATTERN.search(part)
+		if not match:
+			continue
+		start = int(match.group(1))
+		end = int(match.group(2) or start)
+		parity = match.group(3)
+		for week in range(max(start, 1), min(end, WEEKS) + 1):
+			if parity == '单' and week % 2 == 0 or parity == '双' and week % 2 == 1:
+				continue
+			mask |= 1 << (week - 1)
+	return mask
+
+
+def parse_periods(text: str) -> Tuple[int, int]:
+	"""
+	节次转为 (星期掩码, 节次掩码)，如 "星期三 03-04节"；
+	没有星期信息时（如课程目录中的 "09-10节"）星期掩码为 0，无法判断是否冲突
+	"""
+	text = text or ''
+	days = 0
+	for match in _DAY_PATTERN.finditer(text):
+		day = match.group(1)
+		days |= 1 << (int(day) - 1 if day.isdigit() else _DAY_INDEX[day])
+	text = _DAY_PATTERN.sub('', text)
+	numbers = [int(number) for number in re.findall(r'\d+', text)]
+	numbers = [number for number in numbers if 1 <= number <= PERIODS]
+	periods = 0
+	if len(numbers) == 2 and '-' in text:
+		for period in range(min(numbers), max(numbers) + 1):
+			periods |= 1 << (period - 1)
+	else:
+		for period in numbers:
+			periods |= 1 << (period - 1)
+	return days, periods
+
+
+def slot_mask(weeks: str, periods: str) -> int:
+	"""
+	一次上课占用的 星期×节次×周 掩码：每个 (星期, 节次) 格子占 WEEKS 位，格子内的位与周掩码相同。
+	periods 需要带星期（如 "星期三 03-04节"），星期、周次或节次未知时返回 0
+	"""
+	week_mask = parse_weeks(weeks)
+	days, period_mask = parse_periods(periods)
+	mask = 0
+	for day in range(DAYS):
+		if not days >> day & 1:
+			continue
+		for period in range(PERIODS):
+			if period_mask >> period & 1:
+				mask |= week_mask << ((day * PERIODS + period) * _SLOT_BITS)
+	return mask
+
+
+def course_mask(meetings: Iterable[Tuple[str, str]]) -> int:
+	"""一门课程所有上课时间 [(周次, 带星期的节次)] 的掩码之和，任一次无法解析时整门课程返回 0（无法判断）"""
+	mask = 0
+	for weeks, periods in meetings:
+		meeting = slot_mask(weeks, periods)
+		if not meeting:
+			return 0
+		mask |= meeting
+	return mask
+
+
+def _bits(mask: int) -> Iterable[int]:
+	while mask:
+		low = mask & -mask
+		yield low.bit_length() - 1
+		mask ^= low
+
+
+def conflict_graph(masks: Sequence[int]) -> List[int]:
+	"""
+	课程两两冲突关系，第 i 项为与课程 i 冲突的课程集合（第 j 位表示课程 j）。
+	先按位把课程归入占用的时间格，再对每门课合并其时间格中的课程，避免两两比较
+	"""
+	occupants: Dict[int, int] = {}
+	for index, mask in enumerate(masks):
+		for bit in _bits(mask):
+			occupants[bit] = occupants.get(bit, 0) | 1 << index
+	graph = []
+	for index, mask in enumerate(masks):
+		neighbours = 0
+		for bit in _bits(mask):
+			neighbours |= occupants[bit]
+		graph.append(neighbours & ~(1 << index))
+	return graph
+
+
+def _components(graph: Sequence[int]) -> List[int]:
+	"""冲突图的连通分量（每个分量为课程集合）"""
+	remaining = (1 << len(graph)) - 1
+	components = []
+	while remaining:
+		frontier = component = remaining & -remaining
+		while frontier:
+			reached = 0
+			for index in _bits(frontier):
+				reached |= graph[index]
+			frontier = reached & ~component
+			component |= frontier
+		components.append(component)
+		remaining &= ~component
+	return components
+
+
+def maximal_conflict_free_sets(graph: Sequence[int], candidates: int, limit: int) -> List[int]:
+	"""
+	枚举 candidates 中的极大无冲突子集（冲突图补图上的极大团，带枢轴的 Bron–Kerbosch），
+	最多返回 limit 个
+	"""
+	found: List[int] = []
+
+	def expand(chosen: int, allowed: int, excluded: int):
+		if len(found) >= limit:
+			return
+		if not allowed and not excluded:
+			found.append(chosen)
+			return
+		# 选冲突最少的课程做枢轴：只需展开与枢轴冲突的课程（以及枢轴本身）
+		pivot = min(_bits(allowed | excluded), key=lambda index: bin(graph[index] & allowed).count('1'))
+		for index in _bits(allowed & (graph[pivot] | 1 << pivot)):
+			bit = 1 << index
+			expand(chosen | bit, allowed & ~graph[index] & ~bit, excluded & ~graph[index] & ~bit)
+			allowed &= ~bit
+			excluded |= bit
+
+	expand(0, candidates, 0)
+	return found
+
+
+@dataclass
+class ConflictPlan:
+	"""预检结果"""
+	courses: list  # 调整后的课程配置
+	blocked: List[str] = field(default_factory=list)  # 与已选课程冲突
+	outside: List[str] = field(default_factory=list)  # 不在最优无冲突子集中
+	unknown: List[str] = field(default_factory=list)  # 目录中没有星期/周次/节次信息，无法判断
+	conflicts: List[Tuple[str, str]] = field(default_factory=list)  # 候选课程之间的冲突
+
+	def describe(self, action: str) -> List[str]:
+		"""预检结果说明"""
+		verb = '剔除' if action == 'drop' else '降低优先级'
+		lines = []
+		if self.unknown:
+			lines.append(f"冲突预检: {len(self.unknown)} 门课程缺少星期/周次/节次信息，无法判断，不参与检查: {', '.join(self.unknown)}")
+		for first, second in self.conflicts[:MAX_REPORTED_CONFLICTS]:
+			lines.append(f"冲突预检: 课程 {first} 与 {second} 时间冲突")
+		if len(self.conflicts) > MAX_REPORTED_CONFLICTS:
+			lines.append(f"冲突预检: 另有 {len(self.conflicts) - MAX_REPORTED_CONFLICTS} 对课程时间冲突")
+		if self.blocked:
+			lines.append(f"冲突预检: {', '.join(self.blocked)} 与已选课程冲突，已{verb}")
+		if self.outside:
+			lines.append(f"冲突预检: {', '.join(self.outside)} 与优先级更高的课程冲突，已{verb}")
+		if not lines:
+			lines.append('冲突预检: 未发现冲突')
+		return lines
+
+
+def plan_courses(courses: list, slots: Dict[str, List[Tuple[str, str]]], enrolled: Iterable[Tuple[str, str]], config: ConflictConfig,
+		alternatives: Iterable[Iterable[str]] = ()) -> ConflictPlan:
+	"""
+	根据课程每次上课的 (周次, 带星期的节次) 调整课程配置（CourseConfig 列表），enrolled 为已选课程的全部上课时间：
+	与已选课程冲突的课程，以及不在最优极大无冲突子集中的课程，按 config.action 降低优先级或剔除。
+	最优子集先比较课程数，再比较优先级之和，相同时保留配置中靠前的课程。
+	alternatives 中的每组课程最多只会选上一门（quota 为 1 的课程组），组内课程之间的冲突不计
+	"""
+	plan = ConflictPlan(courses=[])
+	enrolled_mask = 0
+	for weeks, periods in enrolled:
+		enrolled_mask |= slot_mask(weeks, periods)
+
+	masks = []
+	for course in courses:
+		slot = slots.get(course.course_id)
+		mask = course_mask(slot) if slot else 0
+		if not mask:
+			plan.unknown.append(course.course_id)
+		masks.append(mask)
+
+	blocked = 0
+	for index, mask in enumerate(masks):
+		if mask & enrolled_mask:
+			blocked |= 1 << index
+			plan.blocked.append(courses[index].course_id)
+
+	graph = conflict_graph(masks)
+	positions = {course.course_id: index for index, course in enumerate(courses)}
+	for course_ids in alternatives:
+		members = 0
+		for course_id in course_ids:
+			if course_id in positions:
+				members |= 1 << positions[course_id]
+		for index in _bits(members):
+			graph[index] &= ~members
+	for index in range(len(courses)):
+		for other in _bits(graph[index] >> (index + 1)):
+			plan.conflicts.append((courses[index].course_id, courses[index + 1 + other].course_id))
+
+	# 各连通分量互不影响，分别取最优子集后合并
+	available = ((1 << len(courses)) - 1) & ~blocked
+	best = 0
+	for component in _components(graph):
+		candidates = component & available
+		if not candidates:
+			continue
+		# 至少枚举一个子集，max_sets 配置为 0 或负数时也有结果
+		sets = maximal_conflict_free_sets(graph, candidates, max(1, config.max_sets))
+		best |= max(sets, key=lambda chosen: (
+			bin(chosen).count('1'),
+			sum(courses[index].priority for index in _bits(chosen)),
+			sum(1 << (len(courses) - index) for index in _bits(chosen)),
+		))
+
+	for index, course in enumerate(courses):
+		if best >> index & 1:
+			plan.courses.append(course)
+			continue
+		if not blocked >> index & 1:
+			plan.outside.append(course.course_id)
+		if config.action != 'drop':
+			plan.courses.append(replace(course, priority=course.priority - config.penalty))
+	return plan
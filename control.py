@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻模式的控制接口
+选课器保持登录状态和连接常驻运行，通过本机 HTTP（JSON）或 Unix 套接字随时加入、移除、暂停课程和调整优先级，
+修改 config.ini 后自动（或通过 /reload）按 ConfigManager 重新读取课程配置，无需重新登录：
+
+    GET    /status                    每个账号及每门课程的状态
+    POST   /courses                   加入课程 {"id": "...", "type": "public", "priority": 0, "interval": 0.5}
+    DELETE /courses/<id>              移除课程
+    POST   /courses/<id>/pause        暂停课程
+    POST   /courses/<id>/resume       恢复课程
+    POST   /courses/<id>/priority     调整优先级 {"priority": 5, "interval": 0.5}
+    POST   /reload                    重新读取 config.ini
+    POST   /stop                      结束选课并退出
+
+多账号时用 ?account=<账号名> 或请求体中的 "account" 指定账号。命令行客户端：
+
+    python control.py status
+    python control.py add 123456 --priority 5
+    python control.py --socket data/control.sock pause 123456
+"""
+
+import os
+import sys
+import json
+import socket
+import asyncio
+import argparse
+import http.client
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+@dataclass
+class ControlConfig:
+	"""常驻模式与控制接口配置"""
+	enabled: bool = False
+	host: str = '127.0.0.1'
+	port: int = 9110  # 0 表示不监听 TCP 端口
+	socket: str = ''  # Unix 套接字路径（仅限所有者访问），为空时不监听
+	reload_interval: float = 2.0  # 检查 config.ini 是否修改的间隔（秒），<=0 表示只在 /reload 时重新读取
+	keepalive_interval: float = 60.0  # 没有课程在请求时访问主页面保持会话的间隔（秒），应小于服务器的会话超时，<=0 表示不保活
+
+
+class ControlError(Exception):
+	"""控制请求无效，status 为返回的 HTTP 状态码"""
+
+	def __init__(self, message: str, status: int = 400):
+		super().__init__(message)
+		self.status = status
+
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict', 500: 'Internal Server Error'}
+
+
+class ControlServer:
+	"""
+	控制接口服务端，作为异步上下文管理器使用。
+	selectors 为 账号名 -> CourseSelector（单账号时账号名为空），reload 为重新读取配置文件的函数（返回 ConfigManager）
+	"""
+
+	def __init__(self, selectors: Dict[str, object], config: ControlConfig, config_file: str, reload: Callable[[], object],
+			log: Callable[[str], None] = print):
+		self.selectors = selectors
+		self.config = config
+		self.config_file = config_file
+		self.reload = reload
+		self.log = log
+		self.servers: List[asyncio.AbstractServer] = []
+		self._watch_task: Optional[asyncio.Task] = None
+		self._mtime = self._config_mtime()
+
+	async def start(self):
+		if self.config.port:
+			server = await asyncio.start_server(self._handle_connection, self.config.host, self.config.port)
+			self.servers.append(server)
+			port = server.sockets[0].getsockname()[1]
+			self.log(f'控制接口: http://{self.config.host}:{port}/status')
+		if self.config.socket:
+			if not hasattr(asyncio, 'start_unix_server'):
+				self.log('控制接口: 当前系统不支持 Unix 套接字，忽略 socket 配置')
+			else:
+				directory = os.path.dirname(self.config.socket)
+				if directory:
+					os.makedirs(directory, exist_ok=True)
+				if os.path.exists(self.config.socket):
+					os.remove(self.config.socket)
+				server = await asyncio.start_unix_server(self._handle_connection, self.config.socket)
+				os.chmod(self.config.socket, 0o600)
+				self.servers.append(server)
+				self.log(f'控制接口: Unix 套接字 {self.config.socket}')
+		if self.config.reload_interval > 0:
+			self._watch_task = asyncio.ensure_future(self._watch_config())
+
+	async def stop(self):
+		if self._watch_task is not None:
+			self._watch_task.cancel()
+			try:
+				await self._watch_task
+			except asyncio.CancelledError:
+				pass
+		for server in self.servers:
+			server.close()
+			await server.wait_closed()
+		if self.config.socket and os.path.exists(self.config.socket):
+			os.remove(self.config.socket)
+
+	async def __aenter__(self) -> 'ControlServer':
+		await self.start()
+		return self
+
+	async def __aexit__(self, *exc_info):
+		await self.stop()
+
+	def _config_mtime(self) -> Optional[int]:
+		try:
+			return os.stat(self.config_file).st_mtime_ns
+		except OSError:
+			return None
+
+	async def _watch_config(self):
+		"""config.ini 修改后自动重新读取课程配置"""
+		while True:
+			await asyncio.sleep(self.config.reload_interval)
+			mtime = self._config_mtime()
+			if mtime is not None and mtime != self._mtime:
+				try:
+					self.reload_config()
+				except Exception as e:
+					self.log(f'重新读取 {self.config_file} 失败: {e}')
+
+	def reload_config(self) -> Dict[str, List[str]]:
+		"""按 ConfigManager 重新读取各账号的课程配置并应用变化，返回 账号名 -> 变化说明"""
+		self._mtime = self._config_mtime()
+		config_manager = self.reload()
+		changes = {name: selector.reload_courses(config_manager) for name, selector in self.selectors.items()}
+		self.log(f"已重新读取 {self.config_file}: {'；'.join(line for lines in changes.values() for line in lines) or '课程配置未变化'}")
+		return changes
+
+	def _selector(self, account: Optional[str]):
+		if account is None:
+			if len(self.selectors) == 1:
+				return next(iter(self.selectors.values()))
+			raise ControlError(f"有多个账号，需要指定 account: {', '.join(self.selectors)}")
+		selector = self.selectors.get(account)
+		if selector is None:
+			raise ControlError(f'没有账号 {account}', 404)
+		return selector
+
+	def dispatch(self, method: str, path: str, query: Dict[str, str], body: dict) -> dict:
+		"""处理一个控制请求，返回 JSON 响应体；请求无效时抛出 ControlError"""
+		parts = [unquote(part) for part in path.strip('/').split('/') if part]
+		account = query.get('account', body.get('account'))
+		if parts == ['status'] and method == 'GET':
+			selectors = [self._selector(account)] if account is not None else self.selectors.values()
+			return {'accounts': [selector.status() for selector in selectors]}
+		if parts == ['reload'] and method == 'POST':
+			try:
+				return {'changes': self.reload_config()}
+			except Exception as e:
+				raise ControlError(f'重新读取 {self.config_file} 失败: {e}', 500)
+		if parts == ['stop'] and method == 'POST':
+			for selector in self.selectors.values():
+				selector.stop()
+			return {'stopping': True}
+		if parts[:1] != ['courses']:
+			raise ControlError(f'未知的接口 {path}', 404)
+
+		selector = self._selector(account)
+		if len(parts) == 1 and method == 'POST':
+			if not body.get('id'):
+				raise ControlError('缺少课程 id')
+			course_type = body.get('type', 'public')
+			if course_type not in ('public', 'required'):
+				raise ControlError('type 只能是 public 或 required')
+			return selector.add_course(str(body['id']), course_type, int(body.get('priority', 0)), _optional_float(body.get('interval')))
+		if len(parts) == 2 and method == 'DELETE':
+			return selector.remove_course(parts[1])
+		if len(parts) == 3 and method == 'POST':
+			course_id, action = parts[1], parts[2]
+			if action == 'pause':
+				return selector.pause_course(course_id)
+			if action == 'resume':
+				return selector.resume_course(course_id)
+			if action == 'priority':
+				if 'priority' not in body:
+					raise ControlError('缺少 priority')
+				return selector.reprioritize_course(course_id, int(body['priority']), _optional_float(body.get('interval')))
+		raise ControlError(f'不支持 {method} {path}', 405)
+
+	async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+		try:
+			request_line = await reader.readline()
+			headers = {}
+			while True:
+				line = await reader.readline()
+				if line in (b'\r\n', b'\n', b''):
+					break
+				name, _, value = line.decode('latin-1').partition(':')
+				headers[name.strip().lower()] = value.strip()
+			length = int(headers.get('content-length', 0) or 0)
+			raw_body = await reader.readexactly(length) if length else b''
+
+			status, payload = 200, {}
+			try:
+				method, target = request_line.decode('latin-1').split()[:2]
+				url = urlsplit(target)
+				query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+				body = json.loads(raw_body.decode('utf-8')) if raw_body.strip() else {}
+				if not isinstance(body, dict):
+					raise ControlError('请求体应为 JSON 对象')
+				payload = self.dispatch(method.upper(), url.path, query, body)
+			except ControlError as e:
+				status, payload = e.status, {'error': str(e)}
+			except ValueError as e:
+				status, payload = 400, {'error': f'请求无效: {e}'}
+
+			data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+			writer.write(
+				f'HTTP/1.1 {status} {REASONS.get(status, "Error")}\r\nContent-Type: application/json; charset=utf-8\r\n'
+				f'Content-Length: {len(data)}\r\nConnection: close\r\n\r\n'.encode('latin-1')
+				+ data
+			)
+			await writer.drain()
+		except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+			pass
+		finally:
+			writer.close()
+
+
+def _optional_float(value) -> Optional[float]:
+	return None if value is None else float(value)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+	"""通过 Unix 套接字发送 HTTP 请求"""
+
+	def __init__(self, path: str, timeout: float = 10.0):
+		super().__init__('localhost', timeout=timeout)
+		self.path = path
+
+	def connect(self):
+		self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.sock.settimeout(self.timeout)
+		self.sock.connect(self.path)
+
+
+def request(method: str, path: str, body: Optional[dict] = None, url: str = 'http://127.0.0.1:9110',
+		socket_path: str = '') -> Tuple[int, dict]:
+	"""向控制接口发送一个请求，返回 (状态码, 响应 JSON)"""
+	if socket_path:
+		connection = UnixHTTPConnection(socket_path)
+	else:
+		parts = urlsplit(url)
+		connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=10)
+	try:
+		data = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else None
+		headers = {'Content-Type': 'application/json'} if data is not None else {}
+		connection.request(method, path, body=data, headers=headers)
+		response = connection.getresponse()
+		return response.status, json.loads(response.read().decode('utf-8') or '{}')
+	finally:
+		connection.close()
+
+
+def format_status(payload: dict) -> List[str]:
+	"""把 /status 的响应整理成表格"""
+	lines = []
+	for account in payload.get('accounts', []):
+		title = account['account'] or '默认账号'
+		recovering = '，会话恢复中' if account.get('recovering') else ''
+		lines.append(f"{title}: {account['phase']}{recovering}")
+		for course in account['courses']:
+			seats = course.get('seats')
+			lines.append(
+				f"  {course['id']:<12} {course['type']:<8} 优先级 {course['priority']:<3} {course['state']:<9} "
+				f"尝试 {course['attempts']:<5} 结果 {course.get('outcome') or '-'}" + (f"  余量 {seats}" if seats is not None else '')
+			)
+	return lines
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description='选课器控制接口客户端')
+	parser.add_argument('--url', default='http://127.0.0.1:9110', help='控制接口地址')
+	parser.add_argument('--socket', default='', help='Unix 套接字路径（优先于 --url）')
+	parser.add_argument('--account', help='账号名（多账号时必填）')
+	subparsers = parser.add_subparsers(dest='command', required=True)
+	subparsers.add_parser('status', help='查看每门课程的状态')
+	add = subparsers.add_parser('add', help='加入课程')
+	add.add_argument('course_id')
+	add.add_argument('--type', default='public', choices=('public', 'required'))
+	add.add_argument('--priority', type=int, default=0)
+	add.add_argument('--interval', type=float)
+	for command, help_text in (('remove', '移除课程'), ('pause', '暂停课程'), ('resume', '恢复课程')):
+		subparsers.add_parser(command, help=help_text).add_argument('course_id')
+	priority = subparsers.add_parser('priority', help='调整优先级')
+	priority.add_argument('course_id')
+	priority.add_argument('priority', type=int)
+	priority.add_argument('--interval', type=float)
+	subparsers.add_parser('reload', help='重新读取 config.ini')
+	subparsers.add_parser('stop', help='结束选课')
+	args = parser.parse_args(argv)
+
+	body = {'account': args.account} if args.account is not None else {}
+	if args.command == 'status':
+		method, path = 'GET', '/status'
+	elif args.command == 'add':
+		method, path = 'POST', '/courses'
+		body.update({'id': args.course_id, 'type': args.type, 'priority': args.priority, 'interval': args.interval})
+	elif args.command == 'remove':
+		method, path = 'DELETE', f'/courses/{args.course_id}'
+	elif args.command in ('pause', 'resume'):
+		method, path = 'POST', f'/courses/{args.course_id}/{args.command}'
+	elif args.command == 'priority':
+		method, path = 'POST', f'/courses/{args.course_id}/priority'
+		body.update({'priority': args.priority, 'interval': args.interval})
+	else:
+		method, path = 'POST', f'/{args.command}'
+	if method == 'GET' and args.account is not None:
+		path += f'?account={args.account}'
+
+	try:
+		status, payload = request(method, path, body if method != 'GET' else None, args.url, args.socket)
+	except (OSError, http.client.HTTPException) as e:
+		print(f"✗ 无法连接控制接口: {e}")
+		return 1
+	if status != 200:
+		print(f"✗ {payload.get('error', status)}")
+		return 1
+	if args.command == 'status':
+		print('\n'.join(format_status(payload)))
+	else:
+		print(json.dumps(payload, ensure_ascii=False, indent=2))
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地课程目录
+把 course_finder 查到的课程按 (学期, 课程ID) 写入 SQLite，按课程性质、节次、周次、教师、选课人数建索引，
+可以直接查询并输出 config.ini 使用的 num1/idN 配置块：
+
+    python course_catalog.py query --nature 文化素质类 --periods 09-10节 --max-enrolled 150 --format config
+"""
+
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+CATALOG_PATH = 'data/course_catalog.db'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS courses (
+	semester TEXT NOT NULL,
+	course_id TEXT NOT NULL,
+	name TEXT,
+	enrolled INTEGER,
+	weeks TEXT,
+	periods TEXT,
+	location TEXT,
+	hours INTEGER,
+	nature TEXT,
+	admin_class TEXT,
+	class_name TEXT,
+	updated_at REAL NOT NULL,
+	PRIMARY KEY (semester, course_id)
+);
+CREATE TABLE IF NOT EXISTS course_meetings (
+	semester TEXT NOT NULL,
+	course_id TEXT NOT NULL,
+	weekday TEXT NOT NULL,
+	weeks TEXT NOT NULL,
+	periods TEXT NOT NULL,
+	PRIMARY KEY (semester, course_id, weekday, weeks, periods)
+);
+CREATE TABLE IF NOT EXISTS course_teachers (
+	semester TEXT NOT NULL,
+	course_id TEXT NOT NULL,
+	teacher_id TEXT NOT NULL,
+	teacher_name TEXT,
+	PRIMARY KEY (semester, course_id, teacher_id)
+);
+CREATE INDEX IF NOT EXISTS idx_courses_nature ON courses (semester, nature);
+CREATE INDEX IF NOT EXISTS idx_courses_periods ON courses (semester, periods);
+CREATE INDEX IF NOT EXISTS idx_courses_weeks ON courses (semester, weeks);
+CREATE INDEX IF NOT EXISTS idx_courses_enrolled ON courses (semester, enrolled);
+CREATE INDEX IF NOT EXISTS idx_teachers_name ON course_teachers (teacher_name, semester);
+CREATE INDEX IF NOT EXISTS idx_teachers_id ON course_teachers (teacher_id, semester);
+'''
+
+# 数据库列 -> 课程字典中的字段名（与 course_finder 的输出一致）
+COLUMNS = (
+	('course_id', '课程ID'),
+	('name', '课程名称'),
+	('enrolled', '选课人数'),
+	('weeks', '周次'),
+	('periods', '节次'),
+	('location', '上课地点'),
+	('hours', '上课总学时'),
+	('nature', '课程性质'),
+	('admin_class', '行政班级名称'),
+	('class_name', '教学班名称'),
+)
+
+_UPSERT_COURSE = f'''
+INSERT INTO courses (semester, {', '.join(column for column, _ in COLUMNS)}, updated_at)
+VALUES (?, {', '.join('?' for _ in COLUMNS)}, ?)
+ON CONFLICT (semester, course_id) DO UPDATE SET
+	{', '.join(f'{column} = excluded.{column}' for column, _ in COLUMNS[1:])},
+	updated_at = excluded.updated_at
+'''
+_INSERT_MEETING = 'INSERT OR IGNORE INTO course_meetings (semester, course_id, weekday, weeks, periods) VALUES (?, ?, ?, ?, ?)'
+_UPSERT_TEACHER = '''
+INSERT INTO course_teachers (semester, course_id, teacher_id, teacher_name) VALUES (?, ?, ?, ?)
+ON CONFLICT (semester, course_id, teacher_id) DO UPDATE SET teacher_name = excluded.teacher_name
+'''
+
+
+def format_config_block(course_ids: Iterable[str]) -> str:
+	"""生成 config.ini 中的 num1/idN 配置块"""
+	course_ids = list(course_ids)
+	lines = [f'num1 = {len(course_ids)}']
+	lines.extend(f'id{i} = {course_id}' for i, course_id in enumerate(course_ids, 1))
+	return '\n'.join(lines) + '\n'
+
+
+class CourseCatalog:
+	"""
+	SQLite 课程目录，同一课程的多位教师记录在 course_teachers 表中；
+	courses 表每门课程只有一行，一周上多次课时每次的星期、周次、节次记录在 course_meetings 表中
+	"""
+
+	def __init__(self, path: str = CATALOG_PATH):
+		self.path = path
+		self.conn = sqlite3.connect(path)
+		self.conn.row_factory = sqlite3.Row
+		self.conn.execute('PRAGMA journal_mode = WAL')
+		self.conn.execute('PRAGMA synchronous = NORMAL')
+		self.conn.executescript(_SCHEMA)
+
+	def close(self):
+		self.conn.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def upsert_courses(self, semester: str, courses: Iterable[Dict[str, object]]) -> int:
+		"""
+		在一个事务中批量写入课程（没有课程ID的跳过），返回写入的课程数。
+		同一课程的多条记录（一周多次课）都记入上课时间，批次中课程原有的上课时间被替换
+		"""
+		now = time.time()
+		course_rows = []
+		teacher_rows = []
+		meeting_rows = []
+		for course in courses:
+			course_id = course.get('课程ID')
+			if not course_id:
+				continue
+			course_rows.append((semester, *(course.get(key) for _, key in COLUMNS), now))
+			meeting_rows.append((semester, course_id, course.get('星期') or '', course.get('周次') or '', course.get('节次') or ''))
+			if course.get('教师ID'):
+				teacher_rows.append((semester, course_id, course['教师ID'], course.get('教师姓名')))
+		with self.conn:
+			self.conn.executemany(
+				'DELETE FROM course_meetings WHERE semester = ? AND course_id = ?',
+				{(semester, row[1]) for row in course_rows}
+			)
+			self.conn.executemany(_UPSERT_COURSE, course_rows)
+			self.conn.executemany(_INSERT_MEETING, meeting_rows)
+			self.conn.executemany(_UPSERT_TEACHER, teacher_rows)
+		return len(course_rows)
+
+	def apply_teacher_changes(self, semester: str, removed: Iterable[str], renamed: Dict[str, str]) -> int:
+		"""
+		按教师列表的变化更新目录：删除已移除教师的授课记录（没有其他教师的课程一并删除），更新改名教师的姓名。
+		返回删除的课程数
+		"""
+		removed = list(removed)
+		deleted = 0
+		with self.conn:
+			self.conn.executemany(
+				'UPDATE course_teachers SET teacher_name = ? WHERE semester = ? AND teacher_id = ?',
+				[(name, semester, teacher_id) for teacher_id, name in renamed.items()]
+			)
+			affected = set()
+			for teacher_id in removed:
+				rows = self.conn.execute('SELECT course_id FROM course_teachers WHERE semester = ? AND teacher_id = ?', (semester, teacher_id))
+				affected.update(row[0] for row in rows)
+			self.conn.executemany('DELETE FROM course_teachers WHERE semester = ? AND teacher_id = ?', [(semester, teacher_id) for teacher_id in removed])
+			for course_id in affected:
+				deleted += self.conn.execute(
+					'DELETE FROM courses WHERE semester = ? AND course_id = ? '
+					'AND NOT EXISTS (SELECT 1 FROM course_teachers WHERE semester = ? AND course_id = ?)',
+					(semester, course_id, semester, course_id)
+				).rowcount
+			self.conn.execute(
+				'DELETE FROM course_meetings WHERE semester = ? '
+				'AND NOT EXISTS (SELECT 1 FROM courses c WHERE c.semester = course_meetings.semester AND c.course_id = course_meetings.course_id)',
+				(semester,)
+			)
+		return deleted
+
+	def semesters(self) -> List[str]:
+		"""目录中的学期，按从新到旧排列"""
+		return [row[0] for row in self.conn.execute('SELECT DISTINCT semester FROM courses ORDER BY semester DESC')]
+
+	def get_courses(self, semester: str, course_ids: Iterable[str]) -> Dict[str, Dict[str, object]]:
+		"""按课程ID批量读取课程，返回 课程ID -> 课程字典（目录中没有的课程不在结果中）"""
+		course_ids = list(dict.fromkeys(course_ids))
+		courses = {}
+		# 分批查询，避免超过 SQLite 的参数个数上限
+		for start in range(0, len(course_ids), 500):
+			batch = course_ids[start:start + 500]
+			sql = f"SELECT * FROM courses WHERE semester = ? AND course_id IN ({', '.join('?' for _ in batch)})"
+			for row in self.conn.execute(sql, [semester, *batch]):
+				courses[row['course_id']] = {key: row[column] for column, key in COLUMNS if row[column] is not None}
+		return courses
+
+	def get_meetings(self, semester: str, course_ids: Iterable[str]) -> Dict[str, List[Tuple[str, str, str]]]:
+		"""
+		按课程ID批量读取每门课程的上课时间，返回 课程ID -> [(星期, 周次, 节次)]；
+		星期未知时为空字符串。更早写入、没有上课时间记录的课程使用 courses 表中的周次、节次
+		"""
+		course_ids = list(dict.fromkeys(course_ids))
+		meetings: Dict[str, List[Tuple[str, str, str]]] = {}
+		for start in range(0, len(course_ids), 500):
+			batch = course_ids[start:start + 500]
+			sql = (
+				'SELECT course_id, weekday, weeks, periods FROM course_meetings '
+				f"WHERE semester = ? AND course_id IN ({', '.join('?' for _ in batch)}) ORDER BY rowid"
+			)
+			for row in self.conn.execute(sql, [semester, *batch]):
+				meetings.setdefault(row['course_id'], []).append((row['weekday'], row['weeks'], row['periods']))
+		missing = [course_id for course_id in course_ids if course_id not in meetings]
+		for course_id, course in self.get_courses(semester, missing).items():
+			meetings[course_id] = [('', course.get('周次', ''), course.get('节次', ''))]
+		return meetings
+
+	def query(
+		self,
+		semester: str,
+		nature: Optional[str] = None,
+		periods: Optional[str] = None,
+		weeks: Optional[str] = None,
+		teacher: Optional[str] = None,
+		name: Optional[str] = None,
+		min_enrolled: Optional[int] = None,
+		max_enrolled: Optional[int] = None,
+	) -> List[Dict[str, object]]:
+		"""
+		按条件查询课程，结果按课程ID排序。
+		teacher 同时匹配教师姓名和教师ID，name 为课程名称的子串，max_enrolled 为"少于"该人数
+		"""
+		conditions = ['c.semester = ?']
+		params: List[object] = [semester]
+		for column, value in (('nature', nature), ('periods', periods), ('weeks', weeks)):
+			if value is not None:
+				conditions.append(f'c.{column} = ?')
+				params.append(value)
+		if name is not None:
+			conditions.append("c.name LIKE ? ESCAPE '\\'")
+			params.append('%' + name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+		if min_enrolled is not None:
+			conditions.append('c.enrolled >= ?')
+			params.append(min_enrolled)
+		if max_enrolled is not None:
+			conditions.append('c.enrolled < ?')
+			params.append(max_enrolled)
+		if teacher is not None:
+			conditions.append(
+				'EXISTS (SELECT 1 FROM course_teachers t WHERE t.semester = c.semester AND t.course_id = c.course_id'
+				' AND (t.teacher_name = ? OR t.teacher_id = ?))'
+			)
+			params.extend([teacher, teacher])
+
+		sql = f'''
+			SELECT c.*, (
+				SELECT GROUP_CONCAT(t.teacher_name, '、') FROM course_teachers t
+				WHERE t.semester = c.semester AND t.course_id = c.course_id
+			) AS teachers
+			FROM courses c WHERE {' AND '.join(conditions)} ORDER BY c.course_id
+		'''
+		courses = []
+		for row in self.conn.execute(sql, params):
+			course = {key: row[column] for column, key in COLUMNS if row[column] is not None}
+			course['教师姓名'] = row['teachers'] or ''
+			courses.append(course)
+		return courses
+
+
+def import_summary(catalog: CourseCatalog, semester: str, path: str) -> int:
+	"""把 course_finder 生成的汇总 JSON 导入目录"""
+	with open(path, 'r', encoding='utf-8') as f:
+		return catalog.upsert_courses(semester, json.load(f))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+	parser = argparse.ArgumentParser(description='本地课程目录')
+	parser.add_argument('--db', default=CATALOG_PATH, help='目录数据库路径')
+	subparsers = parser.add_subparsers(dest='command', required=True)
+
+	query = subparsers.add_parser('query', help='查询课程')
+	query.add_argument('--semester', help='学期（默认为目录中最新的学期）')
+	query.add_argument('--nature', help='课程性质，如 文化素质类')
+	query.add_argument('--periods', help='节次，如 09-10节')
+	query.add_argument('--weeks', help='周次，如 1-10')
+	query.add_argument('--teacher', help='教师姓名或教师ID')
+	query.add_argument('--name', help='课程名称（子串匹配）')
+	query.add_argument('--min-enrolled', type=int, help='选课人数不少于')
+	query.add_argument('--max-enrolled', type=int, help='选课人数少于')
+	query.add_argument('--format', choices=('table', 'config', 'json'), default='table', help='输出格式')
+
+	importer = subparsers.add_parser('import', help='导入 course_finder 生成的汇总 JSON')
+	importer.add_argument('--semester', required=True, help='学期')
+	importer.add_argument('path', nargs='?', default='data/all_online_courses_summary.json', help='汇总文件路径')
+	return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+	args = parse_args(argv)
+	with CourseCatalog(args.db) as catalog:
+		if args.command == 'import':
+			count = import_summary(catalog, args.semester, args.path)
+			print(f"✓ 已导入 {count} 门课程到 {args.db}")
+			return 0
+
+		semester = args.semester
+		if semester is None:
+			semesters = catalog.semesters()
+			if not semesters:
+				print("✗ 课程目录为空，请先运行 course_finder.py")
+				return 1
+			semester = semesters[0]
+		courses = catalog.query(
+			semester,
+			nature=args.nature,
+			periods=args.periods,
+			weeks=args.weeks,
+			teacher=args.teacher,
+			name=args.name,
+			min_enrolled=args.min_enrolled,
+			max_enrolled=args.max_enrolled,
+		)
+
+	if args.format == 'config':
+		print(f"# {semester} 查询结果: {len(courses)} 门课程")
+		print(format_config_block(course['课程ID'] for course in courses), end='')
+	elif args.format == 'json':
+		print(json.dumps(courses, ensure_ascii=False, indent=2))
+	else:
+		for course in courses:
+			print(
+				f"{course['课程ID']}  {course.get('课程名称', '')}  {course.get('课程性质', '')}  "
+				f"{course.get('周次', '')}周 {course.get('节次', '')}  {course.get('选课人数', '?')}人  {course['教师姓名']}"
+			)
+		print(f"共 {len(courses)} 门课程（{semester}）")
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
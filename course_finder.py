@@ -1,13 +1,38 @@
 import requests
+import httpx
+import asyncio
+import random
 import json
-import re
 import os
 import time
 
+from catalog_crawl import CrawlJournal, crawl_catalog, merge_courses
+from course_catalog import CATALOG_PATH, CourseCatalog, format_config_block
+from teacher_index import TeacherIndex
+from teacher_list import save_teacher_list
+from teacher_refresh import ListState, apply_teacher_list
+from timetable_cache import TimetableCache
+from timetable_parser import extract_online_courses
+from traffic_log import RecordingTransport, ReplayLog, ReplayTransport, TrafficConfig, TrafficRecorder, mount_traffic
+
 # 配置变量 - 用户可以修改
 SEMESTER = "2025-2026-1"  # 学期信息
 COOKIE = "_ga=GA1.1.2104536743.1742025470; _ga_PR7953H3X6=GS2.1.s1748770182$o51$g0$t1748770182$j60$l0$h0; JSESSIONID=A4C5E4CC52D43EFAA4A73B04E343FF57; SF_cookie_350=25110820"  # Cookie信息
-FORCE_GET_REQUEST = False  # 是否强制发送GET请求（即使parsed_data.json已存在）
+FORCE_GET_REQUEST = False  # 是否强制刷新教师列表（即使parsed_data.json已存在；已存在时增量刷新）
+TEACHER_LIST_REFRESH_AGE = 24 * 3600  # 教师列表超过该时间（秒）未检查时自动增量刷新，0 表示只在 FORCE_GET_REQUEST 时刷新
+CONCURRENCY = 8  # 同时查询的教师数
+MAX_RETRIES = 3  # 单个教师查询失败时的最大重试次数
+REQUEST_TIMEOUT = 10  # 单次请求超时（秒）
+USE_TIMETABLE_CACHE = True  # 是否使用本地课表缓存（False 时强制重新获取并解析所有教师课表）
+CACHE_TTL = 7 * 24 * 3600  # 缓存有效期（秒），有效期内不再请求
+CACHE_MAX_ENTRIES = 5000  # 缓存最多保存的教师数
+TEACHER_LIST_CHUNK_SIZE = 64 * 1024  # 流式读取教师列表页面的块大小（字节）
+USE_COURSE_CATALOG = True  # 是否把查询结果写入本地课程目录（data/course_catalog.db，可用 course_catalog.py 查询）
+TRAFFIC_MODE = ""  # "record" 把请求与响应录制到 TRAFFIC_PATH；"replay" 用录制的响应代替网络请求（按原耗时等待）
+TRAFFIC_PATH = "data/finder_traffic.jsonl.gz"  # 请求日志路径（可用 traffic_log.py stats 查看）
+CRAWL_ALL_TEACHERS = False  # 是否查询教师目录（parsed_data.json）中的全部教师而不是 TEACHERS；中断后重新运行从检查点继续
+CRAWL_CONCURRENCY = 32  # 全目录查询时同时查询的教师数
+CRAWL_WORKERS = None  # 全目录查询时解析页面的进程数（None 为 CPU 核数，1 为不使用进程池）
 
 # 教师信息列表 - 用户可以添加多个教师
 # 支持三种格式：
@@ -40,50 +65,61 @@ TEACHERS = [
     # {"id": "0000424", "name": "西班牙语外教"},
 ]
 
-def load_teacher_data():
+# 录制模式下的请求日志写入器，由主程序启动和关闭
+traffic_recorder = None
+
+def traffic_config():
     """
-    从parsed_data.json加载教师数据
+    当前的请求录制/回放配置
     """
-    try:
-        if os.path.exists('data/parsed_data.json'):
-            with open('data/parsed_data.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return data
-        else:
-            print("警告: data/parsed_data.json 文件不存在，请先运行GET请求获取教师列表")
-            return []
-    except Exception as e:
-        print(f"加载教师数据时发生错误: {e}")
-        return []
+    return TrafficConfig(mode=TRAFFIC_MODE, path=TRAFFIC_PATH)
+
+def create_session():
+    """
+    创建 requests 会话，按 TRAFFIC_MODE 挂载录制或回放适配器
+    """
+    return mount_traffic(requests.Session(), traffic_config(), traffic_recorder, 'teacher_list')
+
+def create_transport(limits):
+    """
+    按 TRAFFIC_MODE 创建查询课表使用的 httpx 传输层，不录制也不回放时返回 None
+    """
+    if TRAFFIC_MODE == "replay":
+        return ReplayTransport(ReplayLog.load(TRAFFIC_PATH, 'timetable'))
+    if TRAFFIC_MODE == "record" and traffic_recorder is not None:
+        return RecordingTransport(httpx.AsyncHTTPTransport(limits=limits), traffic_recorder, 'timetable')
+    return None
 
 def check_teacher_data_freshness():
     """
-    检查教师数据是否需要更新
+    检查教师列表是否需要刷新（距上次检查超过 TEACHER_LIST_REFRESH_AGE）
     """
     if not os.path.exists('data/parsed_data.json'):
         return True  # 文件不存在，需要获取
+    if TEACHER_LIST_REFRESH_AGE <= 0:
+        return False
     
     try:
-        # 检查文件修改时间
-        file_time = os.path.getmtime('data/parsed_data.json')
-        import time
-        current_time = time.time()
-        
-        # 如果文件超过24小时，建议更新
-        if current_time - file_time > 24 * 3600:
-            print("提示: parsed_data.json 文件已超过24小时，建议设置 FORCE_GET_REQUEST = True 重新获取最新数据")
-            return False  # 不强制更新，但给出提示
-        
-        return False  # 文件较新，不需要更新
+        # 优先使用上次检查的时间（内容未变化时不改写文件），没有记录时使用文件修改时间
+        checked_at = ListState().checked_at() or os.path.getmtime('data/parsed_data.json')
+        if time.time() - checked_at > TEACHER_LIST_REFRESH_AGE:
+            print(f"教师列表已超过 {TEACHER_LIST_REFRESH_AGE / 3600:g} 小时未检查，自动增量刷新")
+            return True
+        return False  # 检查过不久，不需要刷新
     except Exception:
         return False  # 出错时默认不更新
 
 def complete_teacher_info(teacher_list):
     """
-    自动补全教师信息
+    自动补全教师信息（基于教师目录索引，姓名支持去掉"（外聘）"等后缀匹配）
     """
-    teacher_data = load_teacher_data()
-    if not teacher_data:
+    try:
+        index = TeacherIndex.load_or_build()
+    except Exception as e:
+        print(f"加载教师数据时发生错误: {e}")
+        return teacher_list
+    if not index:
+        print("警告: data/parsed_data.json 文件不存在，请先运行GET请求获取教师列表")
         return teacher_list
     
     completed_teachers = []
@@ -93,31 +129,21 @@ def complete_teacher_info(teacher_list):
         
         # 如果只有ID，查找对应的姓名
         if 'id' in teacher and 'name' not in teacher:
-            for teacher_info in teacher_data:
-                if teacher_info.get('jg0101id') == teacher['id']:
-                    completed_teacher['name'] = teacher_info.get('xm', '')
-                    break
-            else:
+            name = index.name_of(teacher['id'])
+            if name is None:
                 continue
+            completed_teacher['name'] = name
         
-        # 如果只有姓名，查找对应的ID
+        # 如果只有姓名，查找对应的ID（同名时取目录中的第一位），保留配置中的姓名
         elif 'name' in teacher and 'id' not in teacher:
-            for teacher_info in teacher_data:
-                if teacher_info.get('xm') == teacher['name']:
-                    completed_teacher['id'] = teacher_info.get('jg0101id', '')
-                    break
-            else:
+            ids = index.ids_for(teacher['name'])
+            if not ids:
                 continue
+            completed_teacher['id'] = ids[0]
         
         # 如果信息完整，验证是否存在
         elif 'id' in teacher and 'name' in teacher:
-            found = False
-            for teacher_info in teacher_data:
-                if (teacher_info.get('jg0101id') == teacher['id'] and 
-                    teacher_info.get('xm') == teacher['name']):
-                    found = True
-                    break
-            if not found:
+            if index.name_of(teacher['id']) != teacher['name']:
                 continue
         
         # 如果信息不完整，跳过
@@ -128,22 +154,23 @@ def complete_teacher_info(teacher_list):
     
     return completed_teachers
 
-def make_get_request():
+TEACHER_LIST_URL = "http://csujwc.its.csu.edu.cn/jiaowu/pkgl/llsykb/llsykb_find_jg0101.jsp"
+
+def build_get_params():
     """
-    发送GET请求到中南大学教务系统
+    构造获取教师列表的请求参数
     """
-    # 请求URL
-    url = "http://csujwc.its.csu.edu.cn/jiaowu/pkgl/llsykb/llsykb_find_jg0101.jsp"
-    
-    # 请求参数
-    params = {
+    return {
         'xnxq01id': SEMESTER,
         'init': '1',
         'isview': '1'
     }
-    
-    # 请求头
-    headers = {
+
+def build_get_headers():
+    """
+    构造获取教师列表的请求头
+    """
+    return {
         'Host': 'csujwc.its.csu.edu.cn',
         'Proxy-Connection': 'keep-alive',
         'Upgrade-Insecure-Requests': '1',
@@ -154,119 +181,122 @@ def make_get_request():
         'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
         'Cookie': COOKIE
     }
-    
+
+def make_get_request():
+    """
+    发送GET请求到中南大学教务系统
+    """
     try:
-        # 发送GET请求
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        
-        # 如果响应成功
-        if response.status_code == 200:
-            print("✓ GET请求成功")
-            
-            # 解析JavaScript数据
-            parse_js_data(response.text)
-            
-        else:
-            print(f"✗ GET请求失败，状态码: {response.status_code}")
+        # 发送GET请求（流式读取，页面不整体载入内存）
+        with create_session() as session, session.get(TEACHER_LIST_URL, params=build_get_params(), headers=build_get_headers(), timeout=10, stream=True) as response:
+            # 如果响应成功
+            if response.status_code == 200:
+                print("✓ GET请求成功")
+                
+                # 边读取边解析JavaScript数据
+                response.encoding = response.encoding or 'utf-8'
+                if save_teacher_data(response.iter_content(chunk_size=TEACHER_LIST_CHUNK_SIZE, decode_unicode=True)):
+                    ListState().update(SEMESTER, response.headers)
+                
+            else:
+                print(f"✗ GET请求失败，状态码: {response.status_code}")
             
     except requests.exceptions.RequestException as e:
         print(f"请求发生错误: {e}")
     except Exception as e:
         print(f"发生未知错误: {e}")
 
-def parse_js_data(html_content):
+def refresh_teacher_list():
     """
-    解析HTML中的JavaScript数据
+    增量刷新教师列表：条件请求，内容未变化时不改写文件；
+    有变化时按教师ID比较新旧列表，只让移除和改名教师的课表缓存与课程目录记录失效
     """
+    state = ListState()
+    headers = {**build_get_headers(), **state.conditional_headers(SEMESTER)}
     try:
-        # 查找JavaScript数组数据
-        pattern = r'var\s+js\s*=\s*"(\[.*?\])"'
-        match = re.search(pattern, html_content, re.DOTALL)
-        
-        if match:
-            js_data_str = match.group(1)
-            # 替换JavaScript对象格式为JSON格式
-            js_data_str = js_data_str.replace("'", '"')
-            js_data_str = re.sub(r'(\w+):', r'"\1":', js_data_str)
+        with create_session() as session, session.get(TEACHER_LIST_URL, params=build_get_params(), headers=headers, timeout=10, stream=True) as response:
+            if response.status_code == 304:
+                print("✓ 教师列表未变化（304 Not Modified）")
+                state.update(SEMESTER, response.headers)
+                return
+            if response.status_code != 200:
+                print(f"✗ GET请求失败，状态码: {response.status_code}")
+                return
             
-            # 解析JSON数据
-            data = json.loads(js_data_str)
-            
-            # 格式化保存到文件
-            with open('data/parsed_data.json', 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            
-            print(f"✓ 解析到 {len(data)} 位教师信息")
-            
-        else:
-            print("✗ 未找到教师数据")
-            
-    except json.JSONDecodeError as e:
-        print(f"JSON解析错误: {e}")
+            response.encoding = response.encoding or 'utf-8'
+            diff, count = apply_teacher_list(response.iter_content(chunk_size=TEACHER_LIST_CHUNK_SIZE, decode_unicode=True))
+            state.update(SEMESTER, response.headers)
+    except requests.exceptions.RequestException as e:
+        print(f"请求发生错误: {e}")
+        return
+    except ValueError as e:
+        print(f"✗ {e}")
+        return
+    
+    if not diff.changed:
+        print(f"✓ 教师列表未变化（{count} 位教师）")
+        return
+    
+    print(f"✓ 教师列表已更新: {diff}，共 {count} 位教师")
+    for teacher in diff.added[:10]:
+        print(f"  + {teacher.get('xm', '')} ({teacher['jg0101id']})")
+    for teacher in diff.removed[:10]:
+        print(f"  - {teacher.get('xm', '')} ({teacher['jg0101id']})")
+    for teacher_id, old_name, new_name in diff.renamed[:10]:
+        print(f"  ~ {old_name} → {new_name} ({teacher_id})")
+    invalidate_teachers(diff)
+
+def invalidate_teachers(diff):
+    """
+    让移除和改名教师的课表缓存失效，并同步更新课程目录中的教师记录
+    """
+    affected = diff.affected_ids
+    if not affected:
+        return
+    
+    cache = TimetableCache(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+    cache.invalidate(SEMESTER, affected)
+    cache.save()
+    print(f"✓ 已清除 {len(affected)} 位教师的课表缓存")
+    
+    if USE_COURSE_CATALOG and os.path.exists(CATALOG_PATH):
+        try:
+            with CourseCatalog() as catalog:
+                deleted = catalog.apply_teacher_changes(
+                    SEMESTER,
+                    [teacher['jg0101id'] for teacher in diff.removed],
+                    {teacher_id: new_name for teacher_id, _, new_name in diff.renamed}
+                )
+            print(f"✓ 课程目录已同步教师变化，删除 {deleted} 门没有授课教师的课程")
+        except Exception as e:
+            print(f"更新课程目录时发生错误: {e}")
+
+def parse_js_data(html_content):
+    """
+    解析HTML中的JavaScript教师列表数据（流式解析，见 teacher_list）
+    """
+    return save_teacher_data([html_content])
+
+def save_teacher_data(chunks):
+    """
+    边读取边解析教师列表，以紧凑格式保存到 data/parsed_data.json
+    """
+    try:
+        count = save_teacher_list(chunks)
+        print(f"✓ 解析到 {count} 位教师信息")
+        return count
+    except ValueError as e:
+        print(f"✗ {e}")
     except Exception as e:
         print(f"解析数据时发生错误: {e}")
+    return 0
 
 def parse_course_data(html_content, teacher_name):
     """
-    解析课程信息数据
+    解析课程信息数据（单遍扫描，见 timetable_parser）
     """
     try:
-        # 查找所有课程信息div - 更宽松的匹配模式
-        pattern = r'<div[^>]*style="display:\s*none;"[^>]*class="kbcontent"[^>]*>(.*?)</div>'
-        matches = re.findall(pattern, html_content, re.DOTALL)
-        
-        # 如果没有找到，尝试其他可能的模式
-        if not matches:
-            pattern = r'<div[^>]*class="kbcontent"[^>]*style="display:\s*none;"[^>]*>(.*?)</div>'
-            matches = re.findall(pattern, html_content, re.DOTALL)
-        
-        courses = []
-        for match in matches:
-            course_info = {}
-            
-            # 定义字段映射
-            field_mappings = {
-                '课程名称': r'<font title=\'课程名称\'>([^<]+)</font>',
-                '选课人数': r'<font title=\'选课人数\'>(\d+)人</font>',
-                '周次': r'<font title=\'周次\'>([^<]+)</font>',
-                '节次': r'<font title=\'节次\'>([^<]+)</font>',
-                '上课地点': r'<font title=\'上课地点教室\'>([^<]+)</font>',
-                '上课总学时': r'<font title=\'上课总学时\'>(\d+)</font>',
-                '课程性质': r'<font title=\'课程性质\'>([^<]+)</font>',
-                '行政班级名称': r'<font title=\'行政班级名称\'>([^<]+)</font>'
-            }
-            
-            # 提取常规字段
-            for field_name, pattern in field_mappings.items():
-                match_result = re.search(pattern, match)
-                if match_result:
-                    value = match_result.group(1)
-                    # 特殊处理数字字段
-                    if field_name in ['选课人数', '上课总学时']:
-                        course_info[field_name] = int(value)
-                    else:
-                        course_info[field_name] = value
-            
-            # 特殊处理教学班名称 - 支持多种格式
-            class_name_patterns = [
-                r'<font title=\'教学班名称\'>([^<]+)<br/></font>',  # 带<br/>的格式
-                r'<font title=\'教学班名称\'>([^<]+)</font>',       # 标准格式
-            ]
-            
-            for pattern in class_name_patterns:
-                class_name_match = re.search(pattern, match)
-                if class_name_match:
-                    course_info['教学班名称'] = class_name_match.group(1)
-                    break
-            
-            if course_info:  # 只添加有数据的课程
-                # 只保留包含"网上慕课"的课程
-                if '教学班名称' in course_info and '网上慕课' in course_info['教学班名称']:
-                    # 提取课程ID
-                    course_id_match = re.search(r'网上慕课-(\d{6})', course_info['教学班名称'])
-                    if course_id_match:
-                        course_info['课程ID'] = course_id_match.group(1)
-                    courses.append(course_info)
+        courses = extract_online_courses(html_content)
         
         if courses:
             print(f"✓ 找到 {len(courses)} 门网上慕课课程")
@@ -279,6 +309,116 @@ def parse_course_data(html_content, teacher_name):
         print(f"解析课程数据时发生错误: {e}")
         return []
 
+KB_URL = "http://csujwc.its.csu.edu.cn/jiaowu/pkgl/llsykb/llsykb_kb.jsp"
+
+def build_post_headers():
+    """
+    构造查询课表的请求头（所有教师共用）
+    """
+    return {
+        'Host': 'csujwc.its.csu.edu.cn',
+        'Proxy-Connection': 'keep-alive',
+        'Cache-Control': 'max-age=0',
+        'Origin': 'http://csujwc.its.csu.edu.cn',
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Upgrade-Insecure-Requests': '1',
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36 Edg/138.0.0.0',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+        'Referer': f'http://csujwc.its.csu.edu.cn/jiaowu/pkgl/llsykb/llsykb_find_jg0101.jsp?xnxq01id={SEMESTER}&init=1&isview=1',
+        'Accept-Encoding': 'gzip, deflate',
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
+        'Cookie': COOKIE
+    }
+
+def build_post_data(teacher):
+    """
+    构造查询单个教师课表的表单
+    """
+    return {
+        'type': 'jg0101',
+        'isview': '1',
+        'zc': '',
+        'xnxq01id': SEMESTER,
+        'yxbh': '',
+        'jszwdm': '',
+        'teacherID': teacher['name'],
+        'jg0101id': teacher['id'],
+        'jg0101mc': '',
+        'sfFD': '1'
+    }
+
+async def fetch_teacher_page(client, semaphore, teacher):
+    """
+    查询单个教师的课表页面，网络错误和5xx时带随机抖动指数退避重试
+    返回 (状态码, 页面内容)
+    """
+    async with semaphore:
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                response = await client.post(KB_URL, data=build_post_data(teacher))
+                if response.status_code < 500 or attempt == MAX_RETRIES:
+                    return response.status_code, response.text
+            except httpx.HTTPError:
+                if attempt == MAX_RETRIES:
+                    raise
+            await asyncio.sleep(random.uniform(0.5, 1.0) * (2 ** attempt) * 0.5)
+
+async def crawl_teachers(teachers, concurrency=CONCURRENCY, cache=None):
+    """
+    并发查询所有教师的课表，每个页面返回后立即解析
+    提供 cache 时有效期内的教师不再请求，页面内容未变的教师不再解析
+    返回与 teachers 顺序一致的结果列表，每项为课程列表，查询失败时为 None
+    """
+    results = [None] * len(teachers)
+    pending = []
+    for index, teacher in enumerate(teachers):
+        cached = cache.get_fresh(SEMESTER, teacher['id']) if cache else None
+        if cached is None:
+            pending.append(index)
+            continue
+        print(f"查询教师: {teacher['name']} ✓ 缓存命中 {len(cached)} 门网上慕课课程")
+        results[index] = cached
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    
+    async with httpx.AsyncClient(headers=build_post_headers(), limits=limits, timeout=REQUEST_TIMEOUT, transport=create_transport(limits)) as client:
+        async def fetch(index):
+            try:
+                return index, await fetch_teacher_page(client, semaphore, teachers[index]), None
+            except Exception as e:
+                return index, None, e
+        
+        for future in asyncio.as_completed([fetch(i) for i in pending]):
+            index, page, error = await future
+            teacher = teachers[index]
+            print(f"查询教师: {teacher['name']}", end=" ")
+            
+            if error is not None:
+                print("✗ 网络错误")
+                continue
+            
+            status_code, text = page
+            if status_code != 200:
+                print("✗ 请求失败")
+                continue
+            
+            page_hash = TimetableCache.hash_page(text) if cache else None
+            cached = cache.get_by_hash(SEMESTER, teacher['id'], page_hash) if cache else None
+            if cached is not None:
+                print(f"✓ 页面未变化，沿用缓存的 {len(cached)} 门网上慕课课程")
+                results[index] = cached
+                continue
+            
+            try:
+                # 解析课程信息
+                results[index] = parse_course_data(text, teacher['name'])
+                if cache:
+                    cache.put(SEMESTER, teacher['id'], page_hash, results[index])
+            except Exception:
+                print("✗ 解析错误")
+    
+    return results
+
 def make_post_request():
     """
     发送POST请求到中南大学教务系统
@@ -292,82 +432,87 @@ def make_post_request():
     
     print(f"查询 {len(completed_teachers)} 位教师...")
     
-    # 请求URL
-    url = "http://csujwc.its.csu.edu.cn/jiaowu/pkgl/llsykb/llsykb_kb.jsp"
+    # 并发查询所有教师
+    cache = TimetableCache(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES) if USE_TIMETABLE_CACHE else None
+    results = asyncio.run(crawl_teachers(completed_teachers, cache=cache))
+    if cache:
+        cache.save()
+        print(f"课表缓存: {cache.stats}")
     
-    # 统计变量
+    # 统计变量（按教师列表顺序汇总，与查询完成顺序无关）
     all_courses = []
     teachers_with_courses = []
     teachers_without_courses = []
     
-    # 为每个教师发送请求
-    for teacher in completed_teachers:
-        print(f"查询教师: {teacher['name']}", end=" ")
-        
-        # POST数据
-        data = {
-            'type': 'jg0101',
-            'isview': '1',
-            'zc': '',
-            'xnxq01id': SEMESTER,
-            'yxbh': '',
-            'jszwdm': '',
-            'teacherID': teacher['name'],
-            'jg0101id': teacher['id'],
-            'jg0101mc': '',
-            'sfFD': '1'
-        }
-        
-        # 请求头
-        headers = {
-            'Host': 'csujwc.its.csu.edu.cn',
-            'Proxy-Connection': 'keep-alive',
-            'Cache-Control': 'max-age=0',
-            'Origin': 'http://csujwc.its.csu.edu.cn',
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Upgrade-Insecure-Requests': '1',
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36 Edg/138.0.0.0',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Referer': f'http://csujwc.its.csu.edu.cn/jiaowu/pkgl/llsykb/llsykb_find_jg0101.jsp?xnxq01id={SEMESTER}&init=1&isview=1',
-            'Accept-Encoding': 'gzip, deflate',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
-            'Cookie': COOKIE
-        }
-        
-        try:
-            # 发送POST请求
-            response = requests.post(url, data=data, headers=headers, timeout=10)
-            
-            # 如果响应成功
-            if response.status_code == 200:
-                # 解析课程信息
-                courses = parse_course_data(response.text, teacher['name'])
-                
-                # 统计信息
-                if courses:
-                    teachers_with_courses.append(teacher['name'])
-                    # 为每个课程添加教师信息
-                    for course in courses:
-                        course['教师姓名'] = teacher['name']
-                        course['教师ID'] = teacher['id']
-                    all_courses.extend(courses)
-                else:
-                    teachers_without_courses.append(teacher['name'])
-                
-            else:
-                print("✗ 请求失败")
-                teachers_without_courses.append(teacher['name'])
-                
-        except requests.exceptions.RequestException as e:
-            print("✗ 网络错误")
-            teachers_without_courses.append(teacher['name'])
-        except Exception as e:
-            print("✗ 解析错误")
+    for teacher, courses in zip(completed_teachers, results):
+        if courses:
+            teachers_with_courses.append(teacher['name'])
+            # 为每个课程添加教师信息
+            for course in courses:
+                course['教师姓名'] = teacher['name']
+                course['教师ID'] = teacher['id']
+            all_courses.extend(courses)
+        else:
             teachers_without_courses.append(teacher['name'])
     
+    # 写入本地课程目录
+    if USE_COURSE_CATALOG and all_courses:
+        update_course_catalog(all_courses)
+    
     # 生成汇总报告
     generate_summary_report(all_courses, teachers_with_courses, teachers_without_courses)
 
+async def crawl_all_teachers(teachers, journal):
+    """
+    全目录查询：共享连接池并发获取页面，进程池批量解析，结果写入检查点日志
+    """
+    semaphore = asyncio.Semaphore(CRAWL_CONCURRENCY)
+    limits = httpx.Limits(max_connections=CRAWL_CONCURRENCY, max_keepalive_connections=CRAWL_CONCURRENCY)
+    
+    async with httpx.AsyncClient(headers=build_post_headers(), limits=limits, timeout=REQUEST_TIMEOUT, transport=create_transport(limits)) as client:
+        return await crawl_catalog(teachers, lambda teacher: fetch_teacher_page(client, semaphore, teacher), journal, workers=CRAWL_WORKERS)
+
+def make_crawl_request():
+    """
+    查询教师目录中全部教师的课表（可中断，重新运行时跳过检查点日志中已完成的教师）
+    """
+    index = TeacherIndex.load_or_build()
+    teachers = [{'id': teacher_id, 'name': name} for teacher_id, name in zip(index.ids, index.names)] if index else []
+    if not teachers:
+        print("✗ 教师目录为空")
+        return
+    
+    journal = CrawlJournal(SEMESTER)
+    print(f"查询全部 {len(teachers)} 位教师（检查点: {journal.path}）...")
+    try:
+        results, failed = asyncio.run(crawl_all_teachers(teachers, journal))
+    except KeyboardInterrupt:
+        print(f"\n已中断，重新运行将从检查点继续: {journal.path}")
+        return
+    
+    # 按教师目录顺序合并，与查询完成顺序无关
+    all_courses = merge_courses(teachers, results)
+    if failed:
+        print(f"✗ {len(failed)} 位教师查询失败，重新运行将只查询这些教师")
+    else:
+        journal.remove()
+    
+    if USE_COURSE_CATALOG and all_courses:
+        update_course_catalog(all_courses)
+    
+    generate_crawl_report(all_courses, teachers, results)
+
+def update_course_catalog(all_courses):
+    """
+    把查询结果批量写入本地课程目录
+    """
+    try:
+        with CourseCatalog() as catalog:
+            count = catalog.upsert_courses(SEMESTER, all_courses)
+        print(f"✓ 课程目录已更新: {count} 条课程记录")
+    except Exception as e:
+        print(f"更新课程目录时发生错误: {e}")
+
 def generate_summary_report(all_courses, teachers_with_courses, teachers_without_courses):
     """
     生成汇总报告
@@ -415,6 +560,33 @@ def generate_summary_report(all_courses, teachers_with_courses, teachers_without
     
     print("="*50)
 
+def generate_crawl_report(all_courses, teachers, results):
+    """
+    生成全目录查询的汇总报告（只输出统计，不逐一列出教师）
+    """
+    print("\n" + "="*50)
+    print("全目录查询结果汇总报告")
+    print("="*50)
+    
+    if all_courses:
+        summary_filename = 'data/all_online_courses_summary.json'
+        with open(summary_filename, 'w', encoding='utf-8') as f:
+            json.dump(all_courses, f, ensure_ascii=False, indent=2)
+        print(f"✓ 所有网上慕课课程已汇总保存到: {summary_filename}")
+        generate_config_format(all_courses)
+    else:
+        print("✗ 未找到任何网上慕课课程")
+    
+    queried = sum(1 for teacher in teachers if teacher['id'] in results)
+    with_courses = sum(1 for teacher in teachers if results.get(teacher['id']))
+    print(f"\n总体统计:")
+    print(f"  总教师数: {len(teachers)}")
+    print(f"  已查询教师数: {queried}")
+    print(f"  有课程教师数: {with_courses}")
+    print(f"  总课程数: {len(all_courses)}")
+    
+    print("="*50)
+
 def generate_config_format(all_courses):
     """
     生成config格式的课程ID配置
@@ -425,7 +597,7 @@ def generate_config_format(all_courses):
         if '课程ID' in course:
             course_ids.append({
                 'id': course['课程ID'],
-                'name': course['课程名称'],
+                'name': course.get('课程名称', ''),
                 'teacher': course['教师姓名']
             })
     
@@ -447,10 +619,7 @@ def generate_config_format(all_courses):
             f.write(f"# 网上慕课课程ID配置\n")
             f.write(f"# 生成时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write(f"# 总课程数: {len(unique_courses)}\n\n")
-            f.write(f"num1 = {len(unique_courses)}\n")
-            
-            for i, course in enumerate(unique_courses, 1):
-                f.write(f"id{i} = {course['id']}\n")
+            f.write(format_config_block(course['id'] for course in unique_courses))
         
         print(f"✓ 课程ID配置已保存到: {config_filename}")
         print(f"✓ 共提取到 {len(unique_courses)} 个唯一课程ID")
@@ -466,16 +635,27 @@ if __name__ == "__main__":
     print("中南大学教务系统课程查询")
     print("="*40)
     
-    # 检查是否需要发送GET请求
-    need_get_request = FORCE_GET_REQUEST or not os.path.exists('data/parsed_data.json')
+    if TRAFFIC_MODE == "record":
+        traffic_recorder = TrafficRecorder(TRAFFIC_PATH)
+        traffic_recorder.start()
     
-    if need_get_request:
-        print("获取教师列表...")
-        make_get_request()
-    else:
-        print("使用现有教师列表")
-        # 检查数据是否需要更新
-        check_teacher_data_freshness()
-    
-    print("\n查询网上慕课课程...")
-    make_post_request()
+    try:
+        # 没有教师列表时完整获取，已有时按需增量刷新
+        if not os.path.exists('data/parsed_data.json'):
+            print("获取教师列表...")
+            make_get_request()
+        elif FORCE_GET_REQUEST or check_teacher_data_freshness():
+            print("刷新教师列表...")
+            refresh_teacher_list()
+        else:
+            print("使用现有教师列表")
+        
+        print("\n查询网上慕课课程...")
+        if CRAWL_ALL_TEACHERS:
+            make_crawl_request()
+        else:
+            make_post_request()
+    finally:
+        if traffic_recorder is not None:
+            traffic_recorder.close()
+            print(f"✓ 已录制 {traffic_recorder.count} 次请求到 {TRAFFIC_PATH}")
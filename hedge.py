@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对冲请求
+选课请求在超过近期延迟的指定百分位仍未返回时，在另一条连接上补发一份相同的请求，
+先得到确定结果的一方胜出，另一方被取消；对冲次数受比例和并发上限约束，避免放大服务器负载
+"""
+
+import math
+import asyncio
+from collections import deque
+from typing import Deque, Iterable, Optional
+from dataclasses import dataclass
+
+import httpx
+
+
+@dataclass
+class HedgeConfig:
+	"""对冲请求配置"""
+	enabled: bool = False
+	percentile: float = 95.0  # 超过近期延迟的该百分位仍未返回时发出对冲请求
+	min_delay: float = 0.05  # 对冲等待时间下限（秒）
+	initial_delay: float = 1.0  # 延迟样本不足时使用的对冲等待时间（秒）
+	window: int = 200  # 用于计算百分位的最近延迟样本数
+	min_samples: int = 20  # 少于该样本数时使用 initial_delay
+	max_ratio: float = 0.1  # 对冲请求数占全部请求数的比例上限
+	max_outstanding: int = 4  # 同时在途的对冲请求数上限
+
+
+def percentile(values: Iterable[float], q: float) -> Optional[float]:
+	"""最近秩法计算百分位数，q 取值 0-100，无数据时返回 None"""
+	ordered = sorted(values)
+	if not ordered:
+		return None
+	rank = max(1, min(len(ordered), math.ceil(q / 100 * len(ordered))))
+	return ordered[rank - 1]
+
+
+class LatencyTracker:
+	"""最近请求延迟的滑动窗口"""
+
+	def __init__(self, window: int):
+		self.samples: Deque[float] = deque(maxlen=window)
+
+	def record(self, latency: float):
+		self.samples.append(latency)
+
+	def percentile(self, q: float) -> Optional[float]:
+		return percentile(self.samples, q)
+
+
+class HedgedRequester:
+	"""在共享的 httpx.AsyncClient 上发出带对冲的 GET 请求"""
+
+	def __init__(self, client: httpx.AsyncClient, config: HedgeConfig):
+		self.client = client
+		self.config = config
+		self.tracker = LatencyTracker(config.window)
+		self.requests = 0
+		self.hedges = 0
+		self.hedge_wins = 0
+		self._budget = 1.0  # 对冲令牌，每个请求积累 max_ratio 个
+		self._outstanding = 0
+
+	def hedge_delay(self) -> float:
+		"""发出对冲请求前的等待时间"""
+		if len(self.tracker.samples) < self.config.min_samples:
+			return max(self.config.min_delay, self.config.initial_delay)
+		return max(self.config.min_delay, self.tracker.percentile(self.config.percentile))
+
+	def _may_hedge(self) -> bool:
+		return self._budget >= 1 and self._outstanding < self.config.max_outstanding
+
+	@staticmethod
+	def is_decisive(response: httpx.Response) -> bool:
+		"""5xx 不算确定结果，需要等待另一份请求"""
+		return response.status_code < 500
+
+	async def _timed_get(self, url: str, request: Optional[httpx.Request] = None) -> httpx.Response:
+		loop = asyncio.get_running_loop()
+		started_at = loop.time()
+		response = await (self.client.send(request) if request is not None else self.client.get(url))
+		self.tracker.record(loop.time() - started_at)
+		return response
+
+	async def get(self, url: str, request: Optional[httpx.Request] = None) -> httpx.Response:
+		"""发出 GET 请求，必要时对冲；request 为预先构造的同一 URL 的请求，只用于第一份"""
+		self.requests += 1
+		self._budget = min(self.config.max_outstanding, self._budget + self.config.max_ratio)
+		primary = asyncio.ensure_future(self._timed_get(url, request))
+		try:
+			done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay())
+		except asyncio.CancelledError:
+			primary.cancel()
+			raise
+		if done or not self._may_hedge():
+			return await primary
+
+		self._budget -= 1
+		self._outstanding += 1
+		self.hedges += 1
+		hedge = asyncio.ensure_future(self._timed_get(url))
+		pending = {primary, hedge}
+		fallback: Optional[asyncio.Future] = None
+		try:
+			while pending:
+				done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+				for future in done:
+					if future.exception() is None and self.is_decisive(future.result()):
+						if future is hedge:
+							self.hedge_wins += 1
+						return future.result()
+					fallback = future
+			# 两份请求都没有确定结果时，按原样返回最后完成的一份（或抛出其异常）
+			return fallback.result()
+		finally:
+			self._outstanding -= 1
+			for future in pending:
+				future.cancel()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+选课器运行指标
+登录、进入选课与选课请求的计数器和延迟直方图（按账号、课程、结果分组），
+通过本机 HTTP 端点以 Prometheus 文本格式（/metrics）或 JSON（/metrics.json）提供，并定期在控制台输出一行汇总
+"""
+
+import json
+import time
+import asyncio
+from bisect import bisect_left
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from dataclasses import dataclass
+
+
+@dataclass
+class MetricsConfig:
+	"""运行指标配置"""
+	enabled: bool = False
+	host: str = '127.0.0.1'
+	port: int = 9109  # 0 表示不启动 HTTP 端点
+	summary_interval: float = 10.0  # 控制台汇总间隔（秒），<=0 表示不输出
+
+
+# 延迟直方图的桶上界（秒）与每次成功所用尝试次数的桶上界
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ATTEMPT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+PREFIX = 'csu_'
+# 指标名 -> (类型, 说明, 标签名)
+METRICS = {
+	'select_requests_total': ('counter', '选课请求数', ('account', 'course', 'outcome')),
+	'select_latency_seconds': ('histogram', '选课请求耗时', ('account', 'course')),
+	'select_attempts_per_success': ('histogram', '每门课程选上前的尝试次数', ('account',)),
+	'phase_requests_total': ('counter', '登录与进入选课阶段的请求数', ('phase', 'account', 'outcome')),
+	'phase_latency_seconds': ('histogram', '登录与进入选课阶段的耗时', ('phase', 'account')),
+}
+
+Labels = Tuple[str, ...]
+
+
+class Histogram:
+	"""固定分桶的直方图，counts[i] 为落在第 i 个桶（不累计）的次数，最后一个桶为 +Inf"""
+	__slots__ = ('bounds', 'counts', 'sum', 'count')
+
+	def __init__(self, bounds: Sequence[float]):
+		self.bounds = bounds
+		self.counts = [0] * (len(bounds) + 1)
+		self.sum = 0.0
+		self.count = 0
+
+	def observe(self, value: float):
+		self.counts[bisect_left(self.bounds, value)] += 1
+		self.sum += value
+		self.count += 1
+
+	def quantile(self, q: float) -> Optional[float]:
+		"""按桶内线性插值估计分位数，落在 +Inf 桶时返回最大的有限上界"""
+		if not self.count:
+			return None
+		rank = q / 100 * self.count
+		seen = 0
+		lower = 0.0
+		for index, count in enumerate(self.counts):
+			if index == len(self.bounds):
+				return self.bounds[-1]
+			upper = self.bounds[index]
+			if seen + count >= rank and count:
+				return lower + (upper - lower) * (rank - seen) / count
+			seen += count
+			lower = upper
+		return self.bounds[-1]
+
+
+class Metrics:
+	"""指标注册表，多个账号可以共用一个实例"""
+
+	def __init__(self):
+		self.started_at = time.monotonic()
+		self.counters: Dict[str, Dict[Labels, int]] = {name: {} for name, (kind, _, _) in METRICS.items() if kind == 'counter'}
+		self.histograms: Dict[str, Dict[Labels, Histogram]] = {name: {} for name, (kind, _, _) in METRICS.items() if kind == 'histogram'}
+		self.select_latency = Histogram(LATENCY_BUCKETS)  # 全部选课请求，用于控制台汇总
+		self.select_outcomes: Dict[str, int] = {}
+		self._attempts: Dict[Tuple[str, str], int] = {}
+		self._last_summary = (self.started_at, 0)
+
+	def _histogram(self, name: str, labels: Labels, bounds: Sequence[float]) -> Histogram:
+		histograms = self.histograms[name]
+		histogram = histograms.get(labels)
+		if histogram is None:
+			histogram = histograms[labels] = Histogram(bounds)
+		return histogram
+
+	def record_select(self, account: str, course_id: str, outcome: str, seconds: float):
+		"""记录一次选课请求的结果与耗时"""
+		counters = self.counters['select_requests_total']
+		labels = (account, course_id, outcome)
+		counters[labels] = counters.get(labels, 0) + 1
+		self._histogram('select_latency_seconds', (account, course_id), LATENCY_BUCKETS).observe(seconds)
+		self.select_latency.observe(seconds)
+		self.select_outcomes[outcome] = self.select_outcomes.get(outcome, 0) + 1
+
+		key = (account, course_id)
+		attempts = self._attempts.get(key, 0) + 1
+		self._attempts[key] = attempts
+		if outcome == 'success':
+			self._histogram('select_attempts_per_success', (account,), ATTEMPT_BUCKETS).observe(attempts)
+
+	def record_phase(self, phase: str, account: str, outcome: str, seconds: float):
+		"""记录登录、查询选课轮次、进入选课等阶段的一次请求"""
+		counters = self.counters['phase_requests_total']
+		labels = (phase, account, outcome)
+		counters[labels] = counters.get(labels, 0) + 1
+		self._histogram('phase_latency_seconds', (phase, account), LATENCY_BUCKETS).observe(seconds)
+
+	def render_prometheus(self) -> str:
+		"""Prometheus 文本格式"""
+		lines = []
+		for name, (kind, help_text, label_names) in METRICS.items():
+			full_name = PREFIX + name
+			lines.append(f'# HELP {full_name} {help_text}')
+			lines.append(f'# TYPE {full_name} {kind}')
+			if kind == 'counter':
+				for labels, value in sorted(self.counters[name].items()):
+					lines.append(f'{full_name}{_format_labels(label_names, labels)} {value}')
+				continue
+			for labels, histogram in sorted(self.histograms[name].items()):
+				cumulative = 0
+				for bound, count in zip((*histogram.bounds, '+Inf'), histogram.counts):
+					cumulative += count
+					le = bound if isinstance(bound, str) else repr(float(bound))
+					lines.append(f'{full_name}_bucket{_format_labels((*label_names, "le"), (*labels, le))} {cumulative}')
+				lines.append(f'{full_name}_sum{_format_labels(label_names, labels)} {histogram.sum!r}')
+				lines.append(f'{full_name}_count{_format_labels(label_names, labels)} {histogram.count}')
+		return '\n'.join(lines) + '\n'
+
+	def snapshot(self) -> dict:
+		"""JSON 格式的指标快照"""
+		data = {'uptime_s': round(time.monotonic() - self.started_at, 3)}
+		for name, (kind, _, label_names) in METRICS.items():
+			if kind == 'counter':
+				data[name] = [{**dict(zip(label_names, labels)), 'value': value} for labels, value in sorted(self.counters[name].items())]
+			else:
+				data[name] = [
+					{
+						**dict(zip(label_names, labels)),
+						'count': histogram.count,
+						'sum': histogram.sum,
+						'p50': histogram.quantile(50),
+						'p99': histogram.quantile(99),
+						'buckets': dict(zip([*map(str, histogram.bounds), '+Inf'], histogram.counts)),
+					}
+					for labels, histogram in sorted(self.histograms[name].items())
+				]
+		return data
+
+	def summary_line(self) -> str:
+		"""自上次汇总以来的请求速率，以及累计的结果分布和延迟分位数"""
+		now = time.monotonic()
+		last_at, last_count = self._last_summary
+		total = self.select_latency.count
+		self._last_summary = (now, total)
+		rate = (total - last_count) / (now - last_at) if now > last_at else 0.0
+		outcomes = ' '.join(f'{outcome}={count}' for outcome, count in sorted(self.select_outcomes.items())) or '无'
+		p50 = self.select_latency.quantile(50)
+		p99 = self.select_latency.quantile(99)
+		latency = f'p50 {p50 * 1000:.0f}ms p99 {p99 * 1000:.0f}ms' if p50 is not None else '无'
+		return f'统计: 选课请求 {total} 次，{rate:.1f} 次/秒，结果 {outcomes}，延迟 {latency}'
+
+
+def _escape(value: str) -> str:
+	return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+	return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + '}'
+
+
+class MetricsReporter:
+	"""本机指标 HTTP 端点与定期控制台汇总，作为异步上下文管理器使用"""
+
+	def __init__(self, metrics: Metrics, config: MetricsConfig, log: Callable[[str], None] = print):
+		self.metrics = metrics
+		self.config = config
+		self.log = log
+		self.server: Optional[asyncio.AbstractServer] = None
+		self._summary_task: Optional[asyncio.Task] = None
+
+	async def start(self):
+		if self.config.port:
+			self.server = await asyncio.start_server(self._handle_connection, self.config.host, self.config.port)
+			port = self.server.sockets[0].getsockname()[1]
+			self.log(f'运行指标: http://{self.config.host}:{port}/metrics（JSON: /metrics.json）')
+		if self.config.summary_interval > 0:
+			self._summary_task = asyncio.ensure_future(self._report_periodically())
+
+	async def stop(self):
+		if self._summary_task:
+			self._summary_task.cancel()
+			try:
+				await self._summary_task
+			except asyncio.CancelledError:
+				pass
+			self.log(self.metrics.summary_line())
+		if self.server:
+			self.server.close()
+			await self.server.wait_closed()
+
+	async def __aenter__(self) -> 'MetricsReporter':
+		await self.start()
+		return self
+
+	async def __aexit__(self, *exc_info):
+		await self.stop()
+
+	async def _report_periodically(self):
+		while True:
+			await asyncio.sleep(self.config.summary_interval)
+			self.log(self.metrics.summary_line())
+
+	async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+		try:
+			request_line = await reader.readline()
+			while (await reader.readline()).strip():
+				pass
+			parts = request_line.decode('latin-1').split()
+			path = parts[1].split('?', 1)[0] if len(parts) > 1 else ''
+			if path == '/metrics':
+				status, content_type, body = '200 OK', 'text/plain; version=0.0.4; charset=utf-8', self.metrics.render_prometheus()
+			elif path == '/metrics.json':
+				status, content_type, body = '200 OK', 'application/json; charset=utf-8', json.dumps(self.metrics.snapshot(), ensure_ascii=False)
+			else:
+				status, content_type, body = '404 Not Found', 'text/plain; charset=utf-8', 'not found\n'
+			payload = body.encode('utf-8')
+			writer.write(
+				f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n'.encode('latin-1')
+				+ payload
+			)
+			await writer.drain()
+		except (ConnectionError, asyncio.CancelledError):
+			pass
+		finally:
+			writer.close()
+
+
+def measure_overhead(iterations: int = 100000, courses: int = 20) -> float:
+	"""测量 record_select 的平均耗时（秒），用于确认埋点开销远小于一次选课请求"""
+	metrics = Metrics()
+	course_ids = [f'{100000 + i:06d}' for i in range(courses)]
+	outcomes = ('full', 'full', 'full', 'retryable', 'success')
+	started_at = time.perf_counter()
+	for i in range(iterations):
+		metrics.record_select('', course_ids[i % courses], outcomes[i % len(outcomes)], 0.001 * (i % 200))
+	return (time.perf_counter() - started_at) / iterations
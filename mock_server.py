@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟教务服务器
+覆盖 CSUURLs 中选课流程用到的接口，用于离线测试与性能基准
+"""
+
+import json
+import time
+import random
+import asyncio
+import secrets
+from email.utils import formatdate
+from typing import Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit, parse_qs
+
+from autoselect import CSUURLs
+
+
+LOGIN_PAGE = '<html><head><title>用户登录</title></head><body><form>用户名<input name="userAccount"/>密码<input name="userPassword"/></form></body></html>'
+MAIN_PAGE = '<html><head><title>学生个人中心</title></head><body>xsMain 学生个人中心</body></html>'
+ENTRY_PATH = '/jsxsd/xsxk/xsxk_index'
+LISTING_PATH = urlsplit(CSUURLs.COURSE_FIND_URL).path
+LISTING_CAPACITY = 100  # 列表中每门课程的容量（pkrs）
+# 1x1 像素的 JPEG 图片，作为验证码图片占位
+VERIFY_CODE_IMAGE = bytes.fromhex(
+	'ffd8ffe000104a46494600010100000100010000ffdb004300080606070605080707070909080a0c'
+	'140d0c0b0b0c1912130f141d1a1f1e1d1a1c1c20242e2720222c231c1c2837292c30313434341f27'
+	'393d38323c2e333432ffc0000b080001000101011100ffc4001f0000010501010101010100000000'
+	'000000000102030405060708090a0bffda0008010100003f00fbd3ffd9'
+)
+
+
+@dataclass
+class MockServerConfig:
+	"""模拟服务器配置"""
+	host: str = '127.0.0.1'
+	port: int = 0  # 0 表示自动分配端口
+	semester: str = '2025-2026-1'
+	verify_code: str = '1234'
+	latency: float = 0.0  # 每个请求的基础延迟（秒）
+	latency_jitter: float = 0.0  # 在基础延迟上叠加的均匀随机抖动（秒）
+	tail_rate: float = 0.0  # 请求落入长尾的概率
+	tail_latency: float = 0.0  # 长尾请求额外增加的延迟（秒）
+	connect_latency: float = 0.0  # 每条新连接上第一个请求的额外延迟（秒），模拟建立连接的握手开销
+	default_seats: int = 1  # 未在 seats 中出现的课程的名额
+	seats: Dict[str, int] = field(default_factory=dict)  # 课程ID -> 名额
+	release_after: Optional[float] = None  # 进入选课后多少秒，为已满课程释放一个名额
+	conflict_ids: Set[str] = field(default_factory=set)  # 返回"冲突"的课程
+	selected_ids: Set[str] = field(default_factory=set)  # 返回"当前教学班已选择！"的课程
+	null_ids: Set[str] = field(default_factory=set)  # 返回 null（不存在）的课程
+	listing_ids: List[str] = field(default_factory=list)  # 出现在公选课列表中的课程
+	listing_padding: int = 0  # 列表中额外的无关课程数（模拟分页）
+	error_rate: float = 0.0  # 每个请求触发一次5xx突发的概率
+	error_burst: int = 5  # 每次突发连续返回5xx的请求数
+	session_ttl: Optional[float] = None  # 登录后会话的有效期（秒）
+	idle_timeout: Optional[float] = None  # 会话空闲超过该时间（秒）后失效
+	expire_redirect: bool = False  # 会话失效时返回 302 重定向到登录页面（响应体为空），否则直接返回登录页面
+	open_delay: float = 0.0  # 服务启动后多少秒出现"进入选课"链接
+	open_at: Optional[float] = None  # 按服务器时钟（epoch秒）出现"进入选课"链接的时刻，优先于 open_delay
+	clock_offset: float = 0.0  # 服务器时钟相对本机的偏差（秒），体现在 Date 响应头中
+	seed: Optional[int] = None
+
+
+@dataclass
+class MockSession:
+	"""模拟服务器上的单个会话"""
+	session_id: str
+	logged_in_at: Optional[float] = None
+	last_seen: Optional[float] = None
+	entered: bool = False
+	selected: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class MockServerStats:
+	"""模拟服务器统计数据，时间均为 time.perf_counter() 读数"""
+	requests: Dict[str, int] = field(default_factory=dict)  # 接口路径 -> 请求数
+	select_requests: int = 0
+	server_errors: int = 0
+	expired_hits: int = 0
+	entered_at: Optional[float] = None
+	first_select_at: Optional[float] = None  # 第一个选课请求到达的时间
+	connections: int = 0  # 建立的连接数
+	first_success: Dict[str, float] = field(default_factory=dict)  # 课程ID -> 首次成功时间
+	outcomes: Dict[str, int] = field(default_factory=dict)  # 结果 -> 次数
+
+
+class MockJwcServer:
+	"""基于 asyncio 的最小 HTTP/1.1 教务模拟服务器（支持 keep-alive）"""
+
+	def __init__(self, config: Optional[MockServerConfig] = None):
+		self.config = config or MockServerConfig()
+		self.stats = MockServerStats()
+		self.sessions: Dict[str, MockSession] = {}
+		self.seats: Dict[str, int] = dict(self.config.seats)
+		self.random = random.Random(self.config.seed)
+		self.started_at = time.perf_counter()
+		self._error_budget = 0
+		self._server: Optional[asyncio.base_events.Server] = None
+
+	@property
+	def base_url(self) -> str:
+		"""服务器的访问地址"""
+		host, port = self._server.sockets[0].getsockname()[:2]
+		return f'http://{host}:{port}'
+
+	async def start(self) -> str:
+		"""启动服务器并返回访问地址"""
+		self.started_at = time.perf_counter()
+		self._server = await asyncio.start_server(self._handle_connection, self.config.host, self.config.port)
+		return self.base_url
+
+	async def stop(self):
+		"""停止服务器"""
+		if self._server:
+			self._server.close()
+			await self._server.wait_closed()
+
+	async def __aenter__(self) -> 'MockJwcServer':
+		await self.start()
+		return self
+
+	async def __aexit__(self, *exc_info):
+		await self.stop()
+
+	async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+		"""处理一个 TCP 连接上的多个请求"""
+		self.stats.connections += 1
+		first = True
+		try:
+			while True:
+				request_line = await reader.readline()
+				if not request_line:
+					break
+				method, target, _ = request_line.decode('latin-1').split(' ', 2)
+				if self.stats.first_select_at is None and urlsplit(target).path in (CSUURLs.PUBLIC_SELECT_URL, CSUURLs.REQUIRED_SELECT_URL):
+					self.stats.first_select_at = time.perf_counter()
+				headers = {}
+				while True:
+					line = await reader.readline()
+					if line in (b'\r\n', b'\n', b''):
+						break
+					name, _, value = line.decode('latin-1').partition(':')
+					headers[name.strip().lower()] = value.strip()
+				body = b''
+				length = int(headers.get('content-length', 0))
+				if length:
+					body = await reader.readexactly(length)
+
+				delay = self.config.latency + self.random.uniform(0, self.config.latency_jitter)
+				if first:
+					delay += self.config.connect_latency
+					first = False
+				if self.config.tail_rate and self.random.random() < self.config.tail_rate:
+					delay += self.config.tail_latency
+				if delay > 0:
+					await asyncio.sleep(delay)
+
+				status, extra_headers, payload = self.handle_request(method, target, headers, body)
+				writer.write(self._render_response(status, extra_headers, payload, include_body=method != 'HEAD'))
+				await writer.drain()
+				if headers.get('connection', '').lower() == 'close':
+					break
+		except (ConnectionError, asyncio.IncompleteReadError, ValueError, asyncio.CancelledError):
+			pass
+		finally:
+			writer.close()
+
+	def server_time(self) -> float:
+		"""服务器时钟（epoch秒）"""
+		return time.time() + self.config.clock_offset
+
+	def _render_response(self, status: int, headers: List[Tuple[str, str]], payload: bytes, include_body: bool = True) -> bytes:
+		"""序列化 HTTP 响应"""
+		reason = {200: 'OK', 302: 'Found', 404: 'Not Found', 503: 'Service Unavailable'}.get(status, 'Unknown')
+		lines = [
+			f'HTTP/1.1 {status} {reason}',
+			f'Date: {formatdate(self.server_time(), usegmt=True)}',
+			f'Content-Length: {len(payload)}',
+			'Connection: keep-alive',
+		]
+		lines.extend(f'{name}: {value}' for name, value in headers)
+		return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (payload if include_body else b'')
+
+	def _get_session(self, headers: Dict[str, str]) -> Optional[MockSession]:
+		"""根据 Cookie 查找会话"""
+		for item in headers.get('cookie', '').split(';'):
+			name, _, value = item.strip().partition('=')
+			if name == 'JSESSIONID':
+				return self.sessions.get(value)
+		return None
+
+	def _is_logged_in(self, session: Optional[MockSession]) -> bool:
+		"""会话是否处于有效登录状态"""
+		if session is None or session.logged_in_at is None:
+			return False
+		now = time.perf_counter()
+		ttl = self.config.session_ttl
+		if ttl is not None and now - session.logged_in_at > ttl:
+			return False
+		idle_timeout = self.config.idle_timeout
+		if idle_timeout is not None and now - (session.last_seen or session.logged_in_at) > idle_timeout:
+			return False
+		session.last_seen = now
+		return True
+
+	def handle_request(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Tuple[int, List[Tuple[str, str]], bytes]:
+		"""分发请求，返回 (状态码, 额外响应头, 响应体)"""
+		parts = urlsplit(target)
+		path = parts.path
+		self.stats.requests[path] = self.stats.requests.get(path, 0) + 1
+
+		# 模拟服务器过载时的连续5xx
+		if self._error_budget == 0 and self.config.error_rate and self.random.random() < self.config.error_rate:
+			self._error_budget = self.config.error_burst
+		if self._error_budget > 0:
+			self._error_budget -= 1
+			self.stats.server_errors += 1
+			return 503, [], b'<html><body>503 Service Unavailable</body></html>'
+
+		extra_headers = []
+		session = self._get_session(headers)
+		if session is None and path in (CSUURLs.VERIFY_CODE_URL, CSUURLs.LOGIN_URL):
+			session = MockSession(secrets.token_hex(16).upper())
+			self.sessions[session.session_id] = session
+			extra_headers.append(('Set-Cookie', f'JSESSIONID={session.session_id}; Path=/jsxsd'))
+
+		if path == CSUURLs.VERIFY_CODE_URL:
+			return 200, extra_headers + [('Content-Type', 'image/jpeg')], VERIFY_CODE_IMAGE
+
+		if path == CSUURLs.LOGIN_URL:
+			if method == 'POST':
+				form = parse_qs(body.decode('utf-8'))
+				if form.get('RANDOMCODE', [''])[0] == self.config.verify_code:
+					session.logged_in_at = time.perf_counter()
+					session.last_seen = session.logged_in_at
+					session.entered = False
+					return 200, extra_headers, MAIN_PAGE.encode('utf-8')
+			return 200, extra_headers, LOGIN_PAGE.encode('utf-8')
+
+		if not self._is_logged_in(session):
+			if session is not None and session.logged_in_at is not None:
+				self.stats.expired_hits += 1
+			if self.config.expire_redirect:
+				return 302, extra_headers + [('Location', CSUURLs.LOGIN_URL)], b''
+			return 200, extra_headers, LOGIN_PAGE.encode('utf-8')
+
+		if path == CSUURLs.MAIN_URL:
+			return 200, extra_headers, MAIN_PAGE.encode('utf-8')
+
+		if path == CSUURLs.COURSE_LIST_URL:
+			link = ''
+			if self.config.open_at is not None:
+				is_open = self.server_time() >= self.config.open_at
+			else:
+				is_open = time.perf_counter() - self.started_at >= self.config.open_delay
+			if is_open:
+				link = f'<a href="{ENTRY_PATH}?jx0502zbid=MOCK" target="blank">进入选课</a>'
+			return 200, extra_headers, f'<html><body><table><tr><td>选课轮次</td><td>{link}</td></tr></table></body></html>'.encode('utf-8')
+
+		if path == ENTRY_PATH:
+			session.entered = True
+			if self.stats.entered_at is None:
+				self.stats.entered_at = time.perf_counter()
+			return 200, extra_headers, '<html><body>选课中心</body></html>'.encode('utf-8')
+
+		if path == LISTING_PATH:
+			form = parse_qs(body.decode('utf-8')) if method == 'POST' else parse_qs(parts.query)
+			return 200, extra_headers + [('Content-Type', 'application/json;charset=UTF-8')], self._listing(form)
+
+		if path in (CSUURLs.PUBLIC_SELECT_URL, CSUURLs.REQUIRED_SELECT_URL):
+			query = parse_qs(parts.query)
+			return 200, extra_headers + [('Content-Type', 'application/json;charset=UTF-8')], self._select(session, query.get('jx0404id', [''])[0])
+
+		return 404, extra_headers, b'<html><body>404 Not Found</body></html>'
+
+	def _release_seats(self):
+		"""到达 release_after 后为已满课程释放名额，模拟有人退课"""
+		release_after = self.config.release_after
+		if release_after is None or self.stats.entered_at is None:
+			return
+		if time.perf_counter() - self.stats.entered_at >= release_after:
+			for course_id, seats in self.seats.items():
+				if seats <= 0:
+					self.seats[course_id] = 1
+			self.config.release_after = None
+
+	def _listing(self, form: Dict[str, List[str]]) -> bytes:
+		"""公选课列表（DataTables 分页格式），syrs 为剩余名额"""
+		self._release_seats()
+		course_ids = sorted(set(self.config.listing_ids) | {f'{900000 + i:06d}' for i in range(self.config.listing_padding)})
+		start = int(form.get('iDisplayStart', ['0'])[0])
+		length = int(form.get('iDisplayLength', ['10'])[0])
+		rows = []
+		for course_id in course_ids[start:start + length]:
+			remaining = self.seats.setdefault(course_id, self.config.default_seats)
+			rows.append({
+				'jx0404id': f'{self.config.semester}{course_id}',
+				'kcmc': f'模拟课程{course_id}',
+				'pkrs': LISTING_CAPACITY,
+				'xkrs': LISTING_CAPACITY - remaining,
+				'syrs': remaining,
+			})
+		return json.dumps({
+			'sEcho': form.get('sEcho', ['1'])[0],
+			'iTotalRecords': len(course_ids),
+			'iTotalDisplayRecords': len(course_ids),
+			'aaData': rows,
+		}, ensure_ascii=False).encode('utf-8')
+
+	def _select(self, session: MockSession, jx0404id: str) -> bytes:
+		"""处理一次选课请求"""
+		self.stats.select_requests += 1
+		course_id = jx0404id[len(self.config.semester):] if jx0404id.startswith(self.config.semester) else jx0404id
+		self._release_seats()
+
+		if not session.entered:
+			outcome, success, message = 'closed', False, '选课失败：当前未开放选课！'
+		elif course_id in self.config.null_ids:
+			outcome, success, message = 'null', False, None
+		elif course_id in self.config.conflict_ids:
+			outcome, success, message = 'conflict', False, '选课失败：此课程与已选课程上课时间冲突！'
+		elif course_id in self.config.selected_ids or course_id in session.selected:
+			outcome, success, message = 'selected', False, '选课失败：当前教学班已选择！'
+		elif self.seats.setdefault(course_id, self.config.default_seats) <= 0:
+			outcome, success, message = 'full', False, '选课失败：此课堂选课人数已满！'
+		else:
+			self.seats[course_id] -= 1
+			session.selected.add(course_id)
+			self.stats.first_success.setdefault(course_id, time.perf_counter())
+			outcome, success, message = 'success', True, '选课成功'
+
+		self.stats.outcomes[outcome] = self.stats.outcomes.get(outcome, 0) + 1
+		return json.dumps({'success': success, 'message': message}, ensure_ascii=False).encode('utf-8')
+
+
+async def serve_forever(config: MockServerConfig):
+	"""启动模拟服务器并一直运行"""
+	async with MockJwcServer(config) as server:
+		print(f'模拟教务服务器已启动: {server.base_url}')
+		print(f'验证码: {config.verify_code}，在 config.ini 中设置 base_url = {server.base_url} 即可连接')
+		await asyncio.Event().wait()
+
+
+if __name__ == '__main__':
+	try:
+		asyncio.run(serve_forever(MockServerConfig(port=8080)))
+	except KeyboardInterrupt:
+		print('\n模拟服务器已停止')
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+选课开放前的连接预热
+- 提前解析教务系统域名并固定使用解析结果（只用于 http，保留 Host 头），开放时刻前后不再查询 DNS
+- 同时发出多个轻量请求，让连接池预先建立多条长连接
+- 定期发出保活请求，避免空闲连接过期或被服务器关闭
+选课请求本身由 CourseSelector 在登录后预先构造，开放时直接发送
+"""
+
+import time
+import socket
+import asyncio
+import ipaddress
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import httpx
+
+
+@dataclass
+class PrewarmConfig:
+	"""连接预热配置"""
+	enabled: bool = False
+	connections: int = 4  # 预先建立的长连接数（不超过 [http] max_keepalive_connections）
+	keepalive_interval: float = 10.0  # 保活请求间隔（秒），应小于 keepalive_expiry 和服务器的空闲超时
+	pin_dns: bool = True  # 提前解析域名并固定使用解析结果
+
+
+async def resolve_host(host: str, port: int) -> str:
+	"""解析域名，返回第一个地址；host 本身是 IP 时原样返回"""
+	try:
+		ipaddress.ip_address(host)
+		return host
+	except ValueError:
+		pass
+	infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+	return infos[0][4][0]
+
+
+class PinnedTransport(httpx.AsyncBaseTransport):
+	"""
+	把发往 host 的请求改为直接连接预先解析的地址，Host 头保持不变。
+	只改写交给底层传输层的请求，客户端看到的请求（Cookie 域等）不受影响；address 为空时不改写
+	"""
+
+	def __init__(self, transport: httpx.AsyncBaseTransport, host: str):
+		self.transport = transport
+		self.host = host
+		self.address: Optional[str] = None
+
+	async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+		if self.address is not None and request.url.host == self.host:
+			request = httpx.Request(
+				request.method,
+				request.url.copy_with(host=self.address),
+				headers=request.headers,
+				stream=request.stream,
+				extensions=request.extensions,
+			)
+		return await self.transport.handle_async_request(request)
+
+	async def aclose(self):
+		await self.transport.aclose()
+
+
+class Prewarmer:
+	"""预热并保持客户端连接池中的长连接，作为异步上下文管理器使用时退出时停止保活"""
+
+	def __init__(self, client: httpx.AsyncClient, config: PrewarmConfig, path: str,
+			pinned: Optional[PinnedTransport] = None, log: Callable[[str], None] = print):
+		self.client = client
+		self.config = config
+		self.path = path  # 预热与保活请求的路径（HEAD）
+		self.pinned = pinned
+		self.log = log
+		self.pings = 0
+		self._keepalive_task: Optional[asyncio.Task] = None
+
+	async def _open(self) -> int:
+		"""同时发出 connections 个 HEAD 请求，连接池没有空闲连接时会为每个请求新建连接，返回成功的请求数"""
+		results = await asyncio.gather(
+			*(self.client.head(self.path) for _ in range(self.config.connections)),
+			return_exceptions=True
+		)
+		return sum(1 for result in results if not isinstance(result, BaseException))
+
+	async def warm(self):
+		"""解析并固定域名，建立长连接，然后开始定期保活"""
+		started_at = time.perf_counter()
+		if self.pinned is not None and self.config.pin_dns and self.client.base_url.scheme == 'http':
+			url = self.client.base_url
+			try:
+				self.pinned.address = await resolve_host(url.host, url.port or 80)
+			except OSError as e:
+				self.log(f'连接预热: 域名 {url.host} 解析失败（{e}），不固定地址')
+			else:
+				if self.pinned.address != url.host:
+					self.log(f'连接预热: {url.host} 固定解析为 {self.pinned.address}')
+		opened = await self._open()
+		self.log(f'连接预热: 建立 {opened}/{self.config.connections} 条长连接，用时 {(time.perf_counter() - started_at) * 1000:.0f} ms')
+		if self.config.keepalive_interval > 0 and self._keepalive_task is None:
+			self._keepalive_task = asyncio.ensure_future(self._keepalive())
+
+	async def _keepalive(self):
+		while True:
+			await asyncio.sleep(self.config.keepalive_interval)
+			await self._open()
+			self.pings += 1
+
+	async def stop(self):
+		"""停止保活（选课开始后连接由选课请求本身保持）"""
+		if self._keepalive_task is not None:
+			self._keepalive_task.cancel()
+			try:
+				await self._keepalive_task
+			except asyncio.CancelledError:
+				pass
+			self._keepalive_task = None
+
+	async def __aenter__(self) -> 'Prewarmer':
+		return self
+
+	async def __aexit__(self, *exc_info):
+		await self.stop()
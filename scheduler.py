@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+选课请求调度器
+用一个调度循环替代每门课程各自的 while True 轮询：
+全局请求速率预算、按优先级分配请求名额、每门课程的最小请求间隔、异常时的指数退避，
+以及课程组（组内选上指定门数后立即取消其余课程）；会话恢复期间可以暂停发出新的请求，
+单门课程可以挂起，等外部（如余量监视）放行后再发出请求；
+常驻模式下所有课程结束后继续运行，可以随时加入、移除、暂停课程或调整优先级
+"""
+
+import heapq
+import random
+import asyncio
+import itertools
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
+
+
+@dataclass
+class SchedulerConfig:
+	"""调度器配置"""
+	rate: float = 10.0  # 全局每秒最多发出的选课请求数，<=0 表示不限制
+	burst: int = 1  # 令牌桶容量，允许的瞬时突发请求数
+	min_interval: float = 0.5  # 同一门课程两次请求之间的默认最小间隔（秒）
+	backoff_base: float = 0.5  # 发生异常后的首次退避时间（秒）
+	backoff_max: float = 8.0  # 退避时间上限（秒）
+
+
+class RateLimiter:
+	"""令牌桶限速器"""
+
+	def __init__(self, rate: float, burst: int = 1):
+		self.rate = rate
+		self.capacity = max(1, burst)
+		self.tokens = float(self.capacity)
+		self.updated_at: Optional[float] = None
+
+	def _refill(self, now: float):
+		if self.updated_at is not None:
+			self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+		self.updated_at = now
+
+	def delay(self) -> float:
+		"""距离下一个令牌可用还需等待的时间（秒）"""
+		if self.rate <= 0:
+			return 0.0
+		self._refill(asyncio.get_running_loop().time())
+		return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+	def consume(self):
+		"""消耗一个令牌，调用前应确认 delay() 为 0"""
+		if self.rate > 0:
+			self.tokens -= 1
+
+	async def acquire(self):
+		"""等待并获取一个令牌"""
+		while True:
+			wait = self.delay()
+			if wait <= 0:
+				self.consume()
+				return
+			await asyncio.sleep(wait)
+
+
+class FairRateLimiter:
+	"""
+	多账号共享的全局令牌桶
+
+	各账号的等待者按账号轮询获得令牌，课程多的账号不会挤占课程少的账号；
+	空闲账号不占用名额，其份额自动分给仍在等待的账号。
+	"""
+
+	def __init__(self, rate: float, burst: int = 1):
+		self.bucket = RateLimiter(rate, burst)
+		self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+		self._turns: Deque[str] = deque()  # 有等待者的账号，按轮询顺序排列
+		self._dispatcher: Optional[asyncio.Task] = None
+
+	def view(self, key: str, rate: float = 0.0, burst: int = 1) -> 'AccountRateLimiter':
+		"""返回某个账号使用的限速器，rate > 0 时该账号另受自身速率限制"""
+		return AccountRateLimiter(self, key, RateLimiter(rate, burst))
+
+	async def acquire(self, key: str):
+		"""以账号 key 的身份等待一个全局令牌"""
+		future = asyncio.get_running_loop().create_future()
+		queue = self._waiters.setdefault(key, deque())
+		if not queue:
+			self._turns.append(key)
+		queue.append(future)
+		if self._dispatcher is None or self._dispatcher.done():
+			self._dispatcher = asyncio.ensure_future(self._dispatch())
+		await future
+
+	def _next_waiter(self) -> Optional[asyncio.Future]:
+		"""轮询取出下一个仍在等待的请求"""
+		while self._turns:
+			key = self._turns.popleft()
+			queue = self._waiters[key]
+			while queue and queue[0].done():
+				queue.popleft()
+			if not queue:
+				continue
+			future = queue.popleft()
+			if queue:
+				self._turns.append(key)
+			return future
+		return None
+
+	async def _dispatch(self):
+		while True:
+			await self.bucket.acquire()
+			future = self._next_waiter()
+			if future is None:
+				# 没有等待者，归还令牌
+				self.bucket.tokens += 1
+				return
+			future.set_result(None)
+
+
+class AccountRateLimiter:
+	"""单个账号视角的限速器：先满足账号自身速率，再按轮询参与全局分配"""
+
+	def __init__(self, shared: FairRateLimiter, key: str, own: RateLimiter):
+		self.shared = shared
+		self.key = key
+		self.own = own
+
+	async def acquire(self):
+		await self.own.acquire()
+		await self.shared.acquire(self.key)
+
+
+@dataclass
+class CourseGroup:
+	"""课程组：组内课程选上 quota 门后，其余课程不再请求"""
+	name: str
+	quota: int
+	course_ids: List[str]
+	selected: List[str] = field(default_factory=list)
+
+	@property
+	def filled(self) -> bool:
+		return len(self.selected) >= self.quota
+
+
+@dataclass
+class CourseState:
+	"""单门课程在调度器中的状态"""
+	course: object
+	priority: int
+	interval: float
+	failures: int = 0
+	attempts: int = 0
+	done: bool = False
+	group: Optional[CourseGroup] = None
+	held: bool = False  # 挂起中，不发出请求
+	paused: bool = False  # 被手动暂停，release() 不会放行，只能由 resume_course() 恢复
+	queued: int = -1  # 最近一次排队的序号，旧的队列项直接丢弃
+
+
+class RequestScheduler:
+	"""
+	选课请求调度器
+
+	attempt 为单次尝试的协程函数，返回 True 表示该课程已结束（成功/冲突/不存在等），
+	返回 False 表示需要按最小间隔重试，抛出异常时按指数退避重试；
+	也可以返回带 finished 与 selected 属性的结果（如 SelectOutcome），selected 为真时计入课程组的已选门数。
+	"""
+
+	def __init__(self, config: SchedulerConfig, attempt: Callable[[object], Awaitable[bool]], limiter=None, log: Callable[[str], None] = print):
+		self.config = config
+		self.attempt = attempt
+		self.limiter = limiter or RateLimiter(config.rate, config.burst)  # 需提供 async acquire()
+		self.log = log
+		self.states: Dict[str, CourseState] = {}
+		self._waiting: List[Tuple[float, int, str]] = []  # (就绪时间, 序号, 课程ID)
+		self._ready: List[Tuple[int, float, int, str]] = []  # (-优先级, 就绪时间, 序号, 课程ID)
+		self._in_flight: Set[asyncio.Task] = set()
+		self._tasks: Dict[str, asyncio.Task] = {}  # 课程ID -> 进行中的尝试
+		self.cancelled = 0  # 因课程组已选满而取消的课程数
+		self._counter = itertools.count()
+		self._wakeup = asyncio.Event()
+		self._resumed = asyncio.Event()
+		self._resumed.set()
+		self.persistent = False  # 常驻模式：所有课程结束后继续运行，直到 stop()
+		self._stopped = False
+
+	@property
+	def paused(self) -> bool:
+		return not self._resumed.is_set()
+
+	def pause(self):
+		"""暂停发出新的请求（进行中的请求不受影响），课程保持排队"""
+		self._resumed.clear()
+
+	def resume(self):
+		"""恢复发出请求，暂停期间到期的课程按优先级依次发出"""
+		self._resumed.set()
+
+	async def wait_resumed(self):
+		await self._resumed.wait()
+
+	def add(self, course, priority: int = 0, interval: Optional[float] = None, delay: float = 0.0, held: bool = False):
+		"""加入一门课程，course 需要有 course_id 属性；held 为真时先挂起，release() 后才发出请求"""
+		state = CourseState(
+			course=course,
+			priority=priority,
+			interval=self.config.min_interval if interval is None else interval,
+			held=held,
+		)
+		self.states[course.course_id] = state
+		if not held:
+			self._schedule(course.course_id, delay)
+
+	def hold(self, course_id: str):
+		"""挂起一门课程：已排队的请求不再发出，进行中的请求结束后不再重试"""
+		state = self.states.get(course_id)
+		if state is not None and not state.done:
+			state.held = True
+			state.queued = -1
+
+	def release(self, course_id: str) -> bool:
+		"""放行挂起的课程并立即排队，课程未挂起或已被手动暂停时返回 False"""
+		state = self.states.get(course_id)
+		if state is None or state.done or not state.held:
+			return False
+		state.held = False
+		if state.paused:
+			return False
+		self._schedule(course_id, 0.0)
+		return True
+
+	def remove(self, course_id: str) -> bool:
+		"""移除一门课程，并取消进行中的尝试"""
+		state = self.states.pop(course_id, None)
+		if state is None:
+			return False
+		state.done = True
+		task = self._tasks.get(course_id)
+		if task is not None and task is not asyncio.current_task():
+			task.cancel()
+		self._wakeup.set()
+		return True
+
+	def pause_course(self, course_id: str) -> bool:
+		"""手动暂停一门课程：已排队的请求不再发出，进行中的请求结束后不再重试"""
+		state = self.states.get(course_id)
+		if state is None or state.done or state.paused:
+			return False
+		state.paused = True
+		state.queued = -1
+		return True
+
+	def resume_course(self, course_id: str) -> bool:
+		"""恢复手动暂停的课程，仍处于挂起状态（等待余量）的课程继续挂起"""
+		state = self.states.get(course_id)
+		if state is None or state.done or not state.paused:
+			return False
+		state.paused = False
+		if not state.held:
+			self._schedule(course_id, 0.0)
+		return True
+
+	def reprioritize(self, course_id: str, priority: int, interval: Optional[float] = None) -> bool:
+		"""调整课程的优先级（以及最小请求间隔），已就绪的课程按新优先级重新排队"""
+		state = self.states.get(course_id)
+		if state is None or state.done:
+			return False
+		state.priority = priority
+		if interval is not None:
+			state.interval = interval
+		if any(seq == state.queued for _, _, seq, _ in self._ready):
+			self._schedule(course_id, 0.0)
+		return True
+
+	def stop(self):
+		"""结束 run()，进行中的尝试会被取消"""
+		self._stopped = True
+		self._wakeup.set()
+
+	def status(self, course_id: str) -> Optional[str]:
+		"""课程当前的调度状态：queued / in_flight / held / paused / done，不在调度器中时返回 None"""
+		state = self.states.get(course_id)
+		if state is None:
+			return None
+		if state.done:
+			return 'done'
+		if course_id in self._tasks:
+			return 'in_flight'
+		if state.paused:
+			return 'paused'
+		return 'held' if state.held else 'queued'
+
+	def add_group(self, group: CourseGroup):
+		"""设置课程组（组内课程需已通过 add 加入），组已选满时其余课程直接结束"""
+		for course_id in group.course_ids:
+			state = self.states.get(course_id)
+			if state is not None:
+				state.group = group
+		if group.filled:
+			self._cancel_group(group)
+
+	def _cancel_group(self, group: CourseGroup):
+		"""结束组内其余课程，并取消正在进行的尝试"""
+		cancelled = 0
+		for course_id in group.course_ids:
+			state = self.states.get(course_id)
+			if state is None or state.done or course_id in group.selected:
+				continue
+			state.done = True
+			cancelled += 1
+			task = self._tasks.get(course_id)
+			if task is not None and task is not asyncio.current_task():
+				task.cancel()
+		if cancelled:
+			self.cancelled += cancelled
+			self.log(f"课程组 {group.name} 已选上 {len(group.selected)}/{group.quota} 门，取消其余 {cancelled} 门课程")
+
+	def _schedule(self, course_id: str, delay: float):
+		ready_at = asyncio.get_running_loop().time() + delay
+		seq = next(self._counter)
+		self.states[course_id].queued = seq
+		heapq.heappush(self._waiting, (ready_at, seq, course_id))
+		self._wakeup.set()
+
+	def _stale(self, seq: int, course_id: str) -> bool:
+		"""队列项对应的课程已结束、已挂起、已暂停或已重新排队"""
+		state = self.states.get(course_id)
+		return state is None or state.done or state.held or state.paused or state.queued != seq
+
+	def _promote(self, now: float):
+		"""将已到就绪时间的课程移入优先级队列"""
+		while self._waiting and self._waiting[0][0] <= now:
+			ready_at, seq, course_id = heapq.heappop(self._waiting)
+			if self._stale(seq, course_id):
+				continue
+			heapq.heappush(self._ready, (-self.states[course_id].priority, ready_at, seq, course_id))
+		# 丢弃队首已结束（所在课程组已选满）或已挂起的课程
+		while self._ready and self._stale(self._ready[0][2], self._ready[0][3]):
+			heapq.heappop(self._ready)
+
+	def _backoff(self, failures: int) -> float:
+		"""第 failures 次连续失败后的退避时间，带随机抖动避免同步重试"""
+		delay = min(self.config.backoff_max, self.config.backoff_base * (2 ** (failures - 1)))
+		return delay * random.uniform(0.5, 1.0)
+
+	async def _run_attempt(self, state: CourseState):
+		course_id = state.course.course_id
+		state.attempts += 1
+		try:
+			result = await self.attempt(state.course)
+		except asyncio.CancelledError:
+			raise
+		except Exception as e:
+			if state.done or state.held or state.paused:
+				return
+			state.failures += 1
+			delay = self._backoff(state.failures)
+			self.log(f"课程 {course_id} 发生错误: {e}，{delay:.2f}秒后重试")
+			self._schedule(course_id, delay)
+			return
+		state.failures = 0
+		group = state.group
+		if getattr(result, 'selected', False) and group is not None:
+			group.selected.append(course_id)
+			state.done = True
+			if group.filled:
+				self._cancel_group(group)
+		if getattr(result, 'finished', result):
+			state.done = True
+		elif not state.done and not state.held and not state.paused:
+			self._schedule(course_id, state.interval)
+
+	def _on_attempt_done(self, task: asyncio.Task):
+		self._in_flight.discard(task)
+		course_id = task.get_name()
+		if self._tasks.get(course_id) is task:
+			del self._tasks[course_id]
+		self._wakeup.set()
+
+	def _pending(self) -> bool:
+		if self._stopped:
+			return False
+		return self.persistent or bool(self._in_flight) or any(not state.done for state in self.states.values())
+
+	async def run(self):
+		"""调度所有课程直到全部结束（常驻模式下直到 stop()）"""
+		loop = asyncio.get_running_loop()
+		try:
+			while self._pending():
+				now = loop.time()
+				self._promote(now)
+				if not self._ready:
+					timeout = self._waiting[0][0] - now if self._waiting else None
+					self._wakeup.clear()
+					try:
+						await asyncio.wait_for(self._wakeup.wait(), timeout)
+					except asyncio.TimeoutError:
+						pass
+					continue
+
+				if self.paused:
+					await self._resumed.wait()
+					continue
+
+				# 等待速率预算，期间可能有更高优先级的课程就绪
+				await self.limiter.acquire()
+				self._promote(loop.time())
+				if not self._ready or self.paused:
+					# 等待预算期间所在课程组已选满，或已暂停
+					continue
+
+				_, _, _, course_id = heapq.heappop(self._ready)
+				state = self.states[course_id]
+				task = asyncio.ensure_future(self._run_attempt(state))
+				task.set_name(course_id)
+				self._tasks[course_id] = task
+				self._in_flight.add(task)
+				task.add_done_callback(self._on_attempt_done)
+		finally:
+			for task in list(self._in_flight):
+				task.cancel()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+公选课余量监视
+定期分页查询公选课列表（CSUURLs.COURSE_FIND_URL，DataTables 格式的 JSON），一次得到所有关注课程的剩余名额。
+关注的课程在调度器中保持挂起，只有列表显示有余量时才放行发出选课请求；
+选课返回"已满"后重新挂起。每个间隔一次列表请求代替对每门课程的轮询
+"""
+
+import json
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+
+@dataclass
+class WatchConfig:
+	"""余量监视配置"""
+	enabled: bool = False
+	interval: float = 1.0  # 查询课程列表的间隔（秒）
+	page_size: int = 200  # 每页课程数
+	max_failures: int = 5  # 连续查询失败这么多次后放弃监视，所有课程改为直接轮询
+
+
+class ListingError(Exception):
+	"""课程列表响应无法解析"""
+
+
+def remaining_seats(row: Dict[str, object]) -> Optional[int]:
+	"""列表中一行课程的剩余名额：优先取 syrs（剩余量），否则用 pkrs（容量）减 xkrs（已选人数）"""
+	try:
+		if row.get('syrs') not in (None, ''):
+			return int(row['syrs'])
+		return int(row['pkrs']) - int(row['xkrs'])
+	except (KeyError, TypeError, ValueError):
+		return None
+
+
+def parse_listing(text: str) -> Tuple[Dict[str, Optional[int]], int]:
+	"""解析一页课程列表，返回 (jx0404id -> 剩余名额, 总课程数)"""
+	try:
+		data = json.loads(text)
+	except ValueError:
+		raise ListingError('课程列表不是 JSON（会话可能已失效）') from None
+	if not isinstance(data, dict) or not isinstance(data.get('aaData'), list):
+		raise ListingError('课程列表缺少 aaData')
+	rows = {str(row['jx0404id']): remaining_seats(row) for row in data['aaData'] if isinstance(row, dict) and row.get('jx0404id')}
+	total = data.get('iTotalRecords', data.get('iTotalDisplayRecords', len(rows)))
+	return rows, int(total)
+
+
+class SeatWatcher:
+	"""
+	轮询课程列表，放行调度器中有余量的挂起课程。
+	targets 为 jx0404id -> 课程ID；fetch_page(表单) 返回一页列表的响应文本（由调用方处理会话失效等情况）
+	"""
+
+	def __init__(self, fetch_page: Callable[[Dict[str, object]], Awaitable[str]], config: WatchConfig, targets: Dict[str, str],
+			log: Callable[[str], None] = print):
+		self.fetch_page = fetch_page
+		self.config = config
+		self.targets = dict(targets)
+		self.log = log
+		self.seats: Dict[str, Optional[int]] = {}  # 课程ID -> 最近一次查到的剩余名额
+		self.requests = 0
+		self._echo = 0
+
+	def watching(self, course_id: str) -> bool:
+		return course_id in self.targets.values()
+
+	def unwatch(self, course_ids: Iterable[str]):
+		course_ids = set(course_ids)
+		self.targets = {jx0404id: course_id for jx0404id, course_id in self.targets.items() if course_id not in course_ids}
+
+	async def fetch(self) -> Dict[str, Optional[int]]:
+		"""分页查询，直到所有关注的课程都已找到或列表结束，返回 课程ID -> 剩余名额"""
+		found: Dict[str, Optional[int]] = {}
+		start = 0
+		while True:
+			self._echo += 1
+			text = await self.fetch_page({
+				'sEcho': self._echo,
+				'iColumns': 1,
+				'iDisplayStart': start,
+				'iDisplayLength': self.config.page_size,
+			})
+			self.requests += 1
+			rows, total = parse_listing(text)
+			for jx0404id, seats in rows.items():
+				course_id = self.targets.get(jx0404id)
+				if course_id is not None:
+					found[course_id] = seats
+			start += self.config.page_size
+			if len(found) == len(self.targets) or not rows or start >= total:
+				return found
+
+	async def run(self, scheduler):
+		"""按间隔查询并放行挂起的课程，直到所有关注的课程结束或被取消"""
+		failures = 0
+		first = True
+		while True:
+			self.unwatch([course_id for course_id in self.targets.values() if scheduler.states[course_id].done])
+			if not self.targets:
+				return
+			await scheduler.wait_resumed()  # 会话恢复期间不查询
+			try:
+				seats = await self.fetch()
+			except (ListingError, httpx.HTTPError) as e:
+				failures += 1
+				if failures >= self.config.max_failures:
+					self.log(f'课程列表连续 {failures} 次查询失败（{e}），停止余量监视，改为直接轮询')
+					self._release(scheduler, list(self.targets.values()))
+					self.targets = {}
+					return
+				await asyncio.sleep(self.config.interval)
+				continue
+			failures = 0
+			self.seats.update(seats)
+
+			if first:
+				first = False
+				missing = [course_id for course_id in self.targets.values() if course_id not in seats]
+				if missing:
+					self.log(f"课程列表中没有 {', '.join(missing)}，这些课程改为直接轮询")
+					self._release(scheduler, missing)
+					self.unwatch(missing)
+			# 剩余名额无法解析时也放行，宁可多发一次请求
+			self._release(scheduler, [course_id for course_id, count in seats.items() if count is None or count > 0])
+			await asyncio.sleep(self.config.interval)
+
+	def _release(self, scheduler, course_ids: List[str]):
+		for course_id in course_ids:
+			if scheduler.release(course_id):
+				seats = self.seats.get(course_id)
+				self.log(f'课程 {course_id} 有余量（{"?" if seats is None else seats}），发出选课请求')
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+选课响应分类
+优先按 JSON 解析 {"success": ..., "message": ...}，解析失败时按优先级依次用预编译的规则检查响应体。
+
+规则有先后之分（页面中先出现的低优先级标记不能盖过登录或成功标记），因此没有合并为一个正则交替：
+合并后最左匹配决定结果，要保持优先级就得 finditer 扫完整个响应体再比较；而且 re 对命名分组的交替
+不做首字符跳跃，在不匹配任何规则的 20 KB 页面上，合并正则比依次 search 六条规则慢约 6 倍
+（每条规则以字面量开头，search 能快速跳过）。未命中时最多扫描六遍，对选课接口的短响应可以忽略
+"""
+
+import re
+import json
+from enum import Enum
+from typing import Optional
+from dataclasses import dataclass
+
+
+class SelectOutcome(Enum):
+	"""选课请求的结果类型"""
+	SUCCESS = 'success'
+	CONFLICT = 'conflict'
+	ALREADY_SELECTED = 'already_selected'
+	NOT_FOUND = 'not_found'
+	FULL = 'full'
+	SESSION_EXPIRED = 'session_expired'
+	RETRYABLE = 'retryable'
+
+	@property
+	def finished(self) -> bool:
+		"""该结果出现后是否不再需要继续请求这门课程"""
+		return self in _FINISHED_OUTCOMES
+
+	@property
+	def selected(self) -> bool:
+		"""该课程是否已在已选课程中"""
+		return self is SelectOutcome.SUCCESS or self is SelectOutcome.ALREADY_SELECTED
+
+
+_FINISHED_OUTCOMES = frozenset({
+	SelectOutcome.SUCCESS,
+	SelectOutcome.CONFLICT,
+	SelectOutcome.ALREADY_SELECTED,
+	SelectOutcome.NOT_FOUND,
+})
+
+
+@dataclass(frozen=True)
+class SelectResult:
+	"""分类结果及服务器消息（去掉"选课失败："前缀）"""
+	outcome: SelectOutcome
+	message: Optional[str] = None
+
+
+# 按优先级依次检查的规则：登录页面（会话失效）和成功标记最先检查，
+# 只有 message 本身为 null 时才算课程不存在（页面脚本中的 null 不算）
+_RULES = (
+	(SelectOutcome.SESSION_EXPIRED, re.compile(r'用户登录|请先登录|LoginToXk|userAccount')),
+	(SelectOutcome.SUCCESS, re.compile(r'"success"\s*:\s*"?true\b')),
+	(SelectOutcome.CONFLICT, re.compile(r'冲突')),
+	(SelectOutcome.ALREADY_SELECTED, re.compile(r'当前教学班已选择')),
+	(SelectOutcome.FULL, re.compile(r'人数已满|容量已满|已满')),
+	(SelectOutcome.NOT_FOUND, re.compile(r'"message"\s*:\s*"?null\b')),
+)
+_MESSAGE_PATTERN = re.compile(r'"message"\s*:\s*"(?:选课失败：)?([^"]*)"')
+_FAILURE_PREFIX = '选课失败：'
+
+
+def _classify_text(text: str) -> SelectOutcome:
+	for outcome, pattern in _RULES:
+		if pattern.search(text):
+			return outcome
+	return SelectOutcome.RETRYABLE
+
+
+# 会话失效时服务器可能直接重定向到登录页面（响应体为空）
+_LOGIN_LOCATION = re.compile(r'LoginToXk|/jsxsd/?(?:$|[?#])')
+
+
+def is_login_redirect(status_code: int, location: Optional[str]) -> bool:
+	"""响应是否为重定向到登录页面"""
+	return 300 <= status_code < 400 and bool(location) and bool(_LOGIN_LOCATION.search(location))
+
+
+def classify_select_response(text: str, status_code: int = 200, location: Optional[str] = None) -> SelectResult:
+	"""对选课接口的响应分类，status_code / location 为响应状态码和 Location 头"""
+	if is_login_redirect(status_code, location):
+		return SelectResult(SelectOutcome.SESSION_EXPIRED)
+	stripped = text.strip()
+	if stripped == 'null':
+		return SelectResult(SelectOutcome.NOT_FOUND)
+	if stripped.startswith('{'):
+		try:
+			data = json.loads(stripped)
+		except ValueError:
+			data = None
+		if isinstance(data, dict) and 'success' in data:
+			message = data.get('message')
+			if data['success'] is True or data['success'] == 'true':
+				return SelectResult(SelectOutcome.SUCCESS, message)
+			if message is None or message == 'null':
+				return SelectResult(SelectOutcome.NOT_FOUND)
+			message = str(message)
+			if message.startswith(_FAILURE_PREFIX):
+				message = message[len(_FAILURE_PREFIX):]
+			if message in ('', 'null'):
+				return SelectResult(SelectOutcome.NOT_FOUND)
+			outcome = _classify_text(message)
+			if outcome is SelectOutcome.SUCCESS:
+				outcome = SelectOutcome.RETRYABLE
+			return SelectResult(outcome, message)
+
+	outcome = _classify_text(text)
+	match = _MESSAGE_PATTERN.search(text) if outcome is not SelectOutcome.SESSION_EXPIRED else None
+	return SelectResult(outcome, match.group(1) if match else None)
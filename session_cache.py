@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+登录会话缓存
+按 (学号, 学期) 把 Cookie 与是否已进入选课保存到本地，重启后先验证缓存的会话，
+仍然有效时跳过验证码与登录
+"""
+
+import os
+import json
+import time
+from typing import Dict, List, Optional
+from dataclasses import dataclass, field, asdict
+
+import httpx
+
+
+@dataclass
+class SessionCacheConfig:
+	"""会话缓存配置"""
+	enabled: bool = True
+	path: str = 'session_cache.json'
+	max_age: float = 6 * 3600  # 超过该时长（秒）的缓存直接丢弃
+
+
+@dataclass
+class CachedSession:
+	"""缓存的单个会话"""
+	cookies: List[Dict[str, str]] = field(default_factory=list)
+	entered: bool = False  # 是否已进入选课页面
+	saved_at: float = 0.0
+
+
+class SessionCache:
+	"""保存在单个 JSON 文件中的会话缓存"""
+
+	def __init__(self, config: SessionCacheConfig):
+		self.config = config
+
+	@staticmethod
+	def key(username: str, semester: str) -> str:
+		return f'{username}@{semester}'
+
+	def _read_all(self) -> Dict[str, dict]:
+		try:
+			with open(self.config.path, 'r', encoding='utf-8') as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return {}
+
+	def _write_all(self, sessions: Dict[str, dict]):
+		"""先写临时文件再替换，避免中途崩溃留下损坏的缓存"""
+		tmp_path = f'{self.config.path}.tmp'
+		with open(tmp_path, 'w', encoding='utf-8') as f:
+			json.dump(sessions, f, ensure_ascii=False)
+		os.replace(tmp_path, self.config.path)
+
+	def load(self, username: str, semester: str) -> Optional[CachedSession]:
+		"""读取缓存的会话，不存在或已过期时返回 None"""
+		data = self._read_all().get(self.key(username, semester))
+		if not data:
+			return None
+		session = CachedSession(**data)
+		if time.time() - session.saved_at > self.config.max_age:
+			return None
+		return session
+
+	def save(self, username: str, semester: str, cookies: httpx.Cookies, entered: bool):
+		"""保存当前 Cookie 与选课状态"""
+		sessions = self._read_all()
+		session = CachedSession(
+			cookies=[
+				{'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path}
+				for cookie in cookies.jar
+			],
+			entered=entered,
+			saved_at=time.time(),
+		)
+		sessions[self.key(username, semester)] = asdict(session)
+		self._write_all(sessions)
+
+	def discard(self, username: str, semester: str):
+		"""删除失效的会话"""
+		sessions = self._read_all()
+		if sessions.pop(self.key(username, semester), None) is not None:
+			self._write_all(sessions)
+
+	@staticmethod
+	def restore_cookies(session: CachedSession, cookies: httpx.Cookies):
+		"""把缓存的 Cookie 写回客户端"""
+		for cookie in session.cookies:
+			cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'])
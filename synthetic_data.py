@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成测试数据
+生成与教务系统格式一致的课表页面，用于解析器的兼容性检查与基准测试
+"""
+
+import random
+from typing import List, Optional
+
+
+COURSE_NAMES = ('人人爱设计', '大学生安全文化', '走近中华优秀传统文化', '食物营养与食品安全', '时尚与品牌', '高等数学', '大学物理', '程序设计基础')
+COURSE_NATURES = ('文化素质类', '公共基础课', '专业核心课', '创新创业类')
+PERIODS = ('01-02节', '03-04节', '05-06节', '07-08节', '09-10节', '11-12节')
+WEEKS = ('1-10', '1-16', '1-8', '9-16', '2-16双', '1-15单', '1-8,10-12')
+ROOMS = ('A座101', '综合楼302', '新校区教学楼B-204', '线上')
+
+
+def _course_block(rng: random.Random, online: bool, class_first: bool) -> str:
+	"""生成一个隐藏的 kbcontent 课程块"""
+	course_id = f'{rng.randint(10000, 19999):06d}'
+	if online:
+		class_name = f'网上慕课-{course_id}'
+	else:
+		class_name = f'{rng.choice(COURSE_NAMES)}-{rng.randint(1, 30):02d}班'
+	fields = [
+		f"<font title='课程名称'>{rng.choice(COURSE_NAMES)}</font>",
+		f"<font title='选课人数'>{rng.randint(0, 300)}人</font>",
+		f"<font title='周次'>{rng.choice(WEEKS)}</font>",
+		f"<font title='节次'>{rng.choice(PERIODS)}</font>",
+		f"<font title='上课地点教室'>{rng.choice(ROOMS)}</font>",
+		f"<font title='上课总学时'>{rng.choice((16, 32, 48, 64))}</font>",
+		f"<font title='课程性质'>{rng.choice(COURSE_NATURES)}</font>",
+		f"<font title='行政班级名称'>计科{rng.randint(2001, 2012)}班</font>",
+	]
+	# 真实页面中字段可能缺失、教学班名称可能带 <br/>
+	fields = [field for field in fields if rng.random() > 0.05]
+	br = '<br/>' if rng.random() < 0.5 else ''
+	fields.append(f"<font title='教学班名称'>{class_name}{br}</font>")
+	rng.shuffle(fields)
+	attrs = 'class="kbcontent" style="display: none;"' if class_first else 'style="display: none;" class="kbcontent"'
+	return f'<div id="{course_id}-2" {attrs}>{"<br/>".join(fields)}</div>'
+
+
+def generate_timetable_page(blocks: int, online_ratio: float = 0.5, seed: Optional[int] = None, class_first: bool = False) -> str:
+	"""
+	生成包含 blocks 个课程块的教师课表页面
+
+	每个课程块都和真实页面一样跟在一个可见的 kbcontent1 摘要块之后，放在课表单元格中；
+	class_first 为 True 时使用 class 在 style 之前的属性顺序
+	"""
+	rng = random.Random(seed)
+	cells: List[str] = []
+	for index in range(blocks):
+		online = rng.random() < online_ratio
+		summary = f'<div id="{index}-1" class="kbcontent1" >{rng.choice(COURSE_NAMES)}<br/><font title=\'周次\'>{rng.choice(WEEKS)}</font></div>'
+		cells.append(f'<td width="123" height="28" align="center" valign="top">{summary}{_course_block(rng, online, class_first)}</td>')
+		if index % 7 == 6:
+			cells.append('</tr><tr>')
+	return (
+		'<html><head><meta http-equiv="Content-Type" content="text/html; charset=utf-8"><title>教师课表</title></head>'
+		'<body><div class="Nsb_pw"><table id="kbtable" border="1" width="100%" cellspacing="0" cellpadding="0" class="Nsb_table"><tr>'
+		+ ''.join(cells)
+		+ '</tr></table></div></body></html>'
+	)
+
+
+WEEKDAYS = ('星期一', '星期二', '星期三', '星期四', '星期五', '星期六', '星期日')
+
+
+def generate_weekly_timetable(fill: float = 0.6, per_cell: int = 1, online_ratio: float = 0.5, seed: Optional[int] = None,
+		class_first: bool = False) -> str:
+	"""
+	生成一位教师一周的课表页面：与真实页面一样为 6 个大节 × 7 天的网格，带星期表头和节次列。
+	每个单元格以 fill 的概率排课，排课的单元格放 1 到 per_cell 门课程（fill=1、per_cell>1 为密集课表），
+	未排课的单元格只有 &nbsp;；class_first 与 generate_timetable_page 相同
+	"""
+	rng = random.Random(seed)
+	rows = ['<tr><th width="70" height="28">&nbsp;</th>' + ''.join(f'<th width="123">{day}</th>' for day in WEEKDAYS) + '</tr>']
+	for period in PERIODS:
+		cells = [f'<th width="70" height="28">{period}</th>']
+		for day in range(len(WEEKDAYS)):
+			content = '&nbsp;'
+			if rng.random() < fill:
+				content = ''
+				for index in range(rng.randint(1, max(per_cell, 1))):
+					summary = f'<div id="{period}-{day}-{index}-1" class="kbcontent1" >{rng.choice(COURSE_NAMES)}<br/><font title=\'周次\'>{rng.choice(WEEKS)}</font></div>'
+					content += summary + _course_block(rng, rng.random() < online_ratio, class_first)
+			cells.append(f'<td width="123" height="28" align="center" valign="top">{content}</td>')
+		rows.append('<tr>' + ''.join(cells) + '</tr>')
+	return (
+		'<html><head><meta http-equiv="Content-Type" content="text/html; charset=utf-8"><title>教师课表</title></head>'
+		'<body><div class="Nsb_pw"><table id="kbtable" border="1" width="100%" cellspacing="0" cellpadding="0" class="Nsb_table">'
+		+ ''.join(rows)
+		+ '</table></div></body></html>'
+	)
+
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤'
+GIVEN_CHARS = '伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉萍红鹏辉建国文斌宇浩凯铁庆春跃栗瑄满'
+NAME_SUFFIXES = ('（外聘）', '（兼职）', '(返聘)')
+
+
+def generate_teachers(count: int, seed: Optional[int] = None, special_ratio: float = 0.0) -> List[dict]:
+	"""
+	生成 count 条教师记录（jg0101id、jgh、xm），约 5% 带"（外聘）"等后缀、少量重名；
+	special_ratio 比例的姓名带有冒号、引号、逗号等原格式转换会破坏的字符
+	"""
+	rng = random.Random(seed)
+	teachers = []
+	for index in range(count):
+		number = f'{index + 100000:06d}'
+		teacher_id = number if rng.random() < 0.8 else f'{rng.choice("knmz")}{index:04d}'
+		name = rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN_CHARS) for _ in range(rng.randint(1, 2)))
+		if rng.random() < 0.05:
+			name += rng.choice(NAME_SUFFIXES)
+		if rng.random() < special_ratio:
+			name += rng.choice(('（外聘:教务处）', ' {合聘}', '，兼职', ' "客座"'))
+		teachers.append({'jg0101id': teacher_id, 'jgh': number, 'xm': name})
+	return teachers
+
+
+def _js_string(value: str) -> str:
+	"""JS 单引号字符串字面量（整个数组写在双引号字符串中，双引号需要转义；生成的姓名不含单引号和反斜杠）"""
+	return "'" + value.replace('"', '\\"') + "'"
+
+
+def generate_teacher_list_page(teachers: List[dict]) -> str:
+	"""生成与 llsykb_find_jg0101.jsp 格式一致的教师列表页面"""
+	items = ','.join(
+		'{' + ','.join(f'{key}:{_js_string(value)}' for key, value in teacher.items()) + '}'
+		for teacher in teachers
+	)
+	return (
+		'<html><head><meta http-equiv="Content-Type" content="text/html; charset=utf-8"><title>按教师查询</title>'
+		'<script type="text/javascript">\n'
+		f'var js = "[{items}]";\n'
+		'function queryTeacher(){ var jsArr = eval(js); }\n'
+		'</script></head><body><form id="Form1" name="Form1" method="post"></form></body></html>'
+	)
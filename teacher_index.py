@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+教师目录索引
+把 data/parsed_data.json 中的教师列表整理成 id→姓名、姓名→id 列表以及规范化姓名→id 列表三张表。
+磁盘上只保存去重后的 id 与姓名两个平行数组（以及与原名不同的规范化姓名），加载时再生成三张表；
+源文件变化时自动重建
+"""
+
+import os
+import re
+import json
+from typing import Dict, Iterable, List, Optional
+
+
+SOURCE_PATH = 'data/parsed_data.json'
+INDEX_PATH = 'data/teacher_index.json'
+INDEX_VERSION = 2
+
+# 姓名末尾的括号后缀，如 "宋铁（外聘）"、"张三(兼职)"
+_SUFFIX_PATTERN = re.compile(r'\s*[（(][^（）()]*[）)]\s*$')
+
+
+def normalize_name(name: str) -> str:
+	"""去掉姓名末尾的括号后缀和空白"""
+	name = name.strip()
+	while True:
+		stripped = _SUFFIX_PATTERN.sub('', name)
+		if stripped == name:
+			return name
+		name = stripped
+
+
+class TeacherIndex:
+	"""教师目录索引，同名教师对应多个id，列表顺序与源文件一致"""
+
+	def __init__(self, ids: List[str], names: List[str], normalized: Optional[Dict[int, str]] = None):
+		self.ids = ids
+		self.names = names
+		# 与原名不同的规范化姓名，键为在 ids 中的位置
+		self.normalized = normalized if normalized is not None else {
+			position: normalize_name(name)
+			for position, name in enumerate(names)
+			if normalize_name(name) != name
+		}
+		self.id_name: Dict[str, str] = dict(zip(ids, names))
+		self.name_ids: Dict[str, List[str]] = {}
+		self.normalized_ids: Dict[str, List[str]] = {}
+		for position, (teacher_id, name) in enumerate(zip(ids, names)):
+			self.name_ids.setdefault(name, []).append(teacher_id)
+			self.normalized_ids.setdefault(self.normalized.get(position, name), []).append(teacher_id)
+
+	@classmethod
+	def build(cls, teachers: Iterable[dict], previous: Optional['TeacherIndex'] = None) -> 'TeacherIndex':
+		"""
+		从教师记录（含 jg0101id 与 xm 字段）构建索引，重复的id只保留第一条。
+		提供 previous 时姓名未变的教师沿用其中的规范化姓名，只为新增和改名的教师重新计算
+		"""
+		seen = set()
+		ids: List[str] = []
+		names: List[str] = []
+		for teacher in teachers:
+			teacher_id = teacher.get('jg0101id')
+			if not teacher_id or teacher_id in seen:
+				continue
+			seen.add(teacher_id)
+			ids.append(teacher_id)
+			names.append(teacher.get('xm', ''))
+		if previous is None:
+			return cls(ids, names)
+		previous_positions = {teacher_id: position for position, teacher_id in enumerate(previous.ids)}
+		normalized = {}
+		for position, (teacher_id, name) in enumerate(zip(ids, names)):
+			old_position = previous_positions.get(teacher_id)
+			if old_position is not None and previous.names[old_position] == name:
+				normalized_name = previous.normalized.get(old_position, name)
+			else:
+				normalized_name = normalize_name(name)
+			if normalized_name != name:
+				normalized[position] = normalized_name
+		return cls(ids, names, normalized)
+
+	def __len__(self) -> int:
+		return len(self.id_name)
+
+	def name_of(self, teacher_id: str) -> Optional[str]:
+		"""按id查姓名"""
+		return self.id_name.get(teacher_id)
+
+	def ids_for(self, name: str) -> List[str]:
+		"""按姓名查id：优先精确匹配，其次按去掉后缀的规范化姓名匹配"""
+		ids = self.name_ids.get(name)
+		if ids:
+			return ids
+		return self.normalized_ids.get(normalize_name(name), [])
+
+	def save(self, path: str, source_stat: Optional[os.stat_result] = None):
+		"""以紧凑 JSON 写入磁盘，记录源文件的大小和修改时间用于判断是否过期"""
+		data = {
+			'version': INDEX_VERSION,
+			'source': [source_stat.st_size, source_stat.st_mtime_ns] if source_stat else None,
+			'ids': self.ids,
+			'names': self.names,
+			'normalized': self.normalized,
+		}
+		tmp_path = f'{path}.tmp'
+		with open(tmp_path, 'w', encoding='utf-8') as f:
+			json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+		os.replace(tmp_path, path)
+
+	@classmethod
+	def load_or_build(cls, source_path: str = SOURCE_PATH, index_path: str = INDEX_PATH) -> Optional['TeacherIndex']:
+		"""读取索引，源文件更新过或索引不存在时重建；源文件不存在时返回 None"""
+		try:
+			source_stat = os.stat(source_path)
+		except OSError:
+			return None
+
+		try:
+			with open(index_path, 'r', encoding='utf-8') as f:
+				data = json.load(f)
+			if data.get('version') == INDEX_VERSION and data.get('source') == [source_stat.st_size, source_stat.st_mtime_ns]:
+				normalized = {int(position): name for position, name in data['normalized'].items()}
+				return cls(data['ids'], data['names'], normalized)
+		except (OSError, ValueError):
+			pass
+
+		with open(source_path, 'r', encoding='utf-8') as f:
+			index = cls.build(json.load(f))
+		index.save(index_path, source_stat)
+		return index
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+教师列表页面流式解析
+llsykb_find_jg0101.jsp 页面中的教师列表是一个写在 JS 字符串里的对象字面量数组：
+    var js = "[{jg0101id:'0000187',jgh:'0000187',xm:'宋铁（外聘）'},...]";
+TeacherListParser 按块接收页面内容，每读完一个对象就产出一条教师记录，不需要把整页或整个数组放进内存
+"""
+
+import os
+import re
+import json
+from typing import Dict, Iterable, Iterator, List
+
+from teacher_index import SOURCE_PATH
+
+
+_START_PATTERN = re.compile(r'var\s+js\s*=\s*"\s*\[')
+# 起始标记可能被分在两块之间，未找到时保留缓冲区末尾这么多字符
+_START_KEEP = 64
+# 分隔符加一个完整的对象字面量：引号内的字符串可以包含 { } , : 等任意字符
+_RECORD_PATTERN = re.compile(r"[\s,]*(\{(?:[^{}'\"]|'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")*\})", re.DOTALL)
+# 常见情况：字段名不带引号、字段值是不含转义的单引号字符串，可以一次 findall 取出
+_SIMPLE_BODY_PATTERN = re.compile(r"(?:[\w$]+:'[^'\\]*'(?:,(?!$)|$))*")
+_SIMPLE_FIELD_PATTERN = re.compile(r"([\w$]+):'([^'\\]*)'")
+_FIELD_PATTERN = re.compile(r"""\s*([\w$]+|'[^']*'|"[^"]*")\s*:\s*('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|[^,}\s]*)\s*(?:,|$)""", re.DOTALL)
+_ESCAPE_PATTERN = re.compile(r'\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)', re.DOTALL)
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+_SEPARATORS = ' \t\r\n,'
+# 单条记录的长度上限，超过仍不完整时视为页面格式错误
+MAX_RECORD_LENGTH = 64 * 1024
+
+
+def _unescape(match: re.Match) -> str:
+	escape = match.group(1)
+	if escape[0] in 'ux' and len(escape) > 1:
+		return chr(int(escape[1:], 16))
+	return _ESCAPES.get(escape, escape)
+
+
+def _literal(token: str):
+	"""把字段值的 JS 字面量转为 Python 值"""
+	if token[:1] in ('"', "'"):
+		return _ESCAPE_PATTERN.sub(_unescape, token[1:-1])
+	if token in ('true', 'false'):
+		return token == 'true'
+	if token == 'null':
+		return None
+	try:
+		return int(token)
+	except ValueError:
+		try:
+			return float(token)
+		except ValueError:
+			return token
+
+
+def parse_record(literal: str) -> Dict[str, object]:
+	"""解析单个对象字面量，如 {jg0101id:'0000187',xm:'宋铁（外聘）'}"""
+	body = literal[1:-1].strip()
+	if _SIMPLE_BODY_PATTERN.fullmatch(body):
+		return dict(_SIMPLE_FIELD_PATTERN.findall(body))
+	record: Dict[str, object] = {}
+	position = 0
+	while position < len(body):
+		match = _FIELD_PATTERN.match(body, position)
+		if match is None or match.end() == position:
+			raise ValueError(f'无法解析的教师记录: {literal[:80]}')
+		key = match.group(1)
+		if key[:1] in ('"', "'"):
+			key = key[1:-1]
+		record[key] = _literal(match.group(2))
+		position = match.end()
+	return record
+
+
+class TeacherListParser:
+	"""增量解析器：feed() 传入页面的下一块内容，返回这一块中读完的教师记录"""
+
+	def __init__(self):
+		self._buffer = ''
+		self._started = False
+		self.finished = False
+		self.count = 0
+
+	def feed(self, chunk: str) -> List[Dict[str, object]]:
+		if self.finished:
+			return []
+		self._buffer += chunk
+		if not self._started:
+			match = _START_PATTERN.search(self._buffer)
+			if match is None:
+				self._buffer = self._buffer[-_START_KEEP:]
+				return []
+			self._started = True
+			self._buffer = self._buffer[match.end():]
+		return self._drain()
+
+	def _drain(self) -> List[Dict[str, object]]:
+		records = []
+		buffer = self._buffer
+		position = 0
+		# 连续匹配完整的记录，中间出现其他字符时停下检查
+		for match in _RECORD_PATTERN.finditer(buffer):
+			if match.start() != position:
+				break
+			records.append(parse_record(match.group(1)))
+			position = match.end()
+
+		while position < len(buffer) and buffer[position] in _SEPARATORS:
+			position += 1
+		if position < len(buffer):
+			char = buffer[position]
+			if char == ']':
+				self.finished = True
+				position = len(buffer)
+			elif char != '{':
+				raise ValueError(f'教师列表格式错误: {buffer[position:position + 80]}')
+			elif len(buffer) - position > MAX_RECORD_LENGTH:
+				raise ValueError(f'教师记录过长: {buffer[position:position + 80]}')
+			# 否则记录还不完整，等待下一块
+		self._buffer = buffer[position:]
+		self.count += len(records)
+		return records
+
+	def close(self):
+		"""页面读完后调用，数组没有正常结束时报错"""
+		if not self._started:
+			raise ValueError('未找到教师数据')
+		if not self.finished:
+			raise ValueError('教师列表不完整')
+
+
+def iter_teacher_records(chunks: Iterable[str]) -> Iterator[Dict[str, object]]:
+	"""逐块解析页面内容，依次产出教师记录"""
+	parser = TeacherListParser()
+	for chunk in chunks:
+		yield from parser.feed(chunk)
+	parser.close()
+
+
+def save_teacher_list(chunks: Iterable[str], path: str = SOURCE_PATH) -> int:
+	"""
+	边解析边以紧凑 JSON 写入教师列表，返回教师数。
+	先写临时文件，解析失败时保留原文件
+	"""
+	tmp_path = f'{path}.tmp'
+	parser = TeacherListParser()
+	try:
+		with open(tmp_path, 'w', encoding='utf-8') as f:
+			f.write('[')
+			for chunk in chunks:
+				records = parser.feed(chunk)
+				if not records:
+					continue
+				# 每块的记录一起序列化，去掉外层方括号后拼接
+				if parser.count > len(records):
+					f.write(',')
+				f.write(json.dumps(records, ensure_ascii=False, separators=(',', ':'))[1:-1])
+			parser.close()
+			f.write(']')
+	except BaseException:
+		try:
+			os.remove(tmp_path)
+		except OSError:
+			pass
+		raise
+	os.replace(tmp_path, path)
+	return parser.count
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+教师列表增量刷新
+- 用上次响应的 ETag / Last-Modified 发出条件请求，服务器返回 304 时不再下载
+- 页面内容流式解析后按与 data/parsed_data.json 相同的紧凑格式序列化，与现有文件逐字节相同时不改写文件
+- 有变化时按 jg0101id 计算新增、移除与改名的教师，整体替换教师列表文件（先写临时文件），
+  索引沿用未变化教师的规范化姓名，课表缓存与课程目录只对移除和改名的教师失效
+"""
+
+import os
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from teacher_index import INDEX_PATH, SOURCE_PATH, TeacherIndex
+from teacher_list import iter_teacher_records
+
+
+STATE_PATH = 'data/teacher_list_state.json'
+
+
+@dataclass
+class TeacherDiff:
+	"""按 jg0101id 比较的教师列表变化"""
+	added: List[dict] = field(default_factory=list)
+	removed: List[dict] = field(default_factory=list)
+	renamed: List[Tuple[str, str, str]] = field(default_factory=list)  # (jg0101id, 原姓名, 新姓名)
+
+	@property
+	def changed(self) -> bool:
+		return bool(self.added or self.removed or self.renamed)
+
+	@property
+	def affected_ids(self) -> List[str]:
+		"""需要让下游缓存失效的教师（移除与改名的教师，新增的教师没有缓存）"""
+		return [teacher['jg0101id'] for teacher in self.removed] + [teacher_id for teacher_id, _, _ in self.renamed]
+
+	def __str__(self) -> str:
+		return f'新增 {len(self.added)} 位，移除 {len(self.removed)} 位，改名 {len(self.renamed)} 位'
+
+
+def _by_id(records: Iterable[dict]) -> Dict[str, dict]:
+	"""jg0101id -> 教师记录，重复的id只保留第一条（与 TeacherIndex.build 一致）"""
+	teachers: Dict[str, dict] = {}
+	for record in records:
+		teacher_id = record.get('jg0101id')
+		if teacher_id and teacher_id not in teachers:
+			teachers[teacher_id] = record
+	return teachers
+
+
+def diff_teachers(old: Iterable[dict], new: Iterable[dict]) -> TeacherDiff:
+	"""比较新旧教师列表"""
+	old_teachers = _by_id(old)
+	new_teachers = _by_id(new)
+	diff = TeacherDiff()
+	for teacher_id, teacher in new_teachers.items():
+		previous = old_teachers.get(teacher_id)
+		if previous is None:
+			diff.added.append(teacher)
+		elif previous.get('xm', '') != teacher.get('xm', ''):
+			diff.renamed.append((teacher_id, previous.get('xm', ''), teacher.get('xm', '')))
+	diff.removed = [teacher for teacher_id, teacher in old_teachers.items() if teacher_id not in new_teachers]
+	return diff
+
+
+def serialize(records: List[dict]) -> bytes:
+	"""与 save_teacher_list 写入的格式相同的紧凑 JSON"""
+	return json.dumps(records, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _write_atomic(path: str, data: bytes):
+	tmp_path = f'{path}.tmp'
+	with open(tmp_path, 'wb') as f:
+		f.write(data)
+	os.replace(tmp_path, path)
+
+
+class ListState:
+	"""上次获取教师列表的条件请求校验值与检查时间"""
+
+	def __init__(self, path: str = STATE_PATH):
+		self.path = path
+		self.data: Dict[str, object] = {}
+		try:
+			with open(path, 'r', encoding='utf-8') as f:
+				self.data = json.load(f)
+		except (OSError, ValueError):
+			pass
+
+	def checked_at(self) -> Optional[float]:
+		return self.data.get('checked_at')
+
+	def conditional_headers(self, semester: str) -> Dict[str, str]:
+		"""条件请求头，学期变化后不再使用上次的校验值"""
+		if self.data.get('semester') != semester:
+			return {}
+		headers = {}
+		if self.data.get('etag'):
+			headers['If-None-Match'] = self.data['etag']
+		if self.data.get('last_modified'):
+			headers['If-Modified-Since'] = self.data['last_modified']
+		return headers
+
+	def update(self, semester: str, response_headers=None):
+		"""记录本次检查时间，以及响应中的校验值（304 响应不带新的校验值时保留原值）"""
+		if self.data.get('semester') != semester:
+			self.data = {'semester': semester}
+		if response_headers is not None:
+			for key, header in (('etag', 'etag'), ('last_modified', 'last-modified')):
+				if response_headers.get(header):
+					self.data[key] = response_headers[header]
+		self.data['checked_at'] = time.time()
+		directory = os.path.dirname(self.path)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		_write_atomic(self.path, json.dumps(self.data, ensure_ascii=False).encode('utf-8'))
+
+
+def apply_teacher_list(chunks: Iterable[str], path: str = SOURCE_PATH, index_path: str = INDEX_PATH) -> Tuple[TeacherDiff, int]:
+	"""
+	解析新的教师列表页面并与现有文件比较，内容不同时整体替换文件并更新索引。
+	返回 (变化, 教师数)；内容完全相同时返回空的变化且不改写文件
+	"""
+	records = list(iter_teacher_records(chunks))
+	if not records:
+		raise ValueError('教师列表为空')
+	data = serialize(records)
+	try:
+		with open(path, 'rb') as f:
+			current = f.read()
+	except OSError:
+		current = None
+	if current == data:
+		return TeacherDiff(), len(records)
+
+	old_records = json.loads(current) if current else []
+	diff = diff_teachers(old_records, records)
+	previous = TeacherIndex.load_or_build(path, index_path) if current else None
+	_write_atomic(path, data)
+	# 文件替换后立即写入新索引；两步之间中断时索引按源文件的大小和修改时间判断为过期，下次自动重建
+	TeacherIndex.build(records, previous).save(index_path, os.stat(path))
+	return diff, len(records)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""验证码：本地模板识别（合成字符图片）与识别失败时交给终端输入"""
+
+import asyncio
+import io
+import random
+
+import pytest
+
+import captcha
+from captcha import CaptchaConfig, CaptchaProvider, SolverProvider, TemplateSolver, TerminalProvider, create_provider
+
+
+def render(text: str, noise: int = 0, seed: int = 0) -> bytes:
+	"""用 Pillow 自带字体画出验证码，放大 3 倍；noise 为不与字符相邻的孤立噪点数"""
+	from PIL import Image, ImageDraw, ImageFont
+	# 1 位图上绘制没有抗锯齿，同一字符在不同位置的像素完全相同
+	image = Image.new('1', (12 * len(text) + 8, 20), 1)
+	draw = ImageDraw.Draw(image)
+	font = ImageFont.load_default()
+	for index, char in enumerate(text):
+		draw.text((4 + 12 * index, 4), char, fill=0, font=font)
+	image = image.convert('L').resize((image.width * 3, image.height * 3), Image.NEAREST)
+	rng = random.Random(seed)
+	pixels = image.load()
+	added = 0
+	while added < noise:
+		x, y = rng.randrange(1, image.width - 1), rng.randrange(1, image.height - 1)
+		if all(pixels[x + dx, y + dy] == 255 for dx in (-1, 0, 1) for dy in (-1, 0, 1)):
+			pixels[x, y] = 0
+			added += 1
+	output = io.BytesIO()
+	image.save(output, 'PNG')
+	return output.getvalue()
+
+
+@pytest.fixture
+def solver(tmp_path):
+	pytest.importorskip('numpy')
+	pytest.importorskip('PIL')
+	solver = TemplateSolver(str(tmp_path / 'templates.npz'))
+	assert solver.learn(render('3f7k'), '3f7k')
+	assert solver.learn(render('ab2x'), 'ab2x')
+	return solver
+
+
+@pytest.mark.parametrize('text', ['k73f', 'xb2a', 'f3ak'])
+def test_recognizes_synthetic_glyphs(solver, text):
+	answer, confidence = solver.recognize(render(text, noise=40, seed=len(text)))
+	assert answer == text
+	assert confidence >= CaptchaConfig.min_confidence
+
+
+def test_templates_round_trip(solver):
+	solver.save()
+	loaded = TemplateSolver(solver.path)
+	assert list(loaded.labels) == list('3f7kab2x')
+	answer, confidence = loaded.recognize(render('2k3b'))
+	assert answer == '2k3b'
+	assert confidence == pytest.approx(1.0, abs=1e-4)
+
+
+def test_learn_rejects_wrong_length(solver):
+	assert not solver.learn(render('3f7k'), '3f7')
+	assert len(solver.labels) == 8
+
+
+class FixedSolver:
+	"""固定返回 (结果, 置信度) 的识别器"""
+
+	def __init__(self, answer: str, confidence: float):
+		self.answer = answer
+		self.confidence = confidence
+
+	def recognize(self, image: bytes):
+		return self.answer, self.confidence
+
+
+def test_low_confidence_falls_back_to_terminal(tmp_path, monkeypatch):
+	prompts = []
+	monkeypatch.setattr('builtins.input', lambda message: prompts.append(message) or ' 9z9z ')
+	provider = SolverProvider(FixedSolver('abcd', 0.4), 0.85, TerminalProvider('张三'), log=lambda message: None)
+	code_path = str(tmp_path / 'code.jpg')
+	assert asyncio.run(provider.solve(b'image', code_path)) == '9z9z'
+	assert prompts == [f'输入验证码（张三，见 {code_path}）：']
+	# 交给人工输入前保存了图片
+	assert (tmp_path / 'code.jpg').read_bytes() == b'image'
+
+
+def test_confident_answer_skips_terminal(tmp_path, monkeypatch):
+	monkeypatch.setattr('builtins.input', lambda message: pytest.fail('不应等待终端输入'))
+	provider = SolverProvider(FixedSolver('abcd', 0.9), 0.85, TerminalProvider(), log=lambda message: None)
+	assert asyncio.run(provider.solve(b'image', str(tmp_path / 'code.jpg'))) == 'abcd'
+
+
+def test_solver_provider_chain_without_templates(tmp_path, monkeypatch):
+	# 按配置创建的 solver -> input 链：没有模板时置信度为 0，改为终端输入
+	pytest.importorskip('numpy')
+	pytest.importorskip('PIL')
+	monkeypatch.setattr('builtins.input', lambda message: '3f7k')
+	config = CaptchaConfig(provider='solver', templates=str(tmp_path / 'missing.npz'), fallback='input')
+	provider = create_provider(config, log=lambda message: None)
+	assert isinstance(provider, SolverProvider)
+	assert isinstance(provider.fallback, TerminalProvider)
+	assert asyncio.run(provider.solve(render('3f7k'), str(tmp_path / 'code.jpg'))) == '3f7k'
+
+
+def test_solver_requires_numpy(monkeypatch):
+	monkeypatch.setattr(captcha, 'np', None)
+	with pytest.raises(RuntimeError, match='numpy'):
+		TemplateSolver()
+
+
+def test_provider_without_solve_fails_on_construction():
+	class Incomplete(CaptchaProvider):
+		pass
+
+	with pytest.raises(TypeError):
+		Incomplete()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""定时突发：对时必须能在开放前完成"""
+
+import pytest
+
+from autoselect import ConfigManager
+from benchmark import write_benchmark_config
+from clock_sync import min_sync_before
+
+
+def burst_config(directory, sync_before: float, sync_samples: int):
+	extra = f'[burst]\nopen_time = 2024-07-10 12:30:00\nsync_before = {sync_before}\nsync_samples = {sync_samples}\n'
+	path = write_benchmark_config(str(directory), 'http://127.0.0.1:1', '2024-2025-1', [['100001']], extra)
+	return ConfigManager(path).get_burst_config()
+
+
+def test_sync_before_covers_samples(tmp_path):
+	config = burst_config(tmp_path, min_sync_before(6), 6)
+	assert config.sync_before == min_sync_before(6)
+	assert config.sync_samples == 6
+
+
+def test_rejects_sync_before_shorter_than_sampling(tmp_path):
+	# 6 次采样约需 6 秒，开放前 3 秒才开始对时会让突发晚于开放时刻
+	with pytest.raises(ValueError, match='sync_before'):
+		burst_config(tmp_path, 3, 6)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""冲突预检：星期来自课表列，一周多次课都参与检查"""
+
+import json
+import os
+from dataclasses import dataclass
+
+from conflict_check import ConflictConfig, plan_courses
+from course_catalog import CourseCatalog, import_summary
+from timetable_parser import extract_online_courses
+
+
+@dataclass
+class Course:
+	course_id: str
+	priority: int = 0
+
+
+def cell(course_id: str, periods: str, weeks: str = '1-16') -> str:
+	return (
+		'<td><div style="display: none;" class="kbcontent">'
+		f"<font title='周次'>{weeks}</font><font title='节次'>{periods}</font>"
+		f"<font title='教学班名称'>网上慕课-{course_id}</font></div></td>"
+	)
+
+
+def page(*rows) -> str:
+	"""每行为 7 个单元格（星期一到星期日），None 为空单元格"""
+	body = ''.join(
+		'<tr><th>节次</th>' + ''.join(cell(*content) if content else '<td>&nbsp;</td>' for content in row) + '</tr>'
+		for row in rows
+	)
+	return f'<html><body><table id="kbtable">{body}</table></body></html>'
+
+
+def plan(catalog: CourseCatalog, course_ids, action='drop'):
+	meetings = catalog.get_meetings('2025-2026-1', course_ids)
+	slots = {
+		course_id: [(weeks, f'{weekday} {periods}'.strip()) for weekday, weeks, periods in rows]
+		for course_id, rows in meetings.items()
+	}
+	return plan_courses([Course(course_id) for course_id in course_ids], slots, [], ConflictConfig(enabled=True, action=action))
+
+
+def test_weekday_comes_from_table_column():
+	courses = extract_online_courses(page([None, ('000001', '09-10节'), None, None, None, None, ('000002', '09-10节')]))
+	assert [(course['课程ID'], course['星期']) for course in courses] == [('000001', '星期二'), ('000002', '星期日')]
+
+
+def test_same_periods_on_different_days_do_not_conflict(tmp_path):
+	courses = extract_online_courses(page(
+		[('000001', '09-10节'), ('000002', '09-10节'), ('000003', '09-10节'), None, None, None, None],
+		[('000004', '11-12节'), None, None, None, None, None, ('000001', '11-12节')],
+	))
+	with CourseCatalog(str(tmp_path / 'catalog.db')) as catalog:
+		catalog.upsert_courses('2025-2026-1', courses)
+		assert len(catalog.get_meetings('2025-2026-1', ['000001'])['000001']) == 2
+		result = plan(catalog, ['000001', '000002', '000003', '000004'])
+	assert result.conflicts == []
+	assert [course.course_id for course in result.courses] == ['000001', '000002', '000003', '000004']
+
+
+def test_second_weekly_meeting_takes_part(tmp_path):
+	courses = extract_online_courses(page(
+		[('000001', '09-10节'), None, None, None, None, None, None],
+		[None, None, ('000001', '11-12节'), None, None, None, None],
+		[None, None, ('000002', '11-12节'), None, None, None, None],
+	))
+	with CourseCatalog(str(tmp_path / 'catalog.db')) as catalog:
+		catalog.upsert_courses('2025-2026-1', courses)
+		result = plan(catalog, ['000001', '000002'])
+	assert result.conflicts == [('000001', '000002')]
+	assert [course.course_id for course in result.courses] == ['000001']
+
+
+def test_unknown_weekday_is_not_penalized(tmp_path):
+	# 没有星期的旧目录数据（如仓库中的汇总文件）无法判断，不能全部视为互相冲突
+	courses = [
+		{'课程ID': f'{index:06d}', '周次': '1-10', '节次': '09-10节', '教学班名称': f'网上慕课-{index:06d}'}
+		for index in range(1, 10)
+	]
+	path = tmp_path / 'summary.json'
+	path.write_text(json.dumps(courses, ensure_ascii=False), encoding='utf-8')
+	with CourseCatalog(str(tmp_path / 'catalog.db')) as catalog:
+		import_summary(catalog, '2025-2026-1', str(path))
+		course_ids = [course['课程ID'] for course in courses]
+		dropped = plan(catalog, course_ids, action='drop')
+		deprioritized = plan(catalog, course_ids, action='deprioritize')
+	assert len(dropped.courses) == 9 and not dropped.conflicts
+	assert sorted(dropped.unknown) == course_ids
+	assert all(course.priority == 0 for course in deprioritized.courses)
+
+
+def test_non_positive_max_sets_still_plans():
+	slots = {
+		'000001': [('1-16', '星期一 09-10节')],
+		'000002': [('1-16', '星期一 09-10节')],
+		'000003': [('1-16', '星期二 09-10节')],
+	}
+	courses = [Course('000001', 1), Course('000002'), Course('000003')]
+	for max_sets in (0, -1):
+		result = plan_courses(courses, slots, [], ConflictConfig(enabled=True, action='drop', max_sets=max_sets))
+		assert [course.course_id for course in result.courses] == ['000001', '000003']
+		assert result.outside == ['000002']
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""常驻模式：课程全部结束后保持会话，之后加入的课程不需要重新登录"""
+
+import asyncio
+
+from autoselect import ConfigManager
+from benchmark import BenchmarkSelector, write_benchmark_config
+from mock_server import MockJwcServer, MockServerConfig
+
+
+async def add_course_after_idle(directory, keepalive_interval: float, done):
+	server_config = MockServerConfig(default_seats=1, idle_timeout=0.5)
+	async with MockJwcServer(server_config) as server:
+		extra = f'[daemon]\nport = 0\nreload_interval = 0\nkeepalive_interval = {keepalive_interval}\n'
+		path = write_benchmark_config(str(directory), server.base_url, server_config.semester, [['100001']], extra)
+		selector = BenchmarkSelector(ConfigManager(path), verify_code=server_config.verify_code)
+		run = asyncio.ensure_future(selector.run())
+		try:
+			while '100001' not in server.stats.first_success:
+				await asyncio.sleep(0.05)
+			# 空闲时间超过服务器的会话超时
+			await asyncio.sleep(1.5)
+			selector.add_course('100002')
+			while not done(selector, server.stats):
+				await asyncio.sleep(0.05)
+		finally:
+			selector.stop()
+			await asyncio.wait_for(run, timeout=5)
+	return selector, server.stats
+
+
+def test_idle_daemon_keeps_session(tmp_path):
+	selector, stats = asyncio.run(asyncio.wait_for(add_course_after_idle(
+		tmp_path, 0.2, lambda selector, stats: '100002' in stats.first_success), timeout=15))
+	assert selector.keepalives > 0
+	assert stats.expired_hits == 0
+	assert selector.recovery_times == []
+
+
+def test_without_keepalive_session_expires(tmp_path):
+	# 对照：不保活时空闲后加入的课程需要重新登录（模拟服务器的空闲超时短于重试间隔，只检查到重新登录为止）
+	selector, stats = asyncio.run(asyncio.wait_for(add_course_after_idle(
+		tmp_path, 0, lambda selector, stats: selector.recovery_times), timeout=15))
+	assert stats.expired_hits > 0
+	assert selector.recovery_times
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""选课响应分类：教务系统真实回复的样例"""
+
+import pytest
+
+from select_result import SelectOutcome, classify_select_response
+
+
+LOGIN_PAGE = (
+	'<html><head><title>用户登录</title></head><body>'
+	'<form action="/jsxsd/xk/LoginToXk" method="post">用户名<input name="userAccount"/>'
+	'密码<input name="userPassword"/></form></body></html>'
+)
+
+
+@pytest.mark.parametrize('body, outcome, message', [
+	('{"success":true,"message":"选课成功"}', SelectOutcome.SUCCESS, '选课成功'),
+	('{"success":false,"message":"选课失败：此课程与已选课程上课时间冲突！"}', SelectOutcome.CONFLICT, '此课程与已选课程上课时间冲突！'),
+	('{"success":false,"message":"选课失败：当前教学班已选择！"}', SelectOutcome.ALREADY_SELECTED, '当前教学班已选择！'),
+	('{"success":false,"message":"选课失败：此课堂选课人数已满！"}', SelectOutcome.FULL, '此课堂选课人数已满！'),
+	('{"success":false,"message":null}', SelectOutcome.NOT_FOUND, None),
+	('{"success":false,"message":"null"}', SelectOutcome.NOT_FOUND, None),
+	('null', SelectOutcome.NOT_FOUND, None),
+	('{"success":false,"message":"选课失败：当前未开放选课！"}', SelectOutcome.RETRYABLE, '当前未开放选课！'),
+	(LOGIN_PAGE, SelectOutcome.SESSION_EXPIRED, None),
+	('', SelectOutcome.RETRYABLE, None),
+	('<html><body>503 Service Unavailable</body></html>', SelectOutcome.RETRYABLE, None),
+])
+def test_reply_bodies(body, outcome, message):
+	result = classify_select_response(body)
+	assert result.outcome is outcome
+	assert result.message == message
+
+
+def test_login_page_with_null_in_script_is_session_expired():
+	# 页面脚本中的 null 出现在登录标记之前，不能把课程当作不存在而永久放弃
+	page = '<html><head><script>var a=null;</script><title>用户登录</title></head><body>' + LOGIN_PAGE + '</body></html>'
+	assert classify_select_response(page).outcome is SelectOutcome.SESSION_EXPIRED
+
+
+def test_success_as_string():
+	assert classify_select_response('{"success":"true"}').outcome is SelectOutcome.SUCCESS
+
+
+def test_malformed_json_falls_back_to_rules():
+	result = classify_select_response('{"success":false,"message":"选课失败：此课堂选课人数已满！"')
+	assert result.outcome is SelectOutcome.FULL
+	assert result.message == '此课堂选课人数已满！'
+
+
+def test_finished_outcomes():
+	assert SelectOutcome.NOT_FOUND.finished
+	assert not SelectOutcome.SESSION_EXPIRED.finished
+	assert not SelectOutcome.FULL.finished
+	assert SelectOutcome.ALREADY_SELECTED.selected
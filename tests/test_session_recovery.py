@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""选课过程中会话失效：在模拟服务器上重新登录后继续选课"""
+
+import asyncio
+
+import pytest
+
+from autoselect import ConfigManager
+from benchmark import BenchmarkSelector, write_benchmark_config
+from mock_server import MockJwcServer, MockServerConfig
+from select_result import SelectOutcome, classify_select_response
+
+
+def test_login_redirect_is_session_expired():
+	assert classify_select_response('', 302, '/jsxsd/xk/LoginToXk').outcome is SelectOutcome.SESSION_EXPIRED
+	assert classify_select_response('', 302, 'http://csujwc.its.csu.edu.cn/jsxsd/').outcome is SelectOutcome.SESSION_EXPIRED
+	assert classify_select_response('', 302, '/jsxsd/xsxk/xsxk_index').outcome is SelectOutcome.RETRYABLE
+	assert classify_select_response('', 200, '/jsxsd/xk/LoginToXk').outcome is SelectOutcome.RETRYABLE
+
+
+async def run_until_selected(directory, expire_redirect: bool):
+	server_config = MockServerConfig(default_seats=0, release_after=1.2, session_ttl=0.8, expire_redirect=expire_redirect)
+	async with MockJwcServer(server_config) as server:
+		path = write_benchmark_config(str(directory), server.base_url, server_config.semester, [['100001', '100002']])
+		selector = BenchmarkSelector(ConfigManager(path), verify_code=server_config.verify_code)
+		await asyncio.wait_for(selector.run(), timeout=10)
+	return selector, server.stats
+
+
+@pytest.mark.parametrize('expire_redirect', [False, True], ids=['login-page', 'redirect'])
+def test_expiry_mid_run_recovers_and_selects(tmp_path, expire_redirect):
+	selector, stats = asyncio.run(run_until_selected(tmp_path, expire_redirect))
+	assert stats.expired_hits > 0
+	assert selector.recovery_times
+	assert sorted(stats.first_success) == ['100001', '100002']
+	assert selector.select_outcomes['not_found'] == 0
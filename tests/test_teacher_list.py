@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""教师列表流式解析：块边界、特殊字符姓名，以及与 parse_js_data 原实现的一致性"""
+
+import json
+
+import pytest
+
+from bench_pipeline import chunked, legacy_parse_js_data
+from synthetic_data import generate_teacher_list_page, generate_teachers
+from teacher_list import iter_teacher_records, save_teacher_list
+
+
+SPECIAL_TEACHERS = [
+	{'jg0101id': '0000187', 'jgh': '0000187', 'xm': '宋铁（外聘:教务处）'},
+	{'jg0101id': '0000188', 'jgh': '0000188', 'xm': '李明 "客座"'},
+	{'jg0101id': 'k0001', 'jgh': '100001', 'xm': '王昶，兼职,合聘'},
+	{'jg0101id': 'k0002', 'jgh': '100002', 'xm': '周瑄 {合聘}'},
+]
+
+
+def test_plain_names_match_legacy():
+	page = generate_teacher_list_page(generate_teachers(500, seed=1))
+	assert list(iter_teacher_records([page])) == legacy_parse_js_data(page)
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 64, 1000])
+def test_chunk_boundaries(size):
+	teachers = generate_teachers(200, seed=2, special_ratio=0.1)
+	page = generate_teacher_list_page(teachers)
+	assert list(iter_teacher_records(chunked(page, size))) == teachers
+
+
+@pytest.mark.parametrize('size', [1, 5, 100000])
+def test_names_with_colon_quote_and_comma(size):
+	page = generate_teacher_list_page(SPECIAL_TEACHERS)
+	assert list(iter_teacher_records(chunked(page, size))) == SPECIAL_TEACHERS
+
+
+def test_save_teacher_list(tmp_path):
+	teachers = generate_teachers(300, seed=3, special_ratio=0.1)
+	path = str(tmp_path / 'parsed_data.json')
+	assert save_teacher_list(chunked(generate_teacher_list_page(teachers), 1), path) == len(teachers)
+	with open(path, 'r', encoding='utf-8') as f:
+		assert json.load(f) == teachers
+
+
+def test_incomplete_page_keeps_previous_file(tmp_path):
+	path = tmp_path / 'parsed_data.json'
+	path.write_text('[]', encoding='utf-8')
+	page = generate_teacher_list_page(SPECIAL_TEACHERS)
+	truncated = page[:page.index(']";')]
+	with pytest.raises(ValueError):
+		save_teacher_list(chunked(truncated, 3), str(path))
+	assert path.read_text(encoding='utf-8') == '[]'
+	assert not (tmp_path / 'parsed_data.json.tmp').exists()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""课表单遍提取器与 course_finder.parse_course_data 原实现的兼容性"""
+
+import re
+from typing import Dict, List
+
+import pytest
+
+from synthetic_data import generate_timetable_page, generate_weekly_timetable
+from timetable_parser import WEEKDAY_FIELD, extract_online_courses
+
+
+def legacy_parse_course_data(html_content: str) -> List[Dict[str, object]]:
+	"""course_finder.parse_course_data 的原正则实现（去掉打印），作为兼容性检查的参照（bench_pipeline 也用它比较耗时）"""
+	pattern = r'<div[^>]*style="display:\s*none;"[^>]*class="kbcontent"[^>]*>(.*?)</div>'
+	matches = re.findall(pattern, html_content, re.DOTALL)
+	if not matches:
+		pattern = r'<div[^>]*class="kbcontent"[^>]*style="display:\s*none;"[^>]*>(.*?)</div>'
+		matches = re.findall(pattern, html_content, re.DOTALL)
+
+	courses = []
+	for match in matches:
+		course_info = {}
+		field_mappings = {
+			'课程名称': r'<font title=\'课程名称\'>([^<]+)</font>',
+			'选课人数': r'<font title=\'选课人数\'>(\d+)人</font>',
+			'周次': r'<font title=\'周次\'>([^<]+)</font>',
+			'节次': r'<font title=\'节次\'>([^<]+)</font>',
+			'上课地点': r'<font title=\'上课地点教室\'>([^<]+)</font>',
+			'上课总学时': r'<font title=\'上课总学时\'>(\d+)</font>',
+			'课程性质': r'<font title=\'课程性质\'>([^<]+)</font>',
+			'行政班级名称': r'<font title=\'行政班级名称\'>([^<]+)</font>'
+		}
+		for field_name, pattern in field_mappings.items():
+			match_result = re.search(pattern, match)
+			if match_result:
+				value = match_result.group(1)
+				if field_name in ['选课人数', '上课总学时']:
+					course_info[field_name] = int(value)
+				else:
+					course_info[field_name] = value
+
+		class_name_patterns = [
+			r'<font title=\'教学班名称\'>([^<]+)<br/></font>',
+			r'<font title=\'教学班名称\'>([^<]+)</font>',
+		]
+		for pattern in class_name_patterns:
+			class_name_match = re.search(pattern, match)
+			if class_name_match:
+				course_info['教学班名称'] = class_name_match.group(1)
+				break
+
+		if course_info:
+			if '教学班名称' in course_info and '网上慕课' in course_info['教学班名称']:
+				course_id_match = re.search(r'网上慕课-(\d{6})', course_info['教学班名称'])
+				if course_id_match:
+					course_info['课程ID'] = course_id_match.group(1)
+				courses.append(course_info)
+	return courses
+
+
+# 随机页面覆盖不到的边界情况
+EDGE_CASES = {
+	'空页面': '<html><body></body></html>',
+	'无课程块': '<div class="kbcontent1">高等数学</div>',
+	'属性顺序混合': (
+		'<div class="kbcontent" style="display: none;"><font title=\'教学班名称\'>网上慕课-000001</font></div>'
+		'<div style="display: none;" class="kbcontent"><font title=\'教学班名称\'>网上慕课-000002</font></div>'
+	),
+	'只有 class 在前': '<div id="a" class="kbcontent" style="display:none;"><font title=\'教学班名称\'>网上慕课-000003<br/></font></div>',
+	'重复字段与空值': (
+		'<div style="display: none;" class="kbcontent">'
+		'<font title=\'课程名称\'></font><font title=\'课程名称\'>人人爱设计</font>'
+		'<font title=\'选课人数\'>很多人</font><font title=\'选课人数\'>12人</font>'
+		'<font title=\'上课总学时\'>32学时</font><font title=\'上课总学时\'>32</font>'
+		'<font title=\'教学班名称\'>普通班</font><font title=\'教学班名称\'>网上慕课-000004<br/></font>'
+		'</div>'
+	),
+	'块内嵌套 div': (
+		'<div style="display: none;" class="kbcontent"><div style="display: none;" class="kbcontent">'
+		'<font title=\'教学班名称\'>网上慕课-000005</font></div>'
+		'<font title=\'教学班名称\'>网上慕课-000006</font></div>'
+	),
+	'class 在前块中嵌套 style 在前块': (
+		'<div style="display: none;" class="kbcontent"><font title=\'教学班名称\'>网上慕课-000007</font></div>'
+		'<div class="kbcontent" style="display: none;"><div style="display: none;" class="kbcontent">'
+		'<font title=\'教学班名称\'>网上慕课-000008</font></div>'
+	),
+	'字段跨行': '<div style="display: none;" class="kbcontent">\n<font title=\'周次\'>1-16</font>\n<font title=\'教学班名称\'>网上慕课-1234567</font>\n</div>',
+}
+
+
+def without_weekday(courses: List[Dict[str, object]]) -> List[list]:
+	"""比较时保留字典键顺序，去掉原实现没有的星期字段"""
+	return [[item for item in course.items() if item[0] != WEEKDAY_FIELD] for course in courses]
+
+
+@pytest.mark.parametrize('name', list(EDGE_CASES))
+def test_edge_cases_match_legacy(name):
+	page = EDGE_CASES[name]
+	assert without_weekday(extract_online_courses(page)) == [list(course.items()) for course in legacy_parse_course_data(page)]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_synthetic_pages_match_legacy(seed):
+	page = generate_timetable_page(40, seed=seed, class_first=seed % 5 == 0)
+	legacy = legacy_parse_course_data(page)
+	assert legacy
+	assert without_weekday(extract_online_courses(page)) == [list(course.items()) for course in legacy]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_weekly_timetables_match_legacy(seed):
+	page = generate_weekly_timetable(fill=0.8, per_cell=2, seed=seed, class_first=seed % 2 == 1)
+	courses = extract_online_courses(page)
+	assert without_weekday(courses) == [list(course.items()) for course in legacy_parse_course_data(page)]
+	# 一周课表中的课程都在星期列中
+	assert all(course[WEEKDAY_FIELD].startswith('星期') for course in courses)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+教师课表页面缓存
+按 (学期, jg0101id) 缓存页面内容哈希、解析出的课程列表和获取时间：
+有效期内直接使用缓存，过期后重新获取但页面哈希未变时跳过解析
+"""
+
+import os
+import json
+import time
+import hashlib
+from typing import Dict, List, Optional
+from dataclasses import dataclass
+
+# 解析结果的格式版本，解析器输出变化（如增加星期字段）后旧条目不再使用
+FORMAT_VERSION = 2
+
+
+@dataclass
+class CacheStats:
+	"""缓存命中统计"""
+	hits: int = 0  # 有效期内直接命中，未发请求
+	revalidated: int = 0  # 重新获取但页面未变，跳过解析
+	misses: int = 0  # 无缓存或页面已变化，需要解析
+
+	def __str__(self) -> str:
+		return f'命中 {self.hits}，内容未变 {self.revalidated}，未命中 {self.misses}'
+
+
+class TimetableCache:
+	"""保存在单个 JSON 文件中的课表缓存，超过容量时淘汰最久未使用的条目"""
+
+	def __init__(self, path: str = 'data/timetable_cache.json', ttl: float = 7 * 24 * 3600, max_entries: int = 5000):
+		self.path = path
+		self.ttl = ttl
+		self.max_entries = max_entries
+		self.stats = CacheStats()
+		self.entries: Dict[str, dict] = self._load()
+		self._dirty = False
+
+	def _load(self) -> Dict[str, dict]:
+		try:
+			with open(self.path, 'r', encoding='utf-8') as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return {}
+
+	@staticmethod
+	def key(semester: str, teacher_id: str) -> str:
+		return f'{semester}/{teacher_id}'
+
+	@staticmethod
+	def hash_page(text: str) -> str:
+		"""页面内容哈希"""
+		return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+	@staticmethod
+	def _copy(courses: List[dict]) -> List[dict]:
+		# 调用方会在课程上追加教师信息，返回副本避免污染缓存
+		return [dict(course) for course in courses]
+
+	def get_fresh(self, semester: str, teacher_id: str) -> Optional[List[dict]]:
+		"""有效期内的缓存课程列表，没有时返回 None"""
+		entry = self.entries.get(self.key(semester, teacher_id))
+		if entry is None or entry.get('format') != FORMAT_VERSION or time.time() - entry['fetched_at'] > self.ttl:
+			return None
+		entry['accessed_at'] = time.time()
+		self._dirty = True
+		self.stats.hits += 1
+		return self._copy(entry['courses'])
+
+	def get_by_hash(self, semester: str, teacher_id: str, page_hash: str) -> Optional[List[dict]]:
+		"""页面哈希与缓存一致时返回缓存的课程列表并刷新获取时间"""
+		entry = self.entries.get(self.key(semester, teacher_id))
+		if entry is None or entry['hash'] != page_hash or entry.get('format') != FORMAT_VERSION:
+			self.stats.misses += 1
+			return None
+		entry['fetched_at'] = entry['accessed_at'] = time.time()
+		self._dirty = True
+		self.stats.revalidated += 1
+		return self._copy(entry['courses'])
+
+	def put(self, semester: str, teacher_id: str, page_hash: str, courses: List[dict]):
+		"""保存新解析的课程列表"""
+		now = time.time()
+		self.entries[self.key(semester, teacher_id)] = {
+			'hash': page_hash,
+			'format': FORMAT_VERSION,
+			'courses': self._copy(courses),
+			'fetched_at': now,
+			'accessed_at': now,
+		}
+		self._dirty = True
+
+	def invalidate(self, semester: str, teacher_ids):
+		"""删除指定教师的缓存"""
+		for teacher_id in teacher_ids:
+			if self.entries.pop(self.key(semester, teacher_id), None) is not None:
+				self._dirty = True
+
+	def save(self):
+		"""按容量淘汰后写回磁盘"""
+		if not self._dirty:
+			return
+		if len(self.entries) > self.max_entries:
+			ordered = sorted(self.entries.items(), key=lambda item: item[1]['accessed_at'], reverse=True)
+			self.entries = dict(ordered[:self.max_entries])
+		tmp_path = f'{self.path}.tmp'
+		with open(tmp_path, 'w', encoding='utf-8') as f:
+			json.dump(self.entries, f, ensure_ascii=False, separators=(',', ':'))
+		os.replace(tmp_path, self.path)
+		self._dirty = False
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+课表页面单遍提取器
+用一个预编译的正则一遍扫描出页面中所有 kbcontent 课程块（两种属性顺序合并为一个分支），
+同一遍扫描中记下 <tr>、<td> 的位置，按课程块所在的课表列加上"星期"字段（原实现没有，节次本身不含星期）；
+每个块内再用一次 findall 取出全部 <font title='...'> 字段，输出与 course_finder.parse_course_data 的原实现一致。
+只有 class 在前的块中嵌套了 style 在前的块时（真实页面中没有）才会为 style 在前的块再扫描一遍页面
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+
+# 一遍扫描：<tr（捕获组 1 非空）、<td，或 kbcontent 课程块（捕获组 3 为块内容）；
+# 课程块的第一个分支为 style 在 class 之前（捕获组 2 非空），第二个分支为 class 在 style 之前
+_SCAN_PATTERN = re.compile(
+	r'<(?i:(tr)|td)\b'
+	r'|<div(?:[^>]*(s)tyle="display:\s*none;"[^>]*class="kbcontent"|[^>]*class="kbcontent"[^>]*style="display:\s*none;")[^>]*>(.*?)</div>',
+	re.DOTALL,
+)
+_STYLE_FIRST_BLOCK = re.compile(r'<div[^>]*style="display:\s*none;"[^>]*class="kbcontent"[^>]*>(.*?)</div>', re.DOTALL)
+_STYLE_FIRST_OPEN = re.compile(r'<div[^>]*style="display:\s*none;"[^>]*class="kbcontent"[^>]*>')
+# 非空且不带 <br/> 的 font 字段（标题、内容），以及带 <br/> 的教学班名称
+_FONT_PATTERN = re.compile(r"<font title='([^']*)'>([^<]+)</font>")
+_CLASS_NAME_BR_PATTERN = re.compile(r"<font title='教学班名称'>([^<]+)<br/></font>")
+_COURSE_ID_PATTERN = re.compile(r'网上慕课-(\d{6})')
+
+# 字段标题 -> 输出字段名，顺序即输出字典的键顺序
+FIELD_TITLES = (
+	('课程名称', '课程名称'),
+	('选课人数', '选课人数'),
+	('周次', '周次'),
+	('节次', '节次'),
+	('上课地点教室', '上课地点'),
+	('上课总学时', '上课总学时'),
+	('课程性质', '课程性质'),
+	('行政班级名称', '行政班级名称'),
+)
+# 数字字段 -> 取值格式
+_NUMBER_FIELDS = {
+	'选课人数': re.compile(r'(\d+)人'),
+	'上课总学时': re.compile(r'(\d+)'),
+}
+CLASS_NAME_TITLE = '教学班名称'
+WEEKDAY_FIELD = '星期'
+WEEKDAYS = ('星期一', '星期二', '星期三', '星期四', '星期五', '星期六', '星期日')
+
+
+class _Columns:
+	"""课表每行中节次标题用 <th>，之后第 n 个 <td> 为星期 n；按课程块在页面中的位置查它所在的列"""
+
+	def __init__(self):
+		# 扫描课程块时顺带记下的 <tr、<td 位置（递增）
+		self.rows: List[int] = []
+		self.cells: List[int] = []
+
+	def weekday(self, position: int) -> Optional[str]:
+		"""位置所在列的星期，不在课表单元格中时返回 None"""
+		row_index = bisect_right(self.rows, position) - 1
+		row = self.rows[row_index] if row_index >= 0 else -1
+		column = bisect_right(self.cells, position) - bisect_right(self.cells, row)
+		return WEEKDAYS[column - 1] if 1 <= column <= len(WEEKDAYS) else None
+
+
+def _block_contents(html_content: str) -> Tuple[List[Tuple[int, str]], _Columns]:
+	"""
+	一遍扫描取出所有课程块的 (位置, 内容) 与列位置表：有 style 在前的块时只用这些块，否则用 class 在前的块。
+	合并扫描会把嵌套在 class 在前块中的 style 在前块一并吞掉，出现这种嵌套时退回单独扫描
+	"""
+	columns = _Columns()
+	style_first: List[Tuple[int, str]] = []
+	class_first: List[Tuple[int, str]] = []
+	for match in _SCAN_PATTERN.finditer(html_content):
+		content = match.group(3)
+		if content is not None:
+			(style_first if match.group(2) else class_first).append((match.start(), content))
+		elif match.group(1):
+			columns.rows.append(match.start())
+		else:
+			columns.cells.append(match.start())
+	if any(_STYLE_FIRST_OPEN.search(content) for _, content in class_first):
+		return [(match.start(), match.group(1)) for match in _STYLE_FIRST_BLOCK.finditer(html_content)], columns
+	return style_first or class_first, columns
+
+
+def _parse_block(content: str) -> Dict[str, object]:
+	"""解析一个课程块：每个字段取第一个合法值，数字字段转为 int，教学班名称带 <br/> 的优先"""
+	pairs = _FONT_PATTERN.findall(content)
+	# 反序构造字典，同一标题保留第一次出现的值
+	first = dict(reversed(pairs))
+	course: Dict[str, object] = {}
+	for title, field in FIELD_TITLES:
+		value = first.get(title)
+		if value is None:
+			continue
+		if field in _NUMBER_FIELDS:
+			number = _parse_number(field, title, value, pairs)
+			if number is not None:
+				course[field] = number
+		else:
+			course[field] = value
+	match = _CLASS_NAME_BR_PATTERN.search(content)
+	class_name = match.group(1) if match else first.get(CLASS_NAME_TITLE)
+	if class_name is not None:
+		course[CLASS_NAME_TITLE] = class_name
+	return course
+
+
+def _parse_number(field: str, title: str, value: str, pairs: List[Tuple[str, str]]) -> Optional[int]:
+	"""数字字段：第一个值不合法时继续找后面合法的值"""
+	pattern = _NUMBER_FIELDS[field]
+	match = pattern.fullmatch(value)
+	if match is None:
+		for other_title, other_value in pairs:
+			if other_title == title:
+				match = pattern.fullmatch(other_value)
+				if match:
+					break
+	return int(match.group(1)) if match else None
+
+
+def extract_blocks(html_content: str) -> List[Dict[str, object]]:
+	"""提取页面中所有 kbcontent 课程块的字段（不做网上慕课过滤）"""
+	contents, columns = _block_contents(html_content)
+	blocks = []
+	for position, content in contents:
+		block = _parse_block(content)
+		_add_weekday(block, columns, position)
+		blocks.append(block)
+	return blocks
+
+
+def _add_weekday(course: Dict[str, object], columns: _Columns, position: int):
+	weekday = columns.weekday(position)
+	if weekday is not None:
+		course[WEEKDAY_FIELD] = weekday
+
+
+def extract_online_courses(html_content: str) -> List[Dict[str, object]]:
+	"""提取页面中的网上慕课课程，并从教学班名称中取出课程ID"""
+	courses = []
+	contents, columns = _block_contents(html_content)
+	for position, content in contents:
+		# 块内根本没有"网上慕课"时不必解析字段
+		if '网上慕课' not in content:
+			continue
+		course = _parse_block(content)
+		class_name = course.get(CLASS_NAME_TITLE)
+		if class_name is None or '网上慕课' not in class_name:
+			continue
+		match = _COURSE_ID_PATTERN.search(class_name)
+		if match:
+			course['课程ID'] = match.group(1)
+		_add_weekday(course, columns, position)
+		courses.append(course)
+	return courses
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求录制与回放
+录制：RecordingTransport（httpx）和 RecordingAdapter（requests）把每次请求的方法、路径、耗时与响应内容
+交给 TrafficRecorder，由后台线程序列化后以 gzip 成员追加写入日志，不阻塞事件循环。
+日志每行一条 JSON，每次运行以一行 {"session": 开始时间} 开头；请求体只记录摘要，不保存密码等表单内容。
+回放：ReplayTransport / ReplayAdapter 按 (方法, 路径, 请求体摘要) 依次返回录制的响应，并按原耗时等待：
+
+    python traffic_log.py stats data/traffic.jsonl.gz
+"""
+
+import io
+import os
+import sys
+import gzip
+import json
+import time
+import queue
+import base64
+import asyncio
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+TRAFFIC_PATH = 'data/traffic.jsonl.gz'
+# 只保存回放需要的响应头（不保存 Set-Cookie 等会话信息）
+KEPT_HEADERS = ('content-type', 'date', 'location')
+# 后台线程每批最多等待这么久再写入，减少 gzip 成员数
+FLUSH_INTERVAL = 0.5
+
+
+@dataclass
+class TrafficConfig:
+	"""请求录制与回放配置"""
+	mode: str = ''  # record 录制；replay 回放；为空时不启用
+	path: str = TRAFFIC_PATH
+	speed: float = 1.0  # 回放速度倍数，0 表示不等待
+
+
+def body_digest(content) -> Optional[str]:
+	"""请求体摘要，没有请求体时为 None"""
+	if not content:
+		return None
+	if isinstance(content, str):
+		content = content.encode('utf-8')
+	return hashlib.sha1(content).hexdigest()[:16]
+
+
+def _url_path(url: str) -> str:
+	parts = urlsplit(url)
+	return f'{parts.path}?{parts.query}' if parts.query else parts.path
+
+
+class TrafficRecorder:
+	"""追加写入的压缩请求日志。record() 只把记录放进队列，序列化和写文件都在后台线程中进行"""
+
+	def __init__(self, path: str = TRAFFIC_PATH):
+		self.path = path
+		self.started_at = time.monotonic()
+		self.count = 0
+		self._queue: queue.SimpleQueue = queue.SimpleQueue()
+		self._thread: Optional[threading.Thread] = None
+
+	def start(self):
+		if self._thread is not None:
+			return
+		directory = os.path.dirname(self.path)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		self.started_at = time.monotonic()
+		self._queue.put({'session': time.time()})
+		self._thread = threading.Thread(target=self._write_loop, name='traffic-recorder', daemon=True)
+		self._thread.start()
+
+	def close(self):
+		"""写完队列中剩余的记录后停止后台线程"""
+		if self._thread is None:
+			return
+		self._queue.put(None)
+		self._thread.join()
+		self._thread = None
+
+	def __enter__(self) -> 'TrafficRecorder':
+		self.start()
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def record(self, source: str, method: str, path: str, digest: Optional[str], started_at: float,
+			status: Optional[int] = None, headers=None, content: bytes = b'', error: Optional[str] = None):
+		"""记录一次请求，started_at 为 time.monotonic() 时刻；请求失败时只记录异常类型"""
+		entry = {
+			't': round(started_at - self.started_at, 6),
+			'd': round(time.monotonic() - started_at, 6),
+			'src': source,
+			'm': method,
+			'p': path,
+		}
+		if digest:
+			entry['k'] = digest
+		if error is not None:
+			entry['err'] = error
+		else:
+			entry['s'] = status
+			entry['h'] = {name: headers[name] for name in KEPT_HEADERS if name in headers}
+			try:
+				entry['b'] = content.decode('utf-8')
+			except UnicodeDecodeError:
+				entry['b64'] = base64.b64encode(content).decode('ascii')
+		self._queue.put(entry)
+		self.count += 1
+
+	def _write_loop(self):
+		while True:
+			entries = []
+			item = self._queue.get()
+			deadline = time.monotonic() + FLUSH_INTERVAL
+			while item is not None:
+				entries.append(item)
+				timeout = deadline - time.monotonic()
+				if timeout <= 0:
+					break
+				try:
+					item = self._queue.get(timeout=timeout)
+				except queue.Empty:
+					break
+			if entries:
+				self._append(entries)
+			if item is None:
+				return
+
+	def _append(self, entries: List[dict]):
+		# 每批写成一个完整的 gzip 成员，程序中途退出时已写入的记录仍可读取
+		lines = ''.join(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n' for entry in entries)
+		try:
+			with gzip.open(self.path, 'ab') as f:
+				f.write(lines.encode('utf-8'))
+		except OSError as e:
+			print(f'写入请求日志失败: {e}')
+
+
+def read_sessions(path: str = TRAFFIC_PATH) -> List[List[dict]]:
+	"""读取日志中的全部运行记录，每次运行为一个请求记录列表；文件末尾不完整时忽略残缺部分"""
+	sessions: List[List[dict]] = []
+	try:
+		with gzip.open(path, 'rt', encoding='utf-8') as f:
+			for line in f:
+				try:
+					entry = json.loads(line)
+				except ValueError:
+					break
+				if 'session' in entry:
+					sessions.append([])
+				elif sessions:
+					sessions[-1].append(entry)
+	except (EOFError, gzip.BadGzipFile):
+		pass
+	return sessions
+
+
+class ReplayLog:
+	"""按 (方法, 路径) 排队的录制响应；请求体摘要不同的请求优先匹配摘要相同的记录，只剩一条记录时重复返回"""
+
+	def __init__(self, entries: List[dict], source: Optional[str] = None):
+		self.entries: Dict[Tuple[str, str], List[dict]] = {}
+		for entry in entries:
+			if source is None or entry.get('src') == source:
+				self.entries.setdefault((entry['m'], entry['p']), []).append(entry)
+		self.served = 0
+		self.misses = 0
+
+	@classmethod
+	def load(cls, path: str = TRAFFIC_PATH, source: Optional[str] = None, session: int = -1) -> 'ReplayLog':
+		"""读取日志中的一次运行（默认最近一次），source 不为 None 时只回放该账号的请求"""
+		sessions = read_sessions(path)
+		if not sessions:
+			raise ValueError(f'请求日志中没有记录: {path}')
+		return cls(sessions[session], source)
+
+	def next_entry(self, method: str, path: str, digest: Optional[str]) -> Optional[dict]:
+		candidates = self.entries.get((method, path))
+		if not candidates:
+			self.misses += 1
+			return None
+		index = 0
+		if digest is not None:
+			index = next((i for i, entry in enumerate(candidates) if entry.get('k') == digest), 0)
+		self.served += 1
+		return candidates.pop(index) if len(candidates) > 1 else candidates[0]
+
+	@staticmethod
+	def content(entry: dict) -> bytes:
+		if 'b64' in entry:
+			return base64.b64decode(entry['b64'])
+		return entry.get('b', '').encode('utf-8')
+
+	def summary(self) -> str:
+		return f'请求回放: 命中 {self.served} 次，未匹配 {self.misses} 次'
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+	"""录制经过的请求与响应（响应内容会被完整读入后再交给客户端）"""
+
+	def __init__(self, transport: httpx.AsyncBaseTransport, recorder: TrafficRecorder, source: str = ''):
+		self.transport = transport
+		self.recorder = recorder
+		self.source = source
+
+	async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+		path = request.url.raw_path.decode('ascii')
+		digest = body_digest(await request.aread())
+		started_at = time.monotonic()
+		try:
+			response = await self.transport.handle_async_request(request)
+			try:
+				raw = b''.join([chunk async for chunk in response.aiter_raw()])
+			finally:
+				await response.aclose()
+		except httpx.TransportError as e:
+			self.recorder.record(self.source, request.method, path, digest, started_at, error=type(e).__name__)
+			raise
+		# 以完整内容重建响应，按 Content-Encoding 解码后的内容写入日志
+		response = httpx.Response(response.status_code, headers=response.headers, content=raw, request=request, extensions=response.extensions)
+		self.recorder.record(self.source, request.method, path, digest, started_at, response.status_code, response.headers, response.content)
+		return response
+
+	async def aclose(self):
+		await self.transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+	"""返回录制的响应，并按录制时的耗时（除以 speed）等待；没有匹配的记录时返回 404"""
+
+	def __init__(self, log: ReplayLog, speed: float = 1.0):
+		self.log = log
+		self.speed = speed
+
+	async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+		entry = self.log.next_entry(request.method, request.url.raw_path.decode('ascii'), body_digest(await request.aread()))
+		if entry is None:
+			return httpx.Response(404, request=request)
+		if self.speed > 0:
+			await asyncio.sleep(entry['d'] / self.speed)
+		if 'err' in entry:
+			raise getattr(httpx, entry['err'], httpx.TransportError)(f'回放录制的错误: {entry["err"]}', request=request)
+		return httpx.Response(entry['s'], headers=entry['h'], content=ReplayLog.content(entry), request=request)
+
+
+class RecordingAdapter(HTTPAdapter):
+	"""requests 的录制适配器（stream=True 时响应也会被完整读入）"""
+
+	def __init__(self, recorder: TrafficRecorder, source: str = '', **kwargs):
+		super().__init__(**kwargs)
+		self.recorder = recorder
+		self.source = source
+
+	def send(self, request, **kwargs):
+		path = _url_path(request.url)
+		digest = body_digest(request.body)
+		started_at = time.monotonic()
+		try:
+			response = super().send(request, **kwargs)
+			content = response.content
+		except requests.exceptions.RequestException as e:
+			self.recorder.record(self.source, request.method, path, digest, started_at, error=type(e).__name__)
+			raise
+		self.recorder.record(self.source, request.method, path, digest, started_at, response.status_code, response.headers, content)
+		return response
+
+
+class ReplayAdapter(BaseAdapter):
+	"""requests 的回放适配器"""
+
+	def __init__(self, log: ReplayLog, speed: float = 1.0):
+		super().__init__()
+		self.log = log
+		self.speed = speed
+
+	def send(self, request, **kwargs):
+		entry = self.log.next_entry(request.method, _url_path(request.url), body_digest(request.body))
+		response = requests.Response()
+		response.request = request
+		response.url = request.url
+		if entry is None:
+			response.status_code = 404
+			response.raw = io.BytesIO(b'')
+			return response
+		if self.speed > 0:
+			time.sleep(entry['d'] / self.speed)
+		if 'err' in entry:
+			raise getattr(requests.exceptions, entry['err'], requests.exceptions.ConnectionError)(f'回放录制的错误: {entry["err"]}', request=request)
+		response.status_code = entry['s']
+		response.headers = CaseInsensitiveDict(entry['h'])
+		response.encoding = get_encoding_from_headers(response.headers)
+		response.raw = io.BytesIO(ReplayLog.content(entry))
+		return response
+
+	def close(self):
+		pass
+
+
+def mount_traffic(session: requests.Session, config: TrafficConfig, recorder: Optional[TrafficRecorder] = None,
+		source: str = '') -> requests.Session:
+	"""按配置给 requests 会话挂载录制或回放适配器"""
+	if config.mode == 'replay':
+		adapter = ReplayAdapter(ReplayLog.load(config.path, source), config.speed)
+	elif config.mode == 'record' and recorder is not None:
+		adapter = RecordingAdapter(recorder, source)
+	else:
+		return session
+	session.mount('http://', adapter)
+	session.mount('https://', adapter)
+	return session
+
+
+def describe_session(entries: List[dict]) -> List[str]:
+	"""一次运行的请求统计：按路径统计请求数、状态码和耗时"""
+	if not entries:
+		return ['  （没有请求）']
+	lines = [f"  请求 {len(entries)} 次，历时 {max(e['t'] + e['d'] for e in entries):.3f}s，来源: {', '.join(sorted({e['src'] or '-' for e in entries}))}"]
+	paths: Dict[str, List[dict]] = {}
+	for entry in entries:
+		paths.setdefault(f"{entry['m']} {entry['p'].split('?', 1)[0]}", []).append(entry)
+	for name, group in sorted(paths.items(), key=lambda item: -len(item[1])):
+		durations = sorted(e['d'] for e in group)
+		statuses = Counter(str(e.get('s', e.get('err'))) for e in group)
+		lines.append(
+			f"  {name}: {len(group)} 次，耗时 p50 {durations[len(durations) // 2] * 1000:.1f}ms "
+			f"max {durations[-1] * 1000:.1f}ms，状态 {dict(statuses)}"
+		)
+	return lines
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description='请求日志统计')
+	parser.add_argument('command', choices=('stats',), help='stats: 按运行统计请求')
+	parser.add_argument('path', nargs='?', default=TRAFFIC_PATH, help='请求日志路径')
+	args = parser.parse_args(argv)
+	if not os.path.exists(args.path):
+		print(f"✗ 请求日志不存在: {args.path}")
+		return 1
+	sessions = read_sessions(args.path)
+	for index, entries in enumerate(sessions, 1):
+		print(f"第 {index} 次运行")
+		for line in describe_session(entries):
+			print(line)
+	print(f"共 {len(sessions)} 次运行")
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())